@@ -1,19 +1,923 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import bisect
+import calendar
 import datetime
-from tkcalendar import Calendar  # Es una librería externa, necesitas instalarla
+import heapq
+import itertools
+import queue
+import re
+import sqlite3
+import threading
+from concurrent.futures import Future
 
-# Para instalar tkcalendar:
-# pip install tkcalendar
+# El selector de fecha usa tkcalendar si está instalada (pip install tkcalendar);
+# si no, un calendario sencillo hecho con Tk (SimpleCalendar).
+
+def insert_sorted(items, item, key, reverse=False):
+    """
+    Inserta 'item' en la lista 'items', ordenada por 'key' (de mayor a menor si
+    'reverse'), buscando su sitio por bisección. Devuelve la posición en que quedó.
+    """
+    k = key(item)
+    if reverse:
+        lo, hi = 0, len(items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key(items[mid]) >= k:
+                lo = mid + 1
+            else:
+                hi = mid
+    else:
+        lo = bisect.bisect_right(items, k, key=key)
+    items.insert(lo, item)
+    return lo
+
+def add_months(day, months):
+    """Suma meses a una fecha; si el día no existe en el mes de destino, usa el último del mes."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+class RecurrenceRule:
+    """
+    Regla de un evento que se repite cada día, semana o mes ('daily', 'weekly',
+    'monthly', cada 'interval'), desde 'date' hasta la fecha 'until' o durante
+    'count' veces. Se guarda solo la regla, nunca sus repeticiones: la k-ésima
+    se calcula directamente a partir de la fecha inicial, así que ocupa lo mismo
+    dure lo que dure la serie, y occurrences() genera solo las de la ventana pedida.
+    """
+    FREQUENCIES = ("daily", "weekly", "monthly")
+
+    def __init__(self, rule_id, date, time, desc, freq, interval=1, until=None, count=None):
+        if freq not in self.FREQUENCIES:
+            raise ValueError(f"frecuencia desconocida: {freq!r}")
+        if until is None and count is None:
+            raise ValueError("la regla necesita una fecha final o un número de repeticiones")
+        self.rule_id = rule_id
+        self.date = date
+        self.time = time
+        self.desc = desc
+        self.freq = freq
+        self.interval = interval
+        self.until = until
+        self.count = count
+        self._start = datetime.date.fromisoformat(date)
+
+    def _nth(self, k):
+        """Fecha de la repetición k (la 0 es la fecha inicial)."""
+        if self.freq == "monthly":
+            return add_months(self._start, k * self.interval)
+        days = 7 if self.freq == "weekly" else 1
+        return self._start + datetime.timedelta(days=k * self.interval * days)
+
+    def _first_at_or_after(self, day):
+        """Número de la primera repetición en 'day' o después, sin recorrer las anteriores."""
+        if day <= self._start:
+            return 0
+        if self.freq == "monthly":
+            months = (day.year - self._start.year) * 12 + day.month - self._start.month
+            k = months // self.interval
+            # En meses cortos la repetición puede caer antes de 'day'
+            while self._nth(k) < day:
+                k += 1
+            return k
+        step = self.interval * (7 if self.freq == "weekly" else 1)
+        return -(-(day - self._start).days // step)
+
+    def occurrences(self, start=None, end=None):
+        """
+        Genera, por fecha, las repeticiones entre 'start' y 'end' (fechas
+        datetime.date, ambas incluidas; None = sin límite), como diccionarios de
+        evento cuyo id es ("rule", id de la regla, fecha).
+        """
+        until = None if self.until is None else datetime.date.fromisoformat(self.until)
+        if end is None or (until is not None and until < end):
+            end = until
+        if start is not None and end is not None and start > end:
+            return  # Ventana vacía (p. ej. un filtro con un mes o día que no existe)
+        try:
+            k = 0 if start is None else self._first_at_or_after(start)
+        except (ValueError, OverflowError):  # Más allá del año 9999
+            return
+        while self.count is None or k < self.count:
+            try:
+                day = self._nth(k)
+            except (ValueError, OverflowError):  # Más allá del año 9999
+                return
+            if end is not None and day > end:
+                return
+            date = day.isoformat()
+            yield {"id": ("rule", self.rule_id, date), "date": date, "time": self.time,
+                   "desc": self.desc, "rule": self.rule_id}
+            k += 1
+
+    def as_row(self):
+        """Tupla (id, fecha, hora, descripción, frecuencia, intervalo, hasta, veces) para guardarla."""
+        return (self.rule_id, self.date, self.time, self.desc, self.freq,
+                self.interval, self.until, self.count)
+
+class EventStore:
+    """
+    Almacén de eventos de la agenda.
+
+    Cada evento es un diccionario {"id", "date", "time", "desc"} guardado por su
+    id, que es creciente y nunca se reutiliza. Además se mantiene un índice
+    ordenado de claves (fecha, hora, id): añadir y borrar buscan su sitio por
+    bisección, y las consultas por fecha ("el día X", "entre X e Y") solo
+    localizan los extremos del tramo, en O(log n), sin recorrer los demás eventos.
+    Las fechas van en formato 'aaaa-mm-dd', que ordena igual como texto que como fecha.
+
+    Los eventos que se repiten se guardan aparte, como reglas (RecurrenceRule),
+    y solo se expanden al consultar una ventana de fechas con occurrences().
+    """
+    def __init__(self, first_id=0, first_rule_id=0):
+        self._events = {}
+        self._index = []  # (fecha, hora, id) ordenadas
+        self._ids = itertools.count(first_id)
+        self._rules = {}
+        self._rule_ids = itertools.count(first_rule_id)
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        """Recorre los eventos por fecha y hora."""
+        return (self._events[key[2]] for key in self._index)
+
+    def get(self, event_id):
+        return self._events.get(event_id)
+
+    def add(self, date, time, desc):
+        """Crea un evento con un id nuevo y lo devuelve."""
+        event = {"id": next(self._ids), "date": date, "time": time, "desc": desc}
+        self._events[event["id"]] = event
+        bisect.insort(self._index, (date, time, event["id"]))
+        return event
+
+    def load(self, rows):
+        """
+        Añade eventos ya existentes, como tuplas (id, fecha, hora, descripción),
+        saltándose los que ya están. El índice se reordena una sola vez al final.
+        """
+        for event_id, date, time, desc in rows:
+            if event_id not in self._events:
+                self._events[event_id] = {"id": event_id, "date": date, "time": time, "desc": desc}
+                self._index.append((date, time, event_id))
+        self._index.sort()
+
+    def delete(self, event_id):
+        """Borra el evento y lo devuelve (None si no existía)."""
+        event = self._events.pop(event_id, None)
+        if event is not None:
+            del self._index[self._position(event)]
+        return event
+
+    def _position(self, event):
+        return bisect.bisect_left(self._index, (event["date"], event["time"], event["id"]))
+
+    def on(self, date):
+        """Eventos de un día, por hora."""
+        return self.between(date, date)
+
+    def between(self, start=None, end=None, reverse=False):
+        """Eventos con fecha entre 'start' y 'end' (ambos incluidos; None = sin límite), por fecha y hora."""
+        low = () if start is None else (start,)
+        # "\0" hace que la clave quede justo detrás de todas las del día 'end'.
+        high = None if end is None else (end + "\0",)
+        return EventRange(self, low, high, reverse)
+
+    def with_prefix(self, prefix, reverse=False):
+        """Eventos cuya fecha empieza por 'prefix' (por ejemplo '2024' o '2024-05')."""
+        if not prefix:
+            return EventRange(self, (), None, reverse)
+        return EventRange(self, (prefix,), (prefix + "\uffff",), reverse)
+
+    # --- Eventos que se repiten ---
+
+    def add_rule(self, date, time, desc, freq, interval=1, until=None, count=None):
+        """Crea una regla de repetición con un id nuevo y la devuelve."""
+        rule = RecurrenceRule(next(self._rule_ids), date, time, desc, freq, interval, until, count)
+        self._rules[rule.rule_id] = rule
+        return rule
+
+    def load_rules(self, rows):
+        """Añade reglas ya existentes, como las tuplas de RecurrenceRule.as_row()."""
+        for row in rows:
+            self._rules[row[0]] = RecurrenceRule(*row)
+
+    def rules(self):
+        """Recorre las reglas de repetición."""
+        return iter(self._rules.values())
+
+    def delete_rule(self, rule_id):
+        """Borra la regla (con todas sus repeticiones) y la devuelve (None si no existía)."""
+        return self._rules.pop(rule_id, None)
+
+    def occurrences(self, start=None, end=None):
+        """Repeticiones de todas las reglas entre 'start' y 'end' (datetime.date), por fecha y hora."""
+        return heapq.merge(*(rule.occurrences(start, end) for rule in self._rules.values()),
+                           key=lambda e: (e["date"], e["time"]))
+
+class EventRange:
+    """
+    Tramo del EventStore entre dos claves, visto como una secuencia (len(),
+    índices y rebanadas) en orden de fecha o en orden inverso. No copia nada:
+    refleja los eventos que se añadan o borren después de crearlo.
+    """
+    def __init__(self, store, low, high, reverse=False):
+        self.store = store
+        self.low = low
+        self.high = high
+        self.reverse = reverse
+
+    def _bounds(self):
+        index = self.store._index
+        start = bisect.bisect_left(index, self.low)
+        end = len(index) if self.high is None else bisect.bisect_left(index, self.high)
+        return start, end
+
+    def __len__(self):
+        start, end = self._bounds()
+        return end - start
+
+    def __getitem__(self, position):
+        start, end = self._bounds()
+        if isinstance(position, slice):
+            first, last, _ = position.indices(end - start)
+            last = max(first, last)
+            if self.reverse:
+                keys = self.store._index[end - last:end - first][::-1]
+            else:
+                keys = self.store._index[start + first:start + last]
+            return [self.store._events[key[2]] for key in keys]
+        if position < 0:
+            position += end - start
+        if not 0 <= position < end - start:
+            raise IndexError(position)
+        key = self.store._index[end - 1 - position if self.reverse else start + position]
+        return self.store._events[key[2]]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def index(self, event):
+        """Posición del evento dentro del tramo, por bisección."""
+        start, end = self._bounds()
+        position = self.store._position(event)
+        if not start <= position < end or self.store._index[position][2] != event["id"]:
+            raise ValueError("el evento no está en el tramo")
+        return end - 1 - position if self.reverse else position - start
+
+class MergedRange(EventRange):
+    """
+    Un EventRange con otros eventos intercalados por fecha y hora (las repeticiones
+    de los eventos periódicos), sin copiar el tramo: 'extra' es una lista ya ordenada
+    y, para cada acceso, se calcula por bisección en qué posición cae cada uno de
+    sus eventos. A igual fecha y hora van primero los del tramo.
+    """
+    def __init__(self, events, extra):
+        super().__init__(events.store, events.low, events.high, events.reverse)
+        self.extra = extra
+        self._keys = [(e["date"], e["time"]) for e in extra]
+
+    def _positions(self, start, end):
+        """Posición, en orden de fecha, de cada evento de 'extra' dentro de la mezcla."""
+        index = self.store._index
+        # "\0" deja la clave detrás de todos los eventos del tramo con la misma fecha y hora.
+        return [bisect.bisect_left(index, (date, time + "\0"), start, end) - start + j
+                for j, (date, time) in enumerate(self._keys)]
+
+    def __len__(self):
+        return super().__len__() + len(self.extra)
+
+    def __getitem__(self, position):
+        start, end = self._bounds()
+        total = end - start + len(self.extra)
+        if isinstance(position, slice):
+            first, last, _ = position.indices(total)
+            last = max(first, last)
+        else:
+            if position < 0:
+                position += total
+            if not 0 <= position < total:
+                raise IndexError(position)
+            first, last = position, position + 1
+        if self.reverse:
+            first, last = total - last, total - first
+        positions = self._positions(start, end)
+        j = bisect.bisect_left(positions, first)
+        i = start + first - j
+        items = []
+        for merged in range(first, last):
+            if j < len(positions) and positions[j] == merged:
+                items.append(self.extra[j])
+                j += 1
+            else:
+                items.append(self.store._events[self.store._index[i][2]])
+                i += 1
+        if self.reverse:
+            items.reverse()
+        return items if isinstance(position, slice) else items[0]
+
+    def index(self, event):
+        """Posición de un evento del tramo dentro de la mezcla."""
+        start, end = self._bounds()
+        position = self.store._position(event)
+        if not start <= position < end or self.store._index[position][2] != event["id"]:
+            raise ValueError("el evento no está en el tramo")
+        merged = position - start + bisect.bisect_left(self._keys, (event["date"], event["time"]))
+        return len(self) - 1 - merged if self.reverse else merged
+
+class AgendaStorage:
+    """
+    Guarda la agenda en una base de datos SQLite, con un índice por fecha y hora.
+    Los eventos que se repiten se guardan como una sola fila con su regla.
+
+    Todas las operaciones las hace un hilo propio, en orden de llegada: add() y
+    delete() solo encolan el cambio y vuelven enseguida, así que la interfaz nunca
+    espera al disco. El hilo confirma en una sola transacción todos los cambios
+    que encuentra en la cola. Las lecturas (load_prefix, load_rules) pasan por la
+    misma cola, de modo que siempre ven los cambios encolados antes; quien lee
+    espera el resultado.
+
+    Si el hilo termina (por close() o porque no pudo abrir la base de datos), las
+    operaciones pendientes y las que lleguen después fallan enseguida con el motivo,
+    en lugar de esperar un resultado que nunca llegará.
+    """
+    def __init__(self, path="agenda.db"):
+        self.path = path
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = None  # Motivo por el que terminó el hilo, o None mientras funciona.
+        self._thread = threading.Thread(target=self._run, name="agenda-storage", daemon=True)
+        self._thread.start()
+
+    # --- Hilo de almacenamiento ---
+
+    def _run(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            self._stop(e)
+            return
+        try:
+            while True:
+                task = self._queue.get()
+                while task is not None:
+                    self._execute(connection, *task)
+                    try:
+                        task = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                try:
+                    connection.commit()
+                except sqlite3.Error as e:
+                    print(f"Error al guardar la agenda: {e}")
+                if task is None:
+                    break
+        except Exception as e:
+            self._stop(e)
+        finally:
+            connection.close()
+            self._stop(RuntimeError("el almacenamiento de la agenda está cerrado"))
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # AUTOINCREMENT guarda el mayor id usado, para no repetir ids de eventos borrados.
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                               date TEXT NOT NULL, time TEXT NOT NULL,
+                                               desc TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS events_date ON events (date, time);
+            CREATE TABLE IF NOT EXISTS rules (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                              date TEXT NOT NULL, time TEXT NOT NULL,
+                                              desc TEXT NOT NULL, freq TEXT NOT NULL,
+                                              interval INTEGER NOT NULL, until TEXT,
+                                              count INTEGER);
+        """)
+        return connection
+
+    def _stop(self, error):
+        """Marca el hilo como terminado y hace fallar las operaciones que quedaron en la cola."""
+        with self._lock:
+            if self._stopped is None:
+                self._stopped = error
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if task is not None and task[2] is not None:
+                task[2].set_exception(self._stopped)
+
+    @staticmethod
+    def _execute(connection, function, args, future):
+        try:
+            result = function(connection, *args)
+        except Exception as e:
+            if future is None:
+                print(f"Error al guardar la agenda: {e}")
+            else:
+                future.set_exception(e)
+        else:
+            if future is not None:
+                future.set_result(result)
+
+    def _submit(self, function, *args, wait=False):
+        future = Future() if wait else None
+        # Con el candado, el hilo no puede terminar entre la comprobación y el put()
+        # sin ver la tarea al vaciar la cola.
+        with self._lock:
+            stopped = self._stopped
+            if stopped is None:
+                self._queue.put((function, args, future))
+        if stopped is not None:
+            if wait:
+                raise stopped
+            print(f"Error al guardar la agenda: {stopped}")
+            return None
+        return future.result() if wait else None
+
+    # --- Operaciones (se ejecutan en el hilo de almacenamiento) ---
+
+    @staticmethod
+    def _insert(connection, event):
+        connection.execute("INSERT INTO events (id, date, time, desc) VALUES (?, ?, ?, ?)",
+                           (event["id"], event["date"], event["time"], event["desc"]))
+
+    @staticmethod
+    def _delete(connection, event_ids):
+        connection.executemany("DELETE FROM events WHERE id = ?", ((i,) for i in event_ids))
+
+    @staticmethod
+    def _select_prefix(connection, prefix):
+        if not prefix:
+            return connection.execute("SELECT id, date, time, desc FROM events").fetchall()
+        return connection.execute("SELECT id, date, time, desc FROM events WHERE date >= ? AND date < ?",
+                                  (prefix, prefix + "\uffff")).fetchall()
+
+    @staticmethod
+    def _select_from(connection, date):
+        return connection.execute("SELECT id, date, time, desc FROM events WHERE date >= ?",
+                                  (date,)).fetchall()
+
+    @staticmethod
+    def _insert_rule(connection, row):
+        connection.execute("INSERT INTO rules (id, date, time, desc, freq, interval, until, count) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    @staticmethod
+    def _delete_rules(connection, rule_ids):
+        connection.executemany("DELETE FROM rules WHERE id = ?", ((i,) for i in rule_ids))
+
+    @staticmethod
+    def _select_rules(connection):
+        return connection.execute("SELECT id, date, time, desc, freq, interval, until, count "
+                                  "FROM rules").fetchall()
+
+    @staticmethod
+    def _select_next_id(connection, table):
+        row = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        return 0 if row is None else row[0] + 1
+
+    # --- Interfaz ---
+
+    def add(self, event):
+        """Guarda un evento nuevo (sin esperar)."""
+        self._submit(self._insert, dict(event))
+
+    def delete(self, event_ids):
+        """Borra eventos por id (sin esperar)."""
+        self._submit(self._delete, list(event_ids))
+
+    def load_prefix(self, prefix):
+        """Devuelve las tuplas (id, fecha, hora, descripción) de los eventos cuya fecha empieza por 'prefix'."""
+        return self._submit(self._select_prefix, prefix, wait=True)
+
+    def load_from(self, date):
+        """Devuelve las tuplas (id, fecha, hora, descripción) de los eventos del día 'date' en adelante."""
+        return self._submit(self._select_from, date, wait=True)
+
+    def next_id(self):
+        """Primer id libre: uno más que el mayor usado nunca."""
+        return self._submit(self._select_next_id, "events", wait=True)
+
+    def add_rule(self, rule):
+        """Guarda una regla de repetición nueva (sin esperar)."""
+        self._submit(self._insert_rule, rule.as_row())
+
+    def delete_rules(self, rule_ids):
+        """Borra reglas de repetición por id (sin esperar)."""
+        self._submit(self._delete_rules, list(rule_ids))
+
+    def load_rules(self):
+        """Devuelve todas las reglas de repetición: son pocas, ocupe lo que ocupe cada serie."""
+        return self._submit(self._select_rules, wait=True)
+
+    def next_rule_id(self):
+        """Primer id libre para una regla de repetición."""
+        return self._submit(self._select_next_id, "rules", wait=True)
+
+    def close(self):
+        """Espera a que se guarden los cambios pendientes y termina el hilo."""
+        self._queue.put(None)
+        self._thread.join()
+
+def event_datetime(event):
+    """Fecha y hora del evento como datetime, o None si no tienen el formato 'aaaa-mm-dd' y 'HH:MM'."""
+    try:
+        return datetime.datetime.strptime(f"{event['date']} {event['time']}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+
+class ReminderScheduler:
+    """
+    Avisa de cada evento cuando llega su hora, dentro del bucle de Tk.
+
+    Los eventos pendientes están en un montículo ordenado por fecha y hora, y
+    solo hay un temporizador (root.after) armado, para el primero: no se
+    consulta nada mientras no vence. Añadir o quitar un evento cuesta O(log n) y
+    vuelve a armar el temporizador solo si cambia el primero. Los eventos
+    quitados se marcan y se descartan al llegar a la cabeza del montículo. De
+    cada regla de repetición solo hay en el montículo su próxima repetición; al
+    avisar de ella se añade la siguiente.
+    """
+    # Como mucho se duerme un día seguido, por si el reloj del sistema cambia entretanto.
+    MAX_WAIT_MS = 24 * 60 * 60 * 1000
+
+    def __init__(self, root, on_due):
+        self.root = root
+        self.on_due = on_due
+        self._heap = []  # (fecha y hora, n.º de orden, clave, evento, regla o None)
+        self._current = {}  # Clave -> n.º de orden de su entrada vigente en el montículo
+        self._order = itertools.count()
+        self._timer = None
+        self._timer_due = None
+
+    def load(self, events, rules=()):
+        """Añade muchos eventos y reglas a la vez: el montículo se forma una sola vez, en O(n)."""
+        now = datetime.datetime.now()
+        for event in events:
+            self._push(event_datetime(event), event["id"], event, None, now)
+        for rule in rules:
+            self._push_next(rule, now)
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def add(self, event):
+        """Programa el aviso de un evento (si su hora aún no ha pasado)."""
+        if self._push(event_datetime(event), event["id"], event, None, datetime.datetime.now(), sift=True):
+            self._arm()
+
+    def add_rule(self, rule):
+        """Programa el aviso de la próxima repetición de una regla."""
+        if self._push_next(rule, datetime.datetime.now(), sift=True):
+            self._arm()
+
+    def discard(self, key):
+        """Quita el aviso de un evento (por su id) o de una regla (por ("rule", id de la regla))."""
+        if self._current.pop(key, None) is not None and self._timer_due is not None:
+            self._arm()
+
+    def stop(self):
+        """Desarma el temporizador."""
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = self._timer_due = None
+
+    def _push(self, due, key, event, rule, now, sift=False):
+        if due is None or due <= now:
+            return False
+        entry = (due, next(self._order), key, event, rule)
+        self._current[key] = entry[1]
+        if sift:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._heap.append(entry)
+        return True
+
+    def _push_next(self, rule, after, sift=False):
+        """Añade la primera repetición de la regla posterior a 'after'."""
+        for event in rule.occurrences(after.date()):
+            due = event_datetime(event)
+            if due is None:  # Todas las repeticiones tienen la misma hora
+                return False
+            if due > after:
+                return self._push(due, ("rule", rule.rule_id), event, rule, after, sift)
+        return False
+
+    def _arm(self):
+        """Deja el temporizador armado para el primer evento vigente (o desarmado si no hay ninguno)."""
+        heap = self._heap
+        while heap and self._current.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)  # Entrada de un evento quitado o sustituido
+        due = heap[0][0] if heap else None
+        if due == self._timer_due:
+            return
+        self.stop()
+        if due is not None:
+            delay = (due - datetime.datetime.now()).total_seconds() * 1000
+            self._timer = self.root.after(max(0, min(int(delay) + 1, self.MAX_WAIT_MS)), self._fire)
+            self._timer_due = due
+
+    def _fire(self):
+        self._timer = self._timer_due = None
+        now = datetime.datetime.now()
+        due_events = []
+        while self._heap and self._heap[0][0] <= now:
+            due, order, key, event, rule = heapq.heappop(self._heap)
+            if self._current.get(key) != order:
+                continue
+            del self._current[key]
+            due_events.append(event)
+            if rule is not None:
+                self._push_next(rule, now, sift=True)
+        self._arm()
+        for event in due_events:
+            self.on_due(event)
+
+class VirtualTreeview:
+    """
+    Lista virtualizada sobre un ttk.Treeview: el widget solo contiene las filas
+    visibles, y al desplazarse se reutilizan esas mismas filas con los datos de
+    la página que toca. Así, con decenas de miles de eventos, Tk no guarda más
+    que una ventana de filas y el desplazamiento cuesta lo mismo.
+
+    'source' es cualquier secuencia que admita len() y rebanadas (source[a:b]);
+    'values(elemento)' da los valores de la fila y 'key(elemento)' una clave única
+    para recordar la selección aunque el elemento salga de la ventana.
+    """
+    def __init__(self, parent, columns, values, key, source=()):
+        self.values = values
+        self.key = key
+        self.source = source
+        self.first = 0  # Posición en 'source' de la primera fila visible
+        self.visible_rows = 20
+        self.row_items = {}  # Fila del Treeview -> elemento que muestra
+        self.selected = {}  # Clave -> elemento, de todos los seleccionados (visibles o no)
+
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', height=self.visible_rows)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # La barra de desplazamiento no mueve el Treeview: indica y cambia la página.
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll(-3))  # Rueda del ratón en X11
+        self.tree.bind("<Button-5>", lambda event: self._scroll(3))
+        self.tree.bind("<Prior>", lambda event: self._scroll(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self._scroll(self.visible_rows))
+        self.tree.bind("<Up>", self._on_arrow)
+        self.tree.bind("<Down>", self._on_arrow)
+
+    def set_source(self, source, first=0):
+        """Cambia la secuencia mostrada (por ejemplo, tras ordenar o filtrar) y vuelve a pintar."""
+        self.source = source
+        self.first = first
+        self.refresh()
+
+    def refresh(self):
+        """Vuelve a pintar la ventana visible desde 'source'."""
+        total = len(self.source)
+        self.first = max(0, min(self.first, total - self.visible_rows))
+        page = self.source[self.first:self.first + self.visible_rows]
+
+        rows = self.tree.get_children()
+        for row in rows[len(page):]:
+            self.tree.delete(row)
+            del self.row_items[row]
+        rows = list(rows[:len(page)])
+        while len(rows) < len(page):
+            rows.append(self.tree.insert("", "end"))
+
+        for row, item in zip(rows, page):
+            self.tree.item(row, values=self.values(item))
+            self.row_items[row] = item
+        self.tree.selection_set([row for row in rows if self.key(self.row_items[row]) in self.selected])
+
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + len(page)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, index):
+        """Desplaza la ventana lo justo para que el elemento 'index' de 'source' quede visible."""
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.visible_rows:
+            self.first = index - self.visible_rows + 1
+        self.refresh()
+
+    def selected_items(self):
+        """Devuelve los elementos seleccionados, incluidos los que están fuera de la ventana."""
+        return list(self.selected.values())
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.refresh()
+
+    # --- Eventos ---
+
+    def yview(self, *args):
+        """Responde a la barra de desplazamiento: ('moveto', fracción) o ('scroll', n, 'units'|'pages')."""
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.source))
+            self.refresh()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self._scroll(amount * self.visible_rows if args[2] == 'pages' else amount)
+
+    def _scroll(self, rows):
+        self.first += rows
+        self.refresh()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        # En Windows 'delta' va en múltiplos de 120; en macOS son unidades sueltas.
+        return self._scroll(-3 if event.delta > 0 else 3)
+
+    def _on_arrow(self, event):
+        """Con las flechas en el borde de la ventana, desplaza la lista en lugar de quedarse quieto."""
+        rows = self.tree.get_children()
+        focus = self.tree.focus()
+        if not rows or focus not in rows:
+            return None
+        if event.keysym == "Up" and focus == rows[0] and self.first > 0:
+            self._scroll(-1)
+        elif event.keysym == "Down" and focus == rows[-1] and \
+                self.first + len(rows) < len(self.source):
+            self._scroll(1)
+        else:
+            return None  # Movimiento normal dentro de la ventana
+        self.tree.focus(focus)
+        return "break"
+
+    def _on_resize(self, event):
+        style = ttk.Style()
+        rowheight = int(style.lookup("Treeview", "rowheight") or 20)
+        # Se resta una fila para la cabecera.
+        rows = max(1, event.height // rowheight - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    def _on_select(self, event):
+        visible = {self.key(item): item for item in self.row_items.values()}
+        for key in visible:
+            self.selected.pop(key, None)
+        for row in self.tree.selection():
+            item = self.row_items[row]
+            self.selected[self.key(item)] = item
+
+class SimpleCalendar(tk.Frame):
+    """
+    Calendario mensual hecho solo con Tk, para cuando tkcalendar no está
+    instalada. Ofrece lo que la agenda usa de tkcalendar.Calendar: selection_set(),
+    get_date() (en formato 'aaaa-mm-dd') y el evento <<CalendarSelected>> al
+    pulsar un día. Los 42 botones de los días se crean una vez y al cambiar de
+    mes solo se les cambia el texto.
+    """
+    WEEKDAYS = ("Lu", "Ma", "Mi", "Ju", "Vi", "Sá", "Do")
+    MONTHS = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+              "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+
+    def __init__(self, parent, **options):
+        # Las opciones de tkcalendar (selectmode, date_pattern...) no hacen falta aquí
+        super().__init__(parent)
+        self.selected = datetime.date.today()
+        self.month = self.selected.replace(day=1)
+
+        header = tk.Frame(self)
+        header.grid(row=0, column=0, columnspan=7, sticky="ew")
+        tk.Button(header, text="<", command=lambda: self.show_month(-1)).pack(side=tk.LEFT)
+        tk.Button(header, text=">", command=lambda: self.show_month(1)).pack(side=tk.RIGHT)
+        self.title = tk.Label(header)
+        self.title.pack(side=tk.LEFT, expand=True)
+
+        for column, name in enumerate(self.WEEKDAYS):
+            tk.Label(self, text=name).grid(row=1, column=column)
+        self.day_buttons = []
+        for k in range(42):  # 6 semanas de 7 días
+            button = tk.Button(self, width=3)
+            button.grid(row=2 + k // 7, column=k % 7)
+            self.day_buttons.append(button)
+        self.render()
+
+    def render(self):
+        """Pinta el mes actual, con los días de los meses vecinos en gris y el seleccionado hundido."""
+        self.title.config(text=f"{self.MONTHS[self.month.month - 1]} {self.month.year}")
+        first = self.month - datetime.timedelta(days=self.month.weekday())
+        for k, button in enumerate(self.day_buttons):
+            day = first + datetime.timedelta(days=k)
+            button.config(text=day.day, command=lambda d=day: self._on_click(d),
+                          fg="black" if day.month == self.month.month else "gray",
+                          relief=tk.SUNKEN if day == self.selected else tk.RAISED)
+
+    def show_month(self, months):
+        self.month = add_months(self.month, months)
+        self.render()
+
+    def selection_set(self, day):
+        """Selecciona una fecha (datetime.date) y muestra su mes."""
+        self.selected = day
+        self.month = day.replace(day=1)
+        self.render()
+
+    def get_date(self):
+        return self.selected.isoformat()
+
+    def _on_click(self, day):
+        self.selection_set(day)
+        self.event_generate("<<CalendarSelected>>")
+
+class DatePicker:
+    """
+    Ventana para elegir una fecha. Se construye la primera vez que se abre (y
+    solo entonces se importa tkcalendar); después se oculta y se vuelve a
+    mostrar, sin crear widgets nuevos ni apilar ventanas. Al elegir una fecha
+    llama a on_pick con ella, en formato 'aaaa-mm-dd'.
+    """
+    def __init__(self, root, on_pick):
+        self.root = root
+        self.on_pick = on_pick
+        self.top = None
+        self.calendar = None
+
+    def _build(self):
+        self.top = tk.Toplevel(self.root)
+        self.top.title("Fecha")
+        self.top.transient(self.root)
+        self.top.protocol("WM_DELETE_WINDOW", self.hide)
+        self.top.bind("<Escape>", lambda event: self.hide())
+        try:
+            from tkcalendar import Calendar
+        except ImportError:
+            Calendar = SimpleCalendar
+        self.calendar = Calendar(self.top, selectmode='day', date_pattern='yyyy-mm-dd')
+        self.calendar.pack(padx=10, pady=10)
+        self.calendar.bind("<<CalendarSelected>>", lambda event: self.pick())
+        tk.Button(self.top, text="Seleccionar", command=self.pick).pack(pady=5)
+
+    def show(self, anchor, initial=""):
+        """Muestra el selector debajo del widget 'anchor', con la fecha 'initial' marcada si es válida."""
+        if self.top is None:
+            self._build()
+        try:
+            self.calendar.selection_set(datetime.date.fromisoformat(initial))
+        except ValueError:
+            pass
+        self.top.geometry(f"+{anchor.winfo_rootx()}+{anchor.winfo_rooty() + anchor.winfo_height()}")
+        self.top.deiconify()
+        self.top.lift()
+        # El foco se queda en el campo, para poder seguir escribiendo la fecha;
+        # Escape en él cierra el selector igual que en la ventana.
+        anchor.bind("<Escape>", lambda event: self.hide())
+
+    def hide(self):
+        self.top.withdraw()
+        # El foco vuelve a la ventana principal, no al campo de fecha, que volvería a abrir el selector
+        self.root.focus_set()
+
+    def pick(self):
+        selected_date = self.calendar.get_date()
+        self.hide()
+        self.on_pick(selected_date)
 
 class AgendaApp:
-    def __init__(self, root):
+    # Filtros de fecha completos (año, mes o día) para los que se cargan eventos del disco
+    LOADABLE_PREFIX = re.compile(r"\d{4}(-\d{2}){0,2}")
+    # Opciones de "Repetir" y la frecuencia de RecurrenceRule que corresponde a cada una
+    REPEAT_OPTIONS = {"No": None, "Cada día": "daily", "Cada semana": "weekly", "Cada mes": "monthly"}
+    # Sin fechas en el filtro, las repeticiones se muestran hasta este margen antes y después de hoy
+    RECURRENCE_HORIZON = datetime.timedelta(days=366)
+
+    def __init__(self, root, storage=None):
         self.root = root
         self.root.title("Agenda Personal")
         self.root.geometry("800x600")
 
-        # Almacena los eventos en una lista de diccionarios
-        self.events = []
+        # Los eventos se guardan en disco; en memoria solo están los de las fechas consultadas
+        self.storage = storage if storage is not None else AgendaStorage()
+        self.loaded_prefixes = set()
+        # Almacena los eventos, indexados por id y por fecha
+        self.store = EventStore(first_id=self.storage.next_id(), first_rule_id=self.storage.next_rule_id())
+        # Las reglas de los eventos que se repiten se cargan todas: cada una ocupa una fila
+        self.store.load_rules(self.storage.load_rules())
+        # Eventos mostrados (filtrados y ordenados); la lista virtual lee de aquí. Ordenados
+        # por fecha es un tramo del almacén (EventRange); por otra columna, una lista aparte.
+        self.view = self.store.with_prefix("")
+        self.sort_column = "Fecha"
+        self.sort_reverse = False
+        # Avisos a la hora de cada evento: los de hoy en adelante, estén o no en memoria
+        self.reminders = ReminderScheduler(self.root, self.remind)
+        upcoming = self.storage.load_from(datetime.date.today().isoformat())
+        self.reminders.load(({"id": i, "date": d, "time": t, "desc": x} for i, d, t, x in upcoming),
+                            self.store.rules())
 
         # --- Frames para organizar la interfaz ---
         self.input_frame = tk.Frame(self.root, padx=10, pady=10)
@@ -30,12 +934,18 @@ class AgendaApp:
         self.create_treeview()
         self.create_buttons()
 
+        # Al abrir solo se carga (y se muestra) el mes actual, por mucho historial que haya.
+        self.filter_entry.insert(0, datetime.date.today().strftime("%Y-%m"))
+        self.apply_filter()
+
     def create_input_widgets(self):
         """Crea los campos de entrada para la fecha, hora y descripción."""
         tk.Label(self.input_frame, text="Fecha:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
         self.date_entry = tk.Entry(self.input_frame)
         self.date_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
         self.date_entry.bind("<FocusIn>", self.show_calendar) # Vincula el evento de clic al widget del calendario
+        # El calendario no se construye hasta que se abre por primera vez
+        self.date_picker = DatePicker(self.root, self.set_date)
 
         tk.Label(self.input_frame, text="Hora (HH:MM):").grid(row=0, column=2, sticky="w", padx=5, pady=5)
         self.time_entry = tk.Entry(self.input_frame)
@@ -45,34 +955,131 @@ class AgendaApp:
         self.desc_entry = tk.Entry(self.input_frame)
         self.desc_entry.grid(row=0, column=5, sticky="ew", padx=5, pady=5)
 
+        tk.Label(self.input_frame, text="Filtrar fecha:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
+        self.filter_entry = tk.Entry(self.input_frame)
+        self.filter_entry.grid(row=1, column=1, sticky="ew", padx=5, pady=5)
+        # Muestra solo los eventos cuya fecha empieza por lo escrito (p. ej. '2024-05')
+        self.filter_entry.bind("<KeyRelease>", lambda event: self.apply_filter())
+
+        tk.Label(self.input_frame, text="Repetir:").grid(row=1, column=2, sticky="w", padx=5, pady=5)
+        self.repeat_combo = ttk.Combobox(self.input_frame, values=list(self.REPEAT_OPTIONS), state="readonly")
+        self.repeat_combo.current(0)
+        self.repeat_combo.grid(row=1, column=3, sticky="ew", padx=5, pady=5)
+
+        tk.Label(self.input_frame, text="Hasta (fecha o nº de veces):").grid(row=1, column=4, sticky="w", padx=5, pady=5)
+        self.until_entry = tk.Entry(self.input_frame)
+        self.until_entry.grid(row=1, column=5, sticky="ew", padx=5, pady=5)
+
     def show_calendar(self, event):
         """Muestra el DatePicker para seleccionar una fecha."""
-        top = tk.Toplevel(self.root)
-        cal = Calendar(top, selectmode='day', date_pattern='yyyy-mm-dd')
-        cal.pack(padx=10, pady=10)
+        self.date_picker.show(self.date_entry, self.date_entry.get().strip())
 
-        def set_date():
-            selected_date = cal.get_date()
-            self.date_entry.delete(0, tk.END)
-            self.date_entry.insert(0, selected_date)
-            top.destroy()
+    def set_date(self, selected_date):
+        """Escribe la fecha elegida en el DatePicker y pasa a la hora."""
+        self.date_entry.delete(0, tk.END)
+        self.date_entry.insert(0, selected_date)
+        self.time_entry.focus_set()
 
-        tk.Button(top, text="Seleccionar", command=set_date).pack(pady=5)
+    # Clave de ordenación de cada columna
+    SORT_KEYS = {
+        "Fecha": lambda e: (e["date"], e["time"]),
+        "Hora": lambda e: (e["time"], e["date"]),
+        "Descripción": lambda e: e["desc"].lower(),
+    }
 
     def create_treeview(self):
-        """Crea el TreeView para mostrar la lista de eventos."""
+        """Crea el TreeView (virtualizado, con su scrollbar) para mostrar la lista de eventos."""
         columns = ("Fecha", "Hora", "Descripción")
-        self.event_tree = ttk.Treeview(self.tree_frame, columns=columns, show='headings')
-        self.event_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.event_list = VirtualTreeview(self.tree_frame, columns,
+                                          values=lambda e: (e["date"], e["time"],
+                                                            e["desc"] + " ↻" if "rule" in e else e["desc"]),
+                                          key=lambda e: e["id"], source=self.view)
+        self.event_tree = self.event_list.tree
 
         for col in columns:
-            self.event_tree.heading(col, text=col)
+            # Pulsar la cabecera ordena por esa columna; pulsarla otra vez invierte el orden.
+            self.event_tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
             self.event_tree.column(col, width=200, anchor=tk.CENTER)
-            
-        # Añadir un scrollbar
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.event_tree.yview)
-        self.event_tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.update_headings()
+
+    def update_headings(self):
+        """Marca con una flecha la columna por la que se ordena."""
+        for col in self.SORT_KEYS:
+            arrow = (" ▼" if self.sort_reverse else " ▲") if col == self.sort_column else ""
+            self.event_tree.heading(col, text=col + arrow)
+
+    def sort_by(self, column):
+        """Ordena los eventos mostrados; solo se repintan las filas visibles."""
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        self.update_headings()
+        self.apply_filter()
+
+    def matches_filter(self, event):
+        return event["date"].startswith(self.filter_entry.get().strip())
+
+    def ensure_loaded(self, prefix):
+        """
+        Carga del disco los eventos de un año, mes o día ('2024', '2024-05', '2024-05-17'),
+        o todos si 'prefix' está vacío, salvo que ya estén en memoria. Los filtros
+        a medio escribir muestran lo que ya está cargado.
+        """
+        if prefix and not self.LOADABLE_PREFIX.fullmatch(prefix):
+            return
+        if any(prefix[:k] in self.loaded_prefixes for k in range(len(prefix) + 1)):
+            return
+        self.store.load(self.storage.load_prefix(prefix))
+        self.loaded_prefixes.add(prefix)
+
+    def filter_window(self, prefix):
+        """
+        Fechas primera y última (datetime.date) que puede abarcar el filtro: el año,
+        mes o día escrito, o lo completo que haya de él. None si no tiene límite.
+        """
+        match = self.LOADABLE_PREFIX.match(prefix)
+        if match is None:
+            return None, None
+        parts = [int(part) for part in match.group().split("-")]
+        try:
+            if len(parts) == 3:
+                day = datetime.date(*parts)
+                return day, day
+            if len(parts) == 2:
+                first = datetime.date(parts[0], parts[1], 1)
+                return first, add_months(first, 1) - datetime.timedelta(days=1)
+            return datetime.date(parts[0], 1, 1), datetime.date(parts[0], 12, 31)
+        except ValueError:  # Mes o día que no existe: no hay repeticiones que mostrar
+            return datetime.date.max, datetime.date.min
+
+    def apply_filter(self, first=0):
+        """
+        Muestra los eventos que cumplen el filtro de fecha, en el orden actual.
+        Por fecha basta con localizar el tramo en el índice del almacén; por
+        otra columna se ordena una copia del tramo. Las repeticiones de los
+        eventos periódicos se generan solo para las fechas del filtro (o, si no
+        tiene fechas, hasta RECURRENCE_HORIZON alrededor de hoy) y, por fecha, se
+        intercalan en el tramo sin copiarlo (MergedRange).
+        """
+        prefix = self.filter_entry.get().strip()
+        self.ensure_loaded(prefix)
+        start, end = self.filter_window(prefix)
+        today = datetime.date.today()
+        if start is None:
+            start = today - self.RECURRENCE_HORIZON
+        if end is None:
+            end = today + self.RECURRENCE_HORIZON
+        occurrences = [e for e in self.store.occurrences(start, end) if e["date"].startswith(prefix)]
+        by_date = self.sort_column == "Fecha"
+        if by_date and not occurrences:
+            self.view = self.store.with_prefix(prefix, reverse=self.sort_reverse)
+        elif by_date:
+            self.view = MergedRange(self.store.with_prefix(prefix, reverse=self.sort_reverse), occurrences)
+        else:
+            self.view = sorted(itertools.chain(self.store.with_prefix(prefix), occurrences),
+                               key=self.SORT_KEYS[self.sort_column], reverse=self.sort_reverse)
+        self.event_list.set_source(self.view, first)
 
     def create_buttons(self):
         """Crea los botones de acción."""
@@ -82,44 +1089,117 @@ class AgendaApp:
         self.delete_button = tk.Button(self.button_frame, text="Eliminar Evento", command=self.delete_event)
         self.delete_button.pack(side=tk.LEFT, padx=5, pady=5)
 
-        self.exit_button = tk.Button(self.button_frame, text="Salir", command=self.root.quit)
+        self.exit_button = tk.Button(self.button_frame, text="Salir", command=self.close)
         self.exit_button.pack(side=tk.RIGHT, padx=5, pady=5)
 
     def add_event(self):
-        """Agrega un nuevo evento a la lista y al TreeView."""
+        """Agrega un nuevo evento al almacén y al TreeView."""
         date = self.date_entry.get()
         time = self.time_entry.get()
         desc = self.desc_entry.get()
 
         if date and time and desc:
-            event_id = len(self.events) # Genera un ID simple para el evento
-            self.events.append({"id": event_id, "date": date, "time": time, "desc": desc})
-            self.event_tree.insert("", "end", iid=event_id, values=(date, time, desc))
+            freq = self.REPEAT_OPTIONS[self.repeat_combo.get()]
+            if freq is not None:
+                self.add_rule(date, time, desc, freq)
+                return
+            event = self.store.add(date, time, desc)
+            self.storage.add(event)
+            self.reminders.add(event)
+            if self.matches_filter(event):
+                # Se coloca en su sitio dentro de la vista ordenada y se desplaza hasta él.
+                if isinstance(self.view, EventRange):
+                    position = self.view.index(event)  # El tramo ya lo incluye
+                else:
+                    key = self.SORT_KEYS[self.sort_column]
+                    position = insert_sorted(self.view, event, key, self.sort_reverse)
+                self.event_list.scroll_to(position)
             
-            # Limpiar los campos de entrada
-            self.date_entry.delete(0, tk.END)
-            self.time_entry.delete(0, tk.END)
-            self.desc_entry.delete(0, tk.END)
+            self.clear_inputs()
         else:
             messagebox.showwarning("Campos vacíos", "Por favor, completa todos los campos para agregar un evento.")
 
+    def add_rule(self, date, time, desc, freq):
+        """Agrega un evento que se repite: se guarda solo su regla, hasta una fecha o un número de veces."""
+        end = self.until_entry.get().strip()
+        until = count = None
+        try:
+            start = datetime.date.fromisoformat(date)
+            if end.isdigit():
+                count = int(end)
+            else:
+                until = end
+                if datetime.date.fromisoformat(until) < start:
+                    raise ValueError
+        except ValueError:
+            messagebox.showwarning("Repetición",
+                                   "Indica la fecha como aaaa-mm-dd y, en 'Hasta', una fecha posterior "
+                                   "o el número de veces que se repite el evento.")
+            return
+        rule = self.store.add_rule(date, time, desc, freq, until=until, count=count)
+        self.storage.add_rule(rule)
+        self.reminders.add_rule(rule)
+        self.apply_filter(self.event_list.first)
+        self.clear_inputs()
+
+    def clear_inputs(self):
+        """Limpia los campos de entrada."""
+        self.date_entry.delete(0, tk.END)
+        self.time_entry.delete(0, tk.END)
+        self.desc_entry.delete(0, tk.END)
+        self.until_entry.delete(0, tk.END)
+        self.repeat_combo.current(0)
+
     def delete_event(self):
-        """Elimina el evento seleccionado del TreeView y de la lista."""
-        selected_item = self.event_tree.selection()
-        if not selected_item:
+        """Elimina los eventos seleccionados (aunque no estén a la vista) del almacén y del TreeView."""
+        selected_events = self.event_list.selected_items()
+        if not selected_events:
             messagebox.showwarning("Selección", "Por favor, selecciona un evento para eliminar.")
             return
 
+        # Una repetición no se borra sola: se borra la serie entera
+        rule_ids = {e['rule'] for e in selected_events if 'rule' in e}
+        selected_events = [e for e in selected_events if 'rule' not in e]
+        message = "¿Estás seguro de que quieres eliminar este evento?"
+        if rule_ids:
+            message = ("Los eventos repetidos seleccionados se eliminarán con todas sus repeticiones. "
+                       + message)
+
         # Diálogo de confirmación
-        if messagebox.askyesno("Confirmar Eliminación", "¿Estás seguro de que quieres eliminar este evento?"):
-            for item in selected_item:
-                item_id = int(self.event_tree.item(item)['iid'])
-                self.event_tree.delete(item)
-                # Opcional: eliminar también de la lista interna self.events
-                self.events = [e for e in self.events if e['id'] != item_id]
+        if messagebox.askyesno("Confirmar Eliminación", message):
+            for event in selected_events:
+                self.store.delete(event['id'])
+            self.storage.delete(e['id'] for e in selected_events)
+            for event in selected_events:
+                self.reminders.discard(event['id'])
+            for rule_id in rule_ids:
+                self.store.delete_rule(rule_id)
+                self.reminders.discard(("rule", rule_id))
+            if rule_ids:
+                self.storage.delete_rules(rule_ids)
+                self.event_list.selected.clear()
+                self.apply_filter(self.event_list.first)
+                return
+            if not isinstance(self.view, EventRange):
+                deleted_ids = {e['id'] for e in selected_events}
+                self.view = [e for e in self.view if e['id'] not in deleted_ids]
+            self.event_list.selected.clear()
+            self.event_list.set_source(self.view, self.event_list.first)
+
+    def remind(self, event):
+        """Avisa de que ha llegado la hora de un evento."""
+        self.root.bell()
+        messagebox.showinfo("Recordatorio", f"{event['date']} {event['time']}\n{event['desc']}")
+
+    def close(self):
+        """Cierra la aplicación después de guardar los cambios pendientes."""
+        self.reminders.stop()
+        self.storage.close()
+        self.root.quit()
 
 # --- Punto de entrada de la aplicación ---
 if __name__ == "__main__":
     root = tk.Tk()
     app = AgendaApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.close)
     root.mainloop()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# Generador de carga para el servidor de la Biblioteca ('Servidor de la
+# Biblioteca.py').
+#
+# Abre muchas conexiones simultáneas que mezclan búsquedas, préstamos y
+# devoluciones sobre un mismo conjunto de libros, de modo que los clientes
+# compiten por los mismos ejemplares. Al terminar comprueba con 'quien_tiene'
+# que cada libro que un cliente cree tener lo tiene de verdad y que ningún
+# título tiene más ejemplares prestados de los que existen, e informa, en JSON,
+# de las peticiones por segundo y de la latencia p50/p99 de cada operación.
+#
+# Uso (con el servidor en marcha):
+#     python "Generador de Carga.py" [--clientes 50] [--peticiones 200] [--libros 500]
+#                                    [--ejemplares 1]
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+SEMILLA = 2024
+
+
+class Cliente:
+    """Una conexión con el servidor que envía peticiones de una en una."""
+    def __init__(self, lector, escritor):
+        self.lector = lector
+        self.escritor = escritor
+
+    @classmethod
+    async def conectar(cls, host, puerto):
+        lector, escritor = await asyncio.open_connection(host, puerto, limit=1 << 20)
+        return cls(lector, escritor)
+
+    async def pedir(self, **peticion):
+        self.escritor.write(json.dumps(peticion).encode('utf-8') + b"\n")
+        await self.escritor.drain()
+        return json.loads(await self.lector.readline())
+
+    async def cerrar(self):
+        self.escritor.close()
+        await self.escritor.wait_closed()
+
+
+async def preparar(host, puerto, clientes, libros, ejemplares):
+    """Registra un usuario por cliente y añade los libros que se disputarán."""
+    cliente = await Cliente.conectar(host, puerto)
+    for i in range(clientes):
+        await cliente.pedir(op='registrar_usuario', user_id=f"carga_{i}", nombre=f"Cliente de carga {i}")
+    for i in range(libros):
+        await cliente.pedir(op='anadir_libro', isbn=f"CARGA-{i:06d}", titulo=f"Libro de carga {i}",
+                            autor=f"Autor {i % 50}", categoria="Carga", ejemplares=ejemplares)
+    await cliente.cerrar()
+
+
+async def simular_cliente(host, puerto, numero, peticiones, libros, latencias, contadores):
+    """
+    Envía 'peticiones' peticiones al azar y anota la latencia de cada una.
+    Devuelve (user_id, ISBN que este cliente cree tener prestados).
+    """
+    azar = random.Random(SEMILLA + numero)
+    user_id = f"carga_{numero}"
+    prestados = set()
+    cliente = await Cliente.conectar(host, puerto)
+    for _ in range(peticiones):
+        tirada = azar.random()
+        if tirada < 0.5:
+            op, peticion = 'buscar', {'autor': f"autor {azar.randrange(50)}", 'limite': 10}
+        elif tirada < 0.8 or not prestados:
+            op, peticion = 'prestar', {'user_id': user_id, 'isbn': f"CARGA-{azar.randrange(libros):06d}"}
+        else:
+            op, peticion = 'devolver', {'user_id': user_id, 'isbn': azar.choice(sorted(prestados))}
+        t0 = time.perf_counter()
+        respuesta = await cliente.pedir(op=op, **peticion)
+        latencias.setdefault(op, []).append(time.perf_counter() - t0)
+        clave = f"{op}_{'aceptados' if respuesta['ok'] else 'rechazados'}"
+        contadores[clave] = contadores.get(clave, 0) + 1
+        if respuesta['ok'] and op == 'prestar':
+            prestados.add(peticion['isbn'])
+        elif respuesta['ok'] and op == 'devolver':
+            prestados.discard(peticion['isbn'])
+    await cliente.cerrar()
+    return user_id, prestados
+
+
+def resumir_latencias(valores):
+    """Devuelve p50, p99 y máximo en milisegundos."""
+    if len(valores) < 2:
+        valores = valores * 2
+    cortes = statistics.quantiles(valores, n=100)
+    return {'peticiones': len(valores), 'p50_ms': cortes[49] * 1000, 'p99_ms': cortes[98] * 1000,
+            'max_ms': max(valores) * 1000}
+
+
+async def comprobar(host, puerto, tenencias, ejemplares):
+    """
+    Cuenta los libros que un cliente cree tener pero que el servidor no le atribuye,
+    y los títulos con más titulares que ejemplares.
+    """
+    cliente = await Cliente.conectar(host, puerto)
+    inconsistencias = 0
+    titulares = {}
+    for user_id, prestados in tenencias:
+        for isbn in prestados:
+            if isbn not in titulares:
+                titulares[isbn] = (await cliente.pedir(op='quien_tiene', isbn=isbn))['user_ids']
+            if user_id not in titulares[isbn]:
+                inconsistencias += 1
+    inconsistencias += sum(len(ids) > ejemplares for ids in titulares.values())
+    await cliente.cerrar()
+    return inconsistencias
+
+
+async def generar_carga(host, puerto, clientes, peticiones, libros, ejemplares=1):
+    """Ejecuta la prueba de carga completa y devuelve el informe como diccionario."""
+    await preparar(host, puerto, clientes, libros, ejemplares)
+    latencias, contadores = {}, {}
+    inicio = time.perf_counter()
+    tenencias = await asyncio.gather(*(
+        simular_cliente(host, puerto, i, peticiones, libros, latencias, contadores)
+        for i in range(clientes)))
+    segundos = time.perf_counter() - inicio
+    total = clientes * peticiones
+    return {
+        'clientes': clientes,
+        'peticiones': total,
+        'segundos': segundos,
+        'peticiones_por_segundo': total / segundos,
+        'latencia': resumir_latencias([v for valores in latencias.values() for v in valores]),
+        'latencia_por_operacion': {op: resumir_latencias(v) for op, v in sorted(latencias.items())},
+        'resultados': dict(sorted(contadores.items())),
+        'prestamos_inconsistentes': await comprobar(host, puerto, tenencias, ejemplares),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor de la Biblioteca.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--clientes", type=int, default=50, help="conexiones simultáneas")
+    parser.add_argument("--peticiones", type=int, default=200, help="peticiones por cliente")
+    parser.add_argument("--libros", type=int, default=500, help="libros que se disputan los clientes")
+    parser.add_argument("--ejemplares", type=int, default=1, help="ejemplares de cada libro")
+    argumentos = parser.parse_args()
+
+    informe = asyncio.run(generar_carga(argumentos.host, argumentos.puerto, argumentos.clientes,
+                                        argumentos.peticiones, argumentos.libros, argumentos.ejemplares))
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
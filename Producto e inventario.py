@@ -1,10 +1,29 @@
+import bisect
+import heapq
 import json
+import math
+import mmap
+import os
+import sqlite3
+import sys
+import unicodedata
+from array import array
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:  # Windows: no hay bloqueo entre procesos
+    fcntl = None
 
 class Producto:
     """
     Clase que representa un producto en el inventario.
     Contiene atributos para el ID, nombre, cantidad y precio del producto.
+    Usa __slots__ para no reservar un diccionario por instancia.
     """
+    __slots__ = ('_id', '_nombre', '_cantidad', '_precio')
+
     def __init__(self, producto_id, nombre, cantidad, precio):
         self._id = producto_id
         self._nombre = nombre
@@ -28,7 +47,11 @@ class Producto:
     def precio(self):
         return self._precio
 
-    # Setters para modificar la cantidad y el precio
+    # Setters para modificar el nombre, la cantidad y el precio
+    @nombre.setter
+    def nombre(self, nuevo_nombre):
+        self._nombre = nuevo_nombre
+
     @cantidad.setter
     def cantidad(self, nueva_cantidad):
         if nueva_cantidad >= 0:
@@ -49,66 +72,1062 @@ class Producto:
         """
         return f"ID: {self._id} | Nombre: {self._nombre} | Cantidad: {self._cantidad} | Precio: ${self._precio:.2f}"
 
-class Inventario:
+def normalizar_texto(texto):
     """
-    Clase que gestiona la colección de productos en el inventario.
-    Utiliza un diccionario para almacenar los productos.
+    Devuelve el texto en minúsculas y sin tildes, para comparar nombres
+    sin distinguir mayúsculas ni acentos ("Café" y "cafe" son iguales).
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+def _trigramas(texto):
+    """Devuelve el conjunto de subcadenas de tres caracteres del texto."""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class BloqueoArchivo:
     """
-    def __init__(self, archivo="inventario.json"):
+    Bloqueo exclusivo entre procesos sobre un archivo auxiliar (fcntl.flock).
+    Es reentrante dentro del mismo proceso: solo el primer 'with' lo adquiere.
+    En sistemas sin fcntl no bloquea.
+    """
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+        self._nivel = 0
+
+    def __enter__(self):
+        if self._nivel == 0 and fcntl is not None:
+            self._archivo = open(self.ruta, 'a')
+            fcntl.flock(self._archivo, fcntl.LOCK_EX)
+        self._nivel += 1
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._nivel -= 1
+        if self._nivel == 0 and self._archivo is not None:
+            fcntl.flock(self._archivo, fcntl.LOCK_UN)
+            self._archivo.close()
+            self._archivo = None
+
+class BloqueoSQLite:
+    """
+    Bloqueo de escritura sobre una base SQLite: abre una transacción BEGIN IMMEDIATE,
+    de modo que lo que se lee dentro del bloque no cambia hasta confirmarlo.
+    Al salir confirma lo que quede pendiente (o lo deshace si hubo una excepción).
+    Es reentrante como BloqueoArchivo.
+    """
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self._nivel = 0
+
+    def __enter__(self):
+        if self._nivel == 0 and not self.conexion.in_transaction:
+            self.conexion.execute("BEGIN IMMEDIATE")
+        self._nivel += 1
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._nivel -= 1
+        if self._nivel == 0 and self.conexion.in_transaction:
+            if tipo is None:
+                self.conexion.commit()
+            else:
+                self.conexion.rollback()
+
+def _firma_archivo(ruta):
+    """Identifica la versión de un archivo por (inodo, tamaño, fecha de modificación)."""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+
+def _aplicar_registro(productos, registro):
+    """
+    Aplica un registro de cambio sobre un diccionario de productos.
+    Los registros guardan valores absolutos, así que aplicarlos dos veces es inofensivo.
+    """
+    item_id = registro['id']
+    if registro['op'] == 'anadir':
+        productos[item_id] = Producto(item_id, registro['nombre'], registro['cantidad'], registro['precio'])
+    elif registro['op'] == 'eliminar':
+        productos.pop(item_id, None)
+    elif registro['op'] == 'actualizar' and item_id in productos:
+        producto = productos[item_id]
+        if 'nombre' in registro:
+            producto.nombre = registro['nombre']
+        if 'cantidad' in registro:
+            producto.cantidad = registro['cantidad']
+        if 'precio' in registro:
+            producto.precio = registro['precio']
+        productos[item_id] = producto
+
+class AlmacenamientoInventario:
+    """
+    Interfaz de los almacenamientos que puede usar Inventario.
+
+    - cargar(contenedor): devuelve el diccionario (o mapeo) de productos.
+    - guardar(productos, registros): persiste una lista de registros de cambios
+      ya aplicados en 'productos'.
+    - descartar(): deshace lo que aún no se haya guardado (tras una transacción fallida).
+    - compactar(productos): deja el almacenamiento en su forma más compacta.
+    - cerrar(): libera los recursos.
+
+    Para compartir el almacenamiento entre varios procesos:
+    - bloquear(): gestor de contexto que da acceso exclusivo mientras dura.
+    - hay_cambios_externos(): comprobación barata (sin bloqueo) de si otro proceso
+      guardó cambios desde la última lectura o escritura de este.
+    - cambios_externos(): con el bloqueo tomado, devuelve la lista de IDs que otro
+      proceso modificó, o None si hay que volver a cargar todo.
+    - aplicar_cambios_externos(productos): aplica los cambios devueltos por
+      cambios_externos().
+
+    Si 'resuelve_consultas' es True, el almacenamiento responde por sí mismo
+    buscar_por_nombre(), productos_por_cantidad() y totales(), y el Inventario
+    no construye índices en memoria.
+    """
+    resuelve_consultas = False
+
+    def cargar(self, contenedor):
+        raise NotImplementedError
+
+    def guardar(self, productos, registros):
+        raise NotImplementedError
+
+    def descartar(self):
+        pass
+
+    def compactar(self, productos):
+        pass
+
+    def cerrar(self):
+        pass
+
+    def bloquear(self):
+        return nullcontext()
+
+    def hay_cambios_externos(self):
+        return False
+
+    def cambios_externos(self):
+        return []
+
+    def aplicar_cambios_externos(self, productos):
+        pass
+
+class AlmacenamientoJSON(AlmacenamientoInventario):
+    """
+    Guarda el inventario en un archivo JSON.
+    Si 'diario' es True, cada cambio se añade como un registro al final de
+    un archivo de diario en lugar de reescribir todo el JSON. El archivo
+    principal se compacta cuando el diario alcanza 'umbral_compactacion'
+    registros, y solo entonces: al cerrar no se compacta, y el diario que
+    quede se aplica al volver a cargar.
+
+    Varios procesos pueden compartir el archivo: las escrituras se hacen con
+    un bloqueo (archivo + ".lock") y cada proceso detecta los cambios de los
+    demás comparando la firma del archivo principal y el tamaño del diario.
+    Si solo creció el diario, se leen únicamente los registros nuevos.
+    """
+    def __init__(self, archivo="inventario.json", diario=False, umbral_compactacion=1000):
         self.archivo = archivo
-        self.productos = self._cargar_inventario()
+        self.archivo_diario = archivo + ".diario"
+        self.diario = diario
+        self.umbral_compactacion = umbral_compactacion
+        self._registros_diario = 0
+        self._bloqueo = BloqueoArchivo(archivo + ".lock")
+        # Versión conocida: firma del archivo principal y bytes del diario ya aplicados
+        self._firma = None
+        self._posicion_diario = 0
+        self._registros_externos = []
+        self._posicion_externa = 0
 
-    def _cargar_inventario(self):
+    def bloquear(self):
+        return self._bloqueo
+
+    def cargar(self, contenedor):
         """
         Carga los productos desde el archivo JSON al iniciar el programa.
+        Después reproduce los cambios pendientes del diario, si existe.
         Maneja errores si el archivo no existe o está vacío.
         """
+        self._firma = _firma_archivo(self.archivo)
         try:
             with open(self.archivo, 'r') as f:
                 data = json.load(f)
-                inventario_cargado = {}
                 for item_id, item_data in data.items():
-                    inventario_cargado[item_id] = Producto(
+                    contenedor[item_id] = Producto(
                         item_id,
                         item_data['nombre'],
                         item_data['cantidad'],
                         item_data['precio']
                     )
-                return inventario_cargado
         except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+            contenedor.clear()
+        self._registros_diario = 0
+        self._posicion_diario = 0
+        self._reproducir_diario(contenedor)
+        return contenedor
+
+    def _leer_diario(self):
+        """
+        Devuelve los registros del diario posteriores a los ya aplicados y la
+        posición en la que terminan. Si el último registro quedó a medio escribir
+        (por ejemplo, tras un corte), se descarta y se recorta el diario para que
+        las siguientes escrituras sean válidas.
+        """
+        registros = []
+        try:
+            f = open(self.archivo_diario, 'rb+')
+        except FileNotFoundError:
+            return registros, 0
+        with f:
+            f.seek(self._posicion_diario)
+            posicion_valida = self._posicion_diario
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    break
+                if not linea.endswith(b"\n"):
+                    break
+                registros.append(registro)
+                posicion_valida += len(linea)
+            f.truncate(posicion_valida)
+        return registros, posicion_valida
+
+    def _reproducir_diario(self, productos):
+        """Aplica sobre 'productos' los registros del diario en el orden en que se escribieron."""
+        registros, self._posicion_diario = self._leer_diario()
+        for registro in registros:
+            _aplicar_registro(productos, registro)
+        self._registros_diario += len(registros)
+
+    def hay_cambios_externos(self):
+        if _firma_archivo(self.archivo) != self._firma:
+            return True
+        try:
+            return os.path.getsize(self.archivo_diario) != self._posicion_diario
+        except FileNotFoundError:
+            return self._posicion_diario != 0
+
+    def cambios_externos(self):
+        """
+        Si otro proceso reescribió el archivo principal hay que recargarlo todo (None);
+        si solo añadió registros al diario, se leen esos registros y se devuelven sus IDs.
+        """
+        if _firma_archivo(self.archivo) != self._firma:
+            return None
+        try:
+            if os.path.getsize(self.archivo_diario) < self._posicion_diario:
+                return None
+        except FileNotFoundError:
+            return None if self._posicion_diario else []
+        self._registros_externos, self._posicion_externa = self._leer_diario()
+        return [registro['id'] for registro in self._registros_externos]
+
+    def aplicar_cambios_externos(self, productos):
+        for registro in self._registros_externos:
+            _aplicar_registro(productos, registro)
+        self._registros_diario += len(self._registros_externos)
+        self._posicion_diario = self._posicion_externa
+        self._registros_externos = []
 
-    def _guardar_inventario(self):
+    def _guardar_inventario(self, productos):
         """
         Guarda el inventario actual en el archivo JSON.
         Serializa los objetos Producto para que puedan ser almacenados.
+        Escribe primero en un archivo temporal y lo renombra, de modo que un
+        corte nunca deja el archivo principal a medio escribir.
         """
         try:
             data_to_save = {}
-            for item_id, producto in self.productos.items():
+            for item_id, producto in productos.items():
                 data_to_save[item_id] = {
                     'nombre': producto.nombre,
                     'cantidad': producto.cantidad,
                     'precio': producto.precio
                 }
-            with open(self.archivo, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
+            with self._bloqueo:
+                temporal = self.archivo + ".tmp"
+                with open(temporal, 'w') as f:
+                    json.dump(data_to_save, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporal, self.archivo)
+                self._firma = _firma_archivo(self.archivo)
+                # El archivo principal ya contiene todos los cambios: el diario puede vaciarse.
+                if self._posicion_diario:
+                    open(self.archivo_diario, 'w').close()
+                self._registros_diario = 0
+                self._posicion_diario = 0
             print("Inventario guardado exitosamente.")
         except Exception as e:
             print(f"Error al guardar el inventario: {e}")
 
-    def anadir_producto(self, producto_id, nombre, cantidad, precio):
+    def guardar(self, productos, registros):
         """
-        Añade un nuevo producto al inventario.
-        El ID es la clave del diccionario para una búsqueda eficiente.
+        En modo diario añade los registros al final del diario con una sola
+        escritura y compacta al superar el umbral; si no, reescribe el archivo completo.
+        """
+        if not self.diario:
+            self._guardar_inventario(productos)
+            return
+        bloque = "".join(json.dumps(r, separators=(',', ':')) + "\n" for r in registros).encode('utf-8')
+        try:
+            with self._bloqueo, open(self.archivo_diario, 'ab') as f:
+                f.write(bloque)
+                f.flush()
+                os.fsync(f.fileno())
+                self._posicion_diario = f.tell()
+            self._registros_diario += len(registros)
+        except Exception as e:
+            print(f"Error al escribir en el diario del inventario: {e}")
+            return
+        if self._registros_diario >= self.umbral_compactacion:
+            self.compactar(productos)
+
+    def compactar(self, productos):
         """
-        if producto_id in self.productos:
-            print("Error: Ya existe un producto con este ID.")
+        Vuelca el inventario completo al archivo JSON y vacía el diario.
+        """
+        self._guardar_inventario(productos)
+
+class ProductosSQLite(MutableMapping):
+    """
+    Mapeo {producto_id: Producto} respaldado por una tabla SQLite.
+    Solo se leen de la base las filas que se piden; cada acceso devuelve una
+    copia del producto y los cambios se escriben asignándolo de nuevo.
+    """
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def __len__(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+
+    def __iter__(self):
+        for (producto_id,) in self.conexion.execute("SELECT id FROM productos ORDER BY rowid"):
+            yield producto_id
+
+    def __contains__(self, producto_id):
+        fila = self.conexion.execute("SELECT 1 FROM productos WHERE id = ?", (producto_id,)).fetchone()
+        return fila is not None
+
+    def __getitem__(self, producto_id):
+        fila = self.conexion.execute(
+            "SELECT id, nombre, cantidad, precio FROM productos WHERE id = ?", (producto_id,)).fetchone()
+        if fila is None:
+            raise KeyError(producto_id)
+        return Producto(*fila)
+
+    def __setitem__(self, producto_id, producto):
+        self.conexion.execute(
+            "INSERT INTO productos (id, nombre, nombre_normalizado, cantidad, precio) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+            "nombre_normalizado = excluded.nombre_normalizado, "
+            "cantidad = excluded.cantidad, precio = excluded.precio",
+            (producto_id, producto.nombre, normalizar_texto(producto.nombre), producto.cantidad, producto.precio))
+
+    def __delitem__(self, producto_id):
+        cursor = self.conexion.execute("DELETE FROM productos WHERE id = ?", (producto_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(producto_id)
+
+    def values(self):
+        """Recorre todos los productos con una sola consulta."""
+        for fila in self.conexion.execute("SELECT id, nombre, cantidad, precio FROM productos ORDER BY rowid"):
+            yield Producto(*fila)
+
+    def items(self):
+        for producto in self.values():
+            yield producto.id, producto
+
+class AlmacenamientoSQLite(AlmacenamientoInventario):
+    """
+    Guarda el inventario en una base de datos SQLite (modo WAL), con índices
+    sobre el nombre y la cantidad. Al iniciar no se lee ninguna fila: los productos
+    se consultan a medida que se necesitan y las búsquedas se resuelven en SQL.
+
+    Para buscar por nombre hay además una tabla FTS5 de trigramas, mantenida con
+    triggers: es el equivalente en SQL del índice de trigramas de Inventario.
+    Si la versión de SQLite no incluye FTS5 con trigramas, se busca con LIKE.
+    """
+    resuelve_consultas = True
+
+    def __init__(self, ruta="inventario.db"):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS productos (
+                id TEXT PRIMARY KEY,
+                nombre TEXT NOT NULL,
+                nombre_normalizado TEXT NOT NULL,
+                cantidad INTEGER NOT NULL,
+                precio REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre_normalizado);
+            CREATE INDEX IF NOT EXISTS idx_productos_cantidad ON productos (cantidad);
+        """)
+        self._hay_trigramas = self._crear_trigramas()
+        self._bloqueo = BloqueoSQLite(self.conexion)
+
+    def _crear_trigramas(self):
+        """Crea (o rellena, en bases anteriores) la tabla de trigramas. Devuelve si se puede usar."""
+        existia = self.conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'productos_trigramas'").fetchone() is not None
+        try:
+            self.conexion.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS productos_trigramas USING fts5(
+                    nombre_normalizado, content='productos', content_rowid='rowid', tokenize='trigram');
+                CREATE TRIGGER IF NOT EXISTS productos_trigramas_ai AFTER INSERT ON productos BEGIN
+                    INSERT INTO productos_trigramas (rowid, nombre_normalizado)
+                    VALUES (new.rowid, new.nombre_normalizado);
+                END;
+                CREATE TRIGGER IF NOT EXISTS productos_trigramas_ad AFTER DELETE ON productos BEGIN
+                    INSERT INTO productos_trigramas (productos_trigramas, rowid, nombre_normalizado)
+                    VALUES ('delete', old.rowid, old.nombre_normalizado);
+                END;
+                CREATE TRIGGER IF NOT EXISTS productos_trigramas_au AFTER UPDATE OF nombre_normalizado ON productos
+                WHEN old.nombre_normalizado IS NOT new.nombre_normalizado BEGIN
+                    INSERT INTO productos_trigramas (productos_trigramas, rowid, nombre_normalizado)
+                    VALUES ('delete', old.rowid, old.nombre_normalizado);
+                    INSERT INTO productos_trigramas (rowid, nombre_normalizado)
+                    VALUES (new.rowid, new.nombre_normalizado);
+                END;
+            """)
+            if not existia:
+                self.conexion.execute("INSERT INTO productos_trigramas (productos_trigramas) VALUES ('rebuild')")
+                self.conexion.commit()
+        except sqlite3.OperationalError:
             return False
-        
+        return True
+
+    def bloquear(self):
+        return self._bloqueo
+
+    def cargar(self, contenedor):
+        self._version_datos = self._version()
+        return ProductosSQLite(self.conexion)
+
+    def _version(self):
+        """Número que SQLite cambia cada vez que otra conexión confirma cambios en la base."""
+        return self.conexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def hay_cambios_externos(self):
+        return self._version() != self._version_datos
+
+    def cambios_externos(self):
+        # Los productos se leen siempre de la base; solo hay que descartar los totales en memoria.
+        return None
+
+    def guardar(self, productos, registros):
+        """Los cambios ya se escribieron en la base al aplicarlos; aquí se confirman."""
+        try:
+            self.conexion.commit()
+        except sqlite3.Error as e:
+            print(f"Error al guardar el inventario: {e}")
+
+    def descartar(self):
+        self.conexion.rollback()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def buscar_por_nombre(self, consulta, limite=None, desplazamiento=0):
+        """
+        Devuelve los productos cuyo nombre normalizado contiene 'consulta', ordenados por nombre.
+        Las consultas de tres o más caracteres usan la tabla de trigramas; las más
+        cortas no tienen trigramas y recorren la tabla con LIKE.
+        """
+        paginacion = (-1 if limite is None else limite, desplazamiento)
+        if self._hay_trigramas and len(consulta) >= 3:
+            # Una frase entre comillas con el tokenizador de trigramas equivale a "contiene".
+            frase = '"' + consulta.replace('"', '""') + '"'
+            filas = self.conexion.execute(
+                "SELECT p.id, p.nombre, p.cantidad, p.precio FROM productos_trigramas t "
+                "JOIN productos p ON p.rowid = t.rowid WHERE productos_trigramas MATCH ? "
+                "ORDER BY p.nombre_normalizado, p.id LIMIT ? OFFSET ?", (frase, *paginacion))
+        else:
+            patron = "%" + consulta.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            filas = self.conexion.execute(
+                "SELECT id, nombre, cantidad, precio FROM productos WHERE nombre_normalizado LIKE ? ESCAPE '\\' "
+                "ORDER BY nombre_normalizado, id LIMIT ? OFFSET ?", (patron, *paginacion))
+        return [Producto(*fila) for fila in filas]
+
+    def productos_por_cantidad(self, desde=None, hasta=None):
+        """Devuelve los productos con desde <= cantidad < hasta, usando el índice de cantidad."""
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("cantidad >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("cantidad < ?")
+            parametros.append(hasta)
+        where = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+        filas = self.conexion.execute(
+            f"SELECT id, nombre, cantidad, precio FROM productos{where} ORDER BY cantidad, id", parametros)
+        return [Producto(*fila) for fila in filas]
+
+    def totales(self):
+        """Devuelve (unidades totales, valor total) calculados en la base."""
+        unidades, valor = self.conexion.execute(
+            "SELECT TOTAL(cantidad), TOTAL(cantidad * precio) FROM productos").fetchone()
+        return int(unidades), valor
+
+_DECODIFICADOR = json.JSONDecoder()
+
+class ProductosJSONL(MutableMapping):
+    """
+    Mapeo {producto_id: Producto} sobre un archivo JSON por líneas (un producto por
+    línea) que se lee bajo demanda.
+
+    - El archivo solo crece: un cambio añade una línea nueva con los datos del
+      producto y una eliminación añade una línea {"id": ..., "eliminado": true}.
+      La última línea de cada ID es la vigente.
+    - Un índice auxiliar (archivo + ".indice") guarda la posición en bytes de la
+      línea vigente de cada ID. Se lee en el primer acceso, no al abrir, y si el
+      archivo de datos creció desde que se guardó solo se recorre la parte nueva.
+    - El archivo de datos se proyecta en memoria (mmap) y cada Producto se crea
+      al accederlo.
+
+    Los cambios quedan en memoria hasta escribir_cambios(), que los añade al
+    archivo con una sola escritura. 'bloqueo' protege la lectura del índice
+    frente a otros procesos que estén escribiendo en el mismo archivo.
+    """
+    def __init__(self, archivo, archivo_indice, bloqueo=None):
+        self.archivo = archivo
+        self.archivo_indice = archivo_indice
+        self._bloqueo = bloqueo if bloqueo is not None else nullcontext()
+        self._posiciones = None  # producto_id -> posición de su línea vigente
+        self._lineas = 0         # líneas del archivo, vigentes u obsoletas
+        self._tamano = 0         # bytes del archivo que refleja el índice
+        self._inodo = None       # inodo del archivo que refleja el índice
+        self._cambios = {}       # producto_id -> Producto, o None si se eliminó
+        self._mapa = None
+        open(self.archivo, 'ab').close()
+
+    def _indice(self):
+        """Devuelve el índice de posiciones, leyéndolo la primera vez."""
+        if self._posiciones is None:
+            self._cargar_indice()
+        return self._posiciones
+
+    def _cargar_indice(self):
+        """
+        Lee el índice auxiliar y lo completa con las líneas añadidas después de guardarlo.
+        Si el índice corresponde a otra versión del archivo (otro inodo), se recorre entero.
+        """
+        with self._bloqueo:
+            estado = os.stat(self.archivo)
+            self._posiciones, self._lineas, self._tamano = {}, 0, 0
+            self._inodo = estado.st_ino
+            try:
+                with open(self.archivo_indice, 'r') as f:
+                    indice = json.load(f)
+                if indice['inodo'] == estado.st_ino and indice['tamano'] <= estado.st_size:
+                    self._posiciones, self._lineas = indice['posiciones'], indice['lineas']
+                    self._tamano = indice['tamano']
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                pass
+            if self._tamano < estado.st_size:
+                self._escanear(self._tamano)
+            self._proyectar()
+
+    def _escanear(self, desde):
+        """
+        Recorre el archivo desde la posición 'desde' actualizando el índice.
+        Una última línea incompleta (por ejemplo, tras un corte) se descarta.
+        """
+        with open(self.archivo, 'rb+') as f:
+            f.seek(desde)
+            posicion = desde
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                try:
+                    producto_id, eliminado = self._id_de_linea(linea)
+                except ValueError:
+                    break
+                if eliminado:
+                    self._posiciones.pop(producto_id, None)
+                else:
+                    self._posiciones[producto_id] = posicion
+                posicion += len(linea)
+                self._lineas += 1
+            f.truncate(posicion)
+        self._tamano = posicion
+
+    @staticmethod
+    def _id_de_linea(linea):
+        """
+        Devuelve (producto_id, eliminado) de una línea. Las líneas escritas por esta
+        clase empiezan por el ID, así que basta con decodificar ese campo; otras
+        líneas se decodifican completas.
+        """
+        if linea.startswith(b'{"id":'):
+            producto_id, _ = _DECODIFICADOR.raw_decode(linea.decode('utf-8'), 6)
+            return producto_id, linea.endswith(b',"eliminado":true}\n')
+        registro = json.loads(linea)
+        return registro['id'], bool(registro.get('eliminado'))
+
+    def _proyectar(self):
+        """Proyecta en memoria el archivo de datos (no se puede proyectar uno vacío)."""
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        with open(self.archivo, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _leer(self, posicion):
+        """Crea el Producto guardado en la línea que empieza en 'posicion'."""
+        fin = self._mapa.find(b"\n", posicion)
+        datos = json.loads(self._mapa[posicion:fin])
+        return Producto(datos['id'], datos['nombre'], datos['cantidad'], datos['precio'])
+
+    def __len__(self):
+        posiciones = self._indice()
+        total = len(posiciones)
+        for producto_id, producto in self._cambios.items():
+            if producto is None and producto_id in posiciones:
+                total -= 1
+            elif producto is not None and producto_id not in posiciones:
+                total += 1
+        return total
+
+    def __iter__(self):
+        posiciones = self._indice()
+        for producto_id in list(posiciones):
+            if self._cambios.get(producto_id, True) is not None:
+                yield producto_id
+        for producto_id, producto in list(self._cambios.items()):
+            if producto is not None and producto_id not in posiciones:
+                yield producto_id
+
+    def __contains__(self, producto_id):
+        if producto_id in self._cambios:
+            return self._cambios[producto_id] is not None
+        return producto_id in self._indice()
+
+    def __getitem__(self, producto_id):
+        if producto_id in self._cambios:
+            producto = self._cambios[producto_id]
+            if producto is None:
+                raise KeyError(producto_id)
+            return producto
+        return self._leer(self._indice()[producto_id])
+
+    def __setitem__(self, producto_id, producto):
+        self._cambios[producto_id] = producto
+
+    def __delitem__(self, producto_id):
+        if producto_id not in self:
+            raise KeyError(producto_id)
+        self._cambios[producto_id] = None
+
+    @staticmethod
+    def _linea(producto_id, producto):
+        """Devuelve la línea (en bytes) que representa al producto o su eliminación."""
+        if producto is None:
+            datos = {'id': producto_id, 'eliminado': True}
+        else:
+            datos = {'id': producto_id, 'nombre': producto.nombre,
+                     'cantidad': producto.cantidad, 'precio': producto.precio}
+        return (json.dumps(datos, separators=(',', ':')) + "\n").encode('utf-8')
+
+    def escribir_cambios(self):
+        """Añade al archivo, con una sola escritura, los cambios pendientes."""
+        if not self._cambios:
+            return
+        posiciones = self._indice()
+        # Se cierra la proyección antes de ampliar el archivo (necesario en Windows).
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        with open(self.archivo, 'ab') as f:
+            posicion = f.tell()
+            bloque = []
+            for producto_id, producto in self._cambios.items():
+                linea = self._linea(producto_id, producto)
+                if producto is None:
+                    posiciones.pop(producto_id, None)
+                else:
+                    posiciones[producto_id] = posicion
+                bloque.append(linea)
+                posicion += len(linea)
+            f.write(b"".join(bloque))
+            f.flush()
+            os.fsync(f.fileno())
+        self._tamano = posicion
+        self._lineas += len(bloque)
+        self._cambios.clear()
+        self._proyectar()
+
+    def descartar_cambios(self):
+        self._cambios.clear()
+
+    def lineas_obsoletas(self):
+        """Cantidad de líneas del archivo que ya no son la versión vigente de ningún producto."""
+        return self._lineas - len(self._indice())
+
+    def compactar(self):
+        """
+        Reescribe el archivo con una sola línea por producto vigente y guarda el índice.
+        Se escribe en un archivo temporal que luego reemplaza al original.
+        """
+        self.escribir_cambios()
+        temporal = self.archivo + ".tmp"
+        posiciones, posicion = {}, 0
+        with open(temporal, 'wb') as f:
+            for producto_id in self._indice():
+                linea = self._linea(producto_id, self[producto_id])
+                f.write(linea)
+                posiciones[producto_id] = posicion
+                posicion += len(linea)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        os.replace(temporal, self.archivo)
+        self._posiciones, self._lineas = posiciones, len(posiciones)
+        self._tamano, self._inodo = posicion, os.stat(self.archivo).st_ino
+        self._proyectar()
+        self.guardar_indice()
+
+    def guardar_indice(self):
+        """
+        Guarda el índice auxiliar para que la próxima apertura no tenga que recorrer el archivo.
+        No se guarda si otro proceso ya reemplazó el archivo (el índice no le correspondería).
+        """
+        if self._posiciones is None or os.stat(self.archivo).st_ino != self._inodo:
+            return
+        temporal = self.archivo_indice + ".tmp"
+        with open(temporal, 'w') as f:
+            json.dump({'inodo': self._inodo, 'tamano': self._tamano, 'lineas': self._lineas,
+                       'posiciones': self._posiciones}, f, separators=(',', ':'))
+        os.replace(temporal, self.archivo_indice)
+
+    def cambio_externo(self):
+        """Indica si el archivo cambió desde la última vez que este proceso lo leyó o escribió."""
+        if self._posiciones is None:
+            return False
+        estado = os.stat(self.archivo)
+        return (estado.st_ino, estado.st_size) != (self._inodo, self._tamano)
+
+    def cerrar(self, guardar_indice=True):
+        if guardar_indice:
+            self.guardar_indice()
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+class AlmacenamientoJSONL(AlmacenamientoInventario):
+    """
+    Guarda el inventario en un archivo JSON por líneas que se carga de forma perezosa
+    (ver ProductosJSONL): abrir el inventario no lee ningún producto. El archivo se
+    compacta cuando tiene más líneas obsoletas que productos vigentes y al menos
+    'umbral_compactacion' líneas obsoletas.
+    """
+    def __init__(self, archivo="inventario.jsonl", umbral_compactacion=1000):
+        self.archivo = archivo
+        self.umbral_compactacion = umbral_compactacion
+        self.productos = None
+        self._bloqueo = BloqueoArchivo(archivo + ".lock")
+
+    def bloquear(self):
+        return self._bloqueo
+
+    def cargar(self, contenedor):
+        if self.productos is not None:
+            # Recarga tras un cambio de otro proceso: el índice en memoria ya no es válido.
+            self.productos.cerrar(guardar_indice=False)
+        self.productos = ProductosJSONL(self.archivo, self.archivo + ".indice", self._bloqueo)
+        return self.productos
+
+    def hay_cambios_externos(self):
+        return self.productos.cambio_externo()
+
+    def cambios_externos(self):
+        # Abrir el archivo de nuevo es O(1): basta con recargar.
+        return None
+
+    def guardar(self, productos, registros):
+        try:
+            with self._bloqueo:
+                productos.escribir_cambios()
+        except OSError as e:
+            print(f"Error al guardar el inventario: {e}")
+            return
+        obsoletas = productos.lineas_obsoletas()
+        if obsoletas >= self.umbral_compactacion and obsoletas > len(productos):
+            self.compactar(productos)
+
+    def descartar(self):
+        self.productos.descartar_cambios()
+
+    def compactar(self, productos):
+        try:
+            with self._bloqueo:
+                productos.compactar()
+            print("Inventario guardado exitosamente.")
+        except OSError as e:
+            print(f"Error al guardar el inventario: {e}")
+
+    def cerrar(self):
+        with self._bloqueo:
+            self.productos.cerrar()
+
+class Inventario:
+    """
+    Clase que gestiona la colección de productos en el inventario.
+    Utiliza un diccionario para almacenar los productos.
+    """
+    def __init__(self, archivo="inventario.json", diario=False, umbral_compactacion=1000, almacenamiento=None):
+        """
+        Por defecto el inventario se guarda en el archivo JSON 'archivo' (ver
+        AlmacenamientoJSON para 'diario' y 'umbral_compactacion'). Se puede pasar
+        otro almacenamiento, por ejemplo AlmacenamientoSQLite("inventario.db").
+        """
+        if almacenamiento is None:
+            almacenamiento = AlmacenamientoJSON(archivo, diario, umbral_compactacion)
+        self.almacenamiento = almacenamiento
+        # Registros y estados previos de la transacción en curso (None si no hay ninguna)
+        self._pendientes = None
+        self._deshacer = None
+        # Índice de búsqueda por nombre: nombres normalizados y trigrama -> IDs que lo contienen.
+        # Se construye en la primera búsqueda (None hasta entonces).
+        self._nombres_normalizados = None
+        self._indice_trigramas = None
+        # Totales que se mantienen al día con cada cambio; se calculan la primera vez que se piden
+        self._unidades_totales = None
+        self._valor_total = None
+        with self.almacenamiento.bloquear():
+            self.productos = self.almacenamiento.cargar(self._nuevo_contenedor())
+
+    def _nuevo_contenedor(self):
+        """Devuelve el contenedor vacío en el que se guardan los productos en memoria."""
+        return {}
+
+    def _registrar_cambio(self, registro):
+        """
+        Persiste un cambio. Dentro de una transacción solo lo acumula;
+        fuera de ella lo escribe de inmediato.
+        """
+        if self._pendientes is not None:
+            self._pendientes.append(registro)
+            return
+        self._persistir([registro])
+
+    def _persistir(self, registros):
+        """Entrega los registros al almacenamiento."""
+        if registros:
+            self.almacenamiento.guardar(self.productos, registros)
+
+    def compactar(self):
+        """
+        Deja el almacenamiento en su forma más compacta (en JSON, vuelca el
+        inventario completo y vacía el diario).
+        """
+        with self._operacion():
+            self.almacenamiento.compactar(self.productos)
+
+    def sincronizar(self):
+        """
+        Incorpora los cambios que otros procesos hayan guardado en el mismo almacenamiento.
+        Si solo se añadieron registros al diario se aplican uno a uno; si no, se recarga todo.
+        La comprobación es barata (compara la firma del archivo), así que puede llamarse a menudo.
+        """
+        if self._pendientes is not None or not self.almacenamiento.hay_cambios_externos():
+            return
+        with self.almacenamiento.bloquear():
+            cambiados = self.almacenamiento.cambios_externos()
+            if cambiados is None:
+                self.productos = self.almacenamiento.cargar(self._nuevo_contenedor())
+                self._nombres_normalizados = None
+                self._indice_trigramas = None
+                self._unidades_totales = None
+                self._valor_total = None
+                return
+            # Un producto puede tener varios registros: se descuenta y se vuelve a sumar una sola vez.
+            cambiados = list(dict.fromkeys(cambiados))
+            for producto_id in cambiados:
+                self._desindexar(producto_id)
+                if producto_id in self.productos:
+                    self._contabilizar(self.productos[producto_id], -1)
+            self.almacenamiento.aplicar_cambios_externos(self.productos)
+            for producto_id in cambiados:
+                producto = self.productos.get(producto_id)
+                if producto is not None:
+                    self._indexar(producto_id, producto.nombre)
+                    self._contabilizar(producto, 1)
+
+    @contextmanager
+    def _operacion(self):
+        """
+        Bloquea el almacenamiento mientras se valida y aplica un cambio, después de
+        incorporar los cambios de otros procesos. Así ninguna escritura se basa en
+        datos desactualizados. Dentro de una transacción el bloqueo ya está tomado.
+        """
+        if self._pendientes is not None:
+            yield
+            return
+        with self.almacenamiento.bloquear():
+            self.sincronizar()
+            yield
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varios cambios y los guarda con una sola escritura al terminar el bloque.
+        Si ocurre una excepción dentro del bloque, el inventario en memoria vuelve
+        a su estado anterior y no se guarda nada.
+
+        Uso:
+            with inventario.transaccion():
+                inventario.anadir_producto(...)
+                inventario.actualizar_producto(...)
+        """
+        if self._pendientes is not None:
+            # Una transacción anidada forma parte de la exterior.
+            yield self
+            return
+        # El bloqueo se mantiene hasta guardar: otro proceso no puede escribir en medio.
+        with self.almacenamiento.bloquear():
+            self.sincronizar()
+            self._pendientes = []
+            self._deshacer = {}
+            try:
+                yield self
+            except BaseException:
+                self._revertir()
+                self.almacenamiento.descartar()
+                self._pendientes = None
+                self._deshacer = None
+                raise
+            registros = self._pendientes
+            self._pendientes = None
+            self._deshacer = None
+            self._persistir(registros)
+
+    def _recordar_estado(self, producto_id):
+        """
+        Guarda, solo la primera vez dentro de una transacción, el estado previo
+        de un producto para poder deshacer los cambios.
+        """
+        if self._deshacer is None or producto_id in self._deshacer:
+            return
+        producto = self.productos.get(producto_id)
+        if producto is None:
+            self._deshacer[producto_id] = None
+        else:
+            self._deshacer[producto_id] = (producto, producto.nombre, producto.cantidad, producto.precio)
+
+    def _revertir(self):
+        """
+        Restaura en memoria el estado previo de los productos tocados por la transacción.
+        """
+        for producto_id, estado in self._deshacer.items():
+            self._desindexar(producto_id)
+            if producto_id in self.productos:
+                self._contabilizar(self.productos[producto_id], -1)
+            if estado is None:
+                self.productos.pop(producto_id, None)
+            else:
+                producto, nombre, cantidad, precio = estado
+                producto.nombre = nombre
+                producto.cantidad = cantidad
+                producto.precio = precio
+                self.productos[producto_id] = producto
+                self._indexar(producto_id, nombre)
+                self._contabilizar(producto, 1)
+
+    def _construir_indice(self):
+        """Construye el índice de trigramas con todos los productos."""
+        self._nombres_normalizados = {}
+        self._indice_trigramas = {}
+        for producto_id, producto in self.productos.items():
+            self._indexar(producto_id, producto.nombre)
+
+    def _indexar(self, producto_id, nombre):
+        """Añade el nombre del producto al índice de trigramas, si ya está construido."""
+        if self._indice_trigramas is None:
+            return
+        normalizado = normalizar_texto(nombre)
+        self._nombres_normalizados[producto_id] = normalizado
+        for trigrama in _trigramas(normalizado):
+            self._indice_trigramas.setdefault(trigrama, set()).add(producto_id)
+
+    def _desindexar(self, producto_id):
+        """Quita el producto del índice de trigramas, si ya está construido."""
+        if self._indice_trigramas is None:
+            return
+        normalizado = self._nombres_normalizados.pop(producto_id, None)
+        if normalizado is None:
+            return
+        for trigrama in _trigramas(normalizado):
+            ids = self._indice_trigramas[trigrama]
+            ids.discard(producto_id)
+            if not ids:
+                del self._indice_trigramas[trigrama]
+
+    def _contabilizar(self, producto, signo):
+        """Suma (signo=1) o resta (signo=-1) el producto de los totales del inventario."""
+        if self._valor_total is None:
+            return
+        self._unidades_totales += signo * producto.cantidad
+        self._valor_total += signo * producto.cantidad * producto.precio
+
+    def _anadir(self, producto_id, nombre, cantidad, precio):
+        """Añade el producto en memoria y registra el cambio, sin validar ni mostrar mensajes."""
+        self._recordar_estado(producto_id)
         nuevo_producto = Producto(producto_id, nombre, cantidad, precio)
         self.productos[producto_id] = nuevo_producto
-        self._guardar_inventario()
+        self._indexar(producto_id, nombre)
+        self._contabilizar(nuevo_producto, 1)
+        self._registrar_cambio({'op': 'anadir', 'id': producto_id, 'nombre': nombre,
+                                'cantidad': nuevo_producto.cantidad, 'precio': nuevo_producto.precio})
+
+    def _eliminar(self, producto_id):
+        """Elimina el producto en memoria y registra el cambio."""
+        self._recordar_estado(producto_id)
+        self._contabilizar(self.productos[producto_id], -1)
+        del self.productos[producto_id]
+        self._desindexar(producto_id)
+        self._registrar_cambio({'op': 'eliminar', 'id': producto_id})
+
+    def _actualizar(self, producto_id, cantidad=None, precio=None, nombre=None):
+        """Modifica el producto en memoria y registra el cambio."""
+        self._recordar_estado(producto_id)
+        producto = self.productos[producto_id]
+        self._contabilizar(producto, -1)
+        if nombre is not None and nombre != producto.nombre:
+            producto.nombre = nombre
+            self._desindexar(producto_id)
+            self._indexar(producto_id, nombre)
+        if cantidad is not None:
+            producto.cantidad = cantidad
+        if precio is not None:
+            producto.precio = precio
+        self._contabilizar(producto, 1)
+        # Con un diccionario no cambia nada; un contenedor por columnas copia los valores.
+        self.productos[producto_id] = producto
+        self._registrar_cambio({'op': 'actualizar', 'id': producto_id, 'nombre': producto.nombre,
+                                'cantidad': producto.cantidad, 'precio': producto.precio})
+
+    def anadir_producto(self, producto_id, nombre, cantidad, precio):
+        """
+        Añade un nuevo producto al inventario.
+        El ID es la clave del diccionario para una búsqueda eficiente.
+        """
+        with self._operacion():
+            if producto_id in self.productos:
+                print("Error: Ya existe un producto con este ID.")
+                return False
+
+            self._anadir(producto_id, nombre, cantidad, precio)
         print("Producto añadido exitosamente.")
         return True
 
@@ -116,42 +1135,145 @@ class Inventario:
         """
         Elimina un producto del inventario por su ID.
         """
-        if producto_id in self.productos:
-            del self.productos[producto_id]
-            self._guardar_inventario()
-            print("Producto eliminado exitosamente.")
-            return True
-        else:
-            print("Error: Producto no encontrado.")
-            return False
+        with self._operacion():
+            if producto_id not in self.productos:
+                print("Error: Producto no encontrado.")
+                return False
+            self._eliminar(producto_id)
+        print("Producto eliminado exitosamente.")
+        return True
 
-    def actualizar_producto(self, producto_id, cantidad=None, precio=None):
+    def actualizar_producto(self, producto_id, cantidad=None, precio=None, nombre=None):
         """
-        Actualiza la cantidad o el precio de un producto existente.
+        Actualiza el nombre, la cantidad o el precio de un producto existente.
         """
-        if producto_id in self.productos:
-            producto = self.productos[producto_id]
-            if cantidad is not None:
-                producto.cantidad = cantidad
-            if precio is not None:
-                producto.precio = precio
-            self._guardar_inventario()
-            print("Producto actualizado exitosamente.")
-            return True
-        else:
-            print("Error: Producto no encontrado.")
-            return False
+        with self._operacion():
+            if producto_id not in self.productos:
+                print("Error: Producto no encontrado.")
+                return False
+            self._actualizar(producto_id, cantidad, precio, nombre)
+        print("Producto actualizado exitosamente.")
+        return True
+
+    def anadir_productos(self, nuevos_productos):
+        """
+        Añade varios productos de una vez, por ejemplo al recibir un pedido de un proveedor.
+        'nuevos_productos' es un iterable de tuplas (producto_id, nombre, cantidad, precio).
+        Se validan todos antes de aplicar ninguno y se guardan con una sola escritura.
+        """
+        lote = list(nuevos_productos)
+        with self.transaccion():
+            vistos = set()
+            for producto_id, nombre, cantidad, precio in lote:
+                if producto_id in self.productos or producto_id in vistos:
+                    print(f"Error: El ID '{producto_id}' está repetido. No se añadió ningún producto.")
+                    return False
+                if cantidad < 0 or precio < 0:
+                    print(f"Error: El producto '{producto_id}' tiene cantidad o precio negativo. "
+                          "No se añadió ningún producto.")
+                    return False
+                vistos.add(producto_id)
+
+            for producto_id, nombre, cantidad, precio in lote:
+                self._anadir(producto_id, nombre, cantidad, precio)
+        print(f"{len(lote)} productos añadidos exitosamente.")
+        return True
+
+    def actualizar_productos(self, cambios):
+        """
+        Actualiza varios productos de una vez.
+        'cambios' es un diccionario {producto_id: (cantidad, precio)}; cualquiera
+        de los dos valores puede ser None para no cambiarlo.
+        Se validan todos antes de aplicar ninguno y se guardan con una sola escritura.
+        """
+        with self.transaccion():
+            for producto_id, (cantidad, precio) in cambios.items():
+                if producto_id not in self.productos:
+                    print(f"Error: Producto '{producto_id}' no encontrado. No se actualizó ningún producto.")
+                    return False
+                if (cantidad is not None and cantidad < 0) or (precio is not None and precio < 0):
+                    print(f"Error: El producto '{producto_id}' tiene cantidad o precio negativo. "
+                          "No se actualizó ningún producto.")
+                    return False
 
-    def buscar_producto(self, nombre):
+            for producto_id, (cantidad, precio) in cambios.items():
+                self._actualizar(producto_id, cantidad, precio)
+        print(f"{len(cambios)} productos actualizados exitosamente.")
+        return True
+
+    def buscar_producto(self, nombre, limite=None, desplazamiento=0):
         """
-        Busca productos por nombre (búsqueda parcial, no sensible a mayúsculas).
+        Busca productos por nombre (búsqueda parcial, sin distinguir mayúsculas ni tildes).
+        Devuelve una lista de productos ordenada por nombre. 'limite' y 'desplazamiento'
+        permiten obtener los resultados por páginas.
+
+        Las consultas de tres o más caracteres usan el índice de trigramas: solo se
+        comprueban los productos que contienen todos los trigramas de la consulta.
+        El índice se construye en la primera búsqueda y luego se mantiene con cada cambio.
+        Si el almacenamiento resuelve consultas (SQLite), la búsqueda se hace en él.
         """
-        resultados = [prod for prod in self.productos.values() if nombre.lower() in prod.nombre.lower()]
-        if resultados:
-            for prod in resultados:
-                print(prod)
+        consulta = normalizar_texto(nombre)
+        if self.almacenamiento.resuelve_consultas:
+            return self.almacenamiento.buscar_por_nombre(consulta, limite, desplazamiento)
+        if self._indice_trigramas is None:
+            self._construir_indice()
+        if len(consulta) < 3:
+            candidatos = [pid for pid, n in self._nombres_normalizados.items() if consulta in n]
         else:
-            print("No se encontraron productos con ese nombre.")
+            listas = sorted((self._indice_trigramas.get(t, set()) for t in _trigramas(consulta)), key=len)
+            coincidencias = set(listas[0])
+            for ids in listas[1:]:
+                if not coincidencias:
+                    break
+                coincidencias &= ids
+            candidatos = [pid for pid in coincidencias if consulta in self._nombres_normalizados[pid]]
+
+        def clave(pid):
+            return (self._nombres_normalizados[pid], pid)
+
+        if limite is None:
+            ordenados = sorted(candidatos, key=clave)[desplazamiento:]
+        else:
+            ordenados = heapq.nsmallest(desplazamiento + limite, candidatos, key=clave)[desplazamiento:]
+        return [self.productos[pid] for pid in ordenados]
+
+    def _calcular_totales(self):
+        """Calcula los totales desde cero; después se mantienen con cada cambio."""
+        if self.almacenamiento.resuelve_consultas:
+            self._unidades_totales, self._valor_total = self.almacenamiento.totales()
+        else:
+            self._unidades_totales = sum(p.cantidad for p in self.productos.values())
+            self._valor_total = math.fsum(p.cantidad * p.precio for p in self.productos.values())
+
+    def valor_total(self):
+        """
+        Devuelve el valor del inventario (suma de cantidad * precio).
+        Tras la primera llamada se obtiene en tiempo constante.
+        """
+        if self._valor_total is None:
+            self._calcular_totales()
+        return self._valor_total
+
+    def unidades_totales(self):
+        """
+        Devuelve la suma de las cantidades de todos los productos.
+        Tras la primera llamada se obtiene en tiempo constante.
+        """
+        if self._unidades_totales is None:
+            self._calcular_totales()
+        return self._unidades_totales
+
+    def productos_por_cantidad(self, desde=None, hasta=None):
+        """
+        Devuelve los productos con desde <= cantidad < hasta (cualquiera de los
+        dos límites puede omitirse), ordenados por cantidad.
+        """
+        if self.almacenamiento.resuelve_consultas:
+            return self.almacenamiento.productos_por_cantidad(desde, hasta)
+        resultados = [p for p in self.productos.values()
+                      if (desde is None or p.cantidad >= desde) and (hasta is None or p.cantidad < hasta)]
+        resultados.sort(key=lambda p: (p.cantidad, p.id))
+        return resultados
 
     def mostrar_inventario(self):
         """
@@ -165,28 +1287,166 @@ class Inventario:
                 print(producto)
             print("-------------------------")
 
+class ColumnasProductos(MutableMapping):
+    """
+    Contenedor de productos organizado en columnas paralelas: una lista de IDs,
+    una de nombres y dos arreglos compactos (array) para cantidades y precios.
+    Se usa como un diccionario {producto_id: Producto}, pero cada acceso devuelve
+    una copia del producto: los cambios se guardan asignándolo de nuevo.
+    """
+    def __init__(self):
+        self._filas = {}  # producto_id -> posición en las columnas
+        self.ids = []
+        self.nombres = []
+        self.cantidades = array('q')
+        self.precios = array('d')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, producto_id):
+        return producto_id in self._filas
+
+    def __getitem__(self, producto_id):
+        fila = self._filas[producto_id]
+        return Producto(producto_id, self.nombres[fila], self.cantidades[fila], self.precios[fila])
+
+    def __setitem__(self, producto_id, producto):
+        fila = self._filas.get(producto_id)
+        if fila is None:
+            self._filas[producto_id] = len(self.ids)
+            self.ids.append(producto_id)
+            self.nombres.append(producto.nombre)
+            self.cantidades.append(producto.cantidad)
+            self.precios.append(producto.precio)
+        else:
+            self.nombres[fila] = producto.nombre
+            self.cantidades[fila] = producto.cantidad
+            self.precios[fila] = producto.precio
+
+    def __delitem__(self, producto_id):
+        # Se mueve la última fila al hueco para borrar en tiempo constante.
+        fila = self._filas.pop(producto_id)
+        ultima = len(self.ids) - 1
+        if fila != ultima:
+            ultimo_id = self.ids[ultima]
+            self.ids[fila] = ultimo_id
+            self.nombres[fila] = self.nombres[ultima]
+            self.cantidades[fila] = self.cantidades[ultima]
+            self.precios[fila] = self.precios[ultima]
+            self._filas[ultimo_id] = fila
+        self.ids.pop()
+        self.nombres.pop()
+        self.cantidades.pop()
+        self.precios.pop()
+
+class InventarioColumnar(Inventario):
+    """
+    Inventario con la misma interfaz que Inventario, pero que guarda los productos
+    en columnas (ColumnasProductos) para reducir la memoria en catálogos muy grandes.
+    """
+    def _nuevo_contenedor(self):
+        return ColumnasProductos()
+
+class AnaliticaInventario:
+    """
+    Reportes sobre un Inventario calculados por lotes sobre columnas de datos
+    (arreglos de cantidades y precios) en lugar de recorrer objeto por objeto.
+    Los reportes devuelven datos en lugar de imprimirlos.
+    """
+    def __init__(self, inventario):
+        self.inventario = inventario
+
+    def _columnas(self):
+        """
+        Devuelve las columnas (ids, cantidades, precios) del inventario.
+        Un InventarioColumnar ya las tiene; para un diccionario se construyen en una pasada.
+        """
+        productos = self.inventario.productos
+        if isinstance(productos, ColumnasProductos):
+            return productos.ids, productos.cantidades, productos.precios
+        ids, cantidades, precios = [], array('q'), array('d')
+        for producto in productos.values():
+            ids.append(producto.id)
+            cantidades.append(producto.cantidad)
+            precios.append(producto.precio)
+        return ids, cantidades, precios
+
+    def resumen(self):
+        """Devuelve un diccionario con los totales del inventario."""
+        cantidad_productos = len(self.inventario.productos)
+        unidades = self.inventario.unidades_totales()
+        valor = self.inventario.valor_total()
+        return {
+            'productos': cantidad_productos,
+            'unidades': unidades,
+            'valor_total': valor,
+            'precio_medio_por_unidad': valor / unidades if unidades else 0.0,
+        }
+
+    def productos_bajo_stock(self, umbral):
+        """
+        Devuelve los productos con cantidad menor que 'umbral',
+        ordenados de menor a mayor cantidad.
+        """
+        if self.inventario.almacenamiento.resuelve_consultas:
+            return self.inventario.productos_por_cantidad(hasta=umbral)
+        ids, cantidades, _ = self._columnas()
+        filas = [i for i, bajo in enumerate(map(umbral.__gt__, cantidades)) if bajo]
+        filas.sort(key=cantidades.__getitem__)
+        return [self.inventario.productos[ids[i]] for i in filas]
+
+    def histograma_precios(self, limites):
+        """
+        Cuenta cuántos productos caen en cada franja de precio.
+        'limites' es una lista creciente, por ejemplo [10, 50, 100]; las franjas son
+        [None, 10), [10, 50), [50, 100) y [100, None). Devuelve una lista de
+        diccionarios {'desde', 'hasta', 'productos'}.
+        """
+        _, _, precios = self._columnas()
+        ordenados = sorted(precios)
+        cortes = [0] + [bisect.bisect_left(ordenados, limite) for limite in limites] + [len(ordenados)]
+        extremos = [None] + list(limites) + [None]
+        return [
+            {'desde': extremos[i], 'hasta': extremos[i + 1], 'productos': cortes[i + 1] - cortes[i]}
+            for i in range(len(cortes) - 1)
+        ]
+
 def limpiar_consola():
     """Función para limpiar la consola."""
     import os
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def main():
+def main(archivo="inventario.json"):
     """
     Función principal que ejecuta la interfaz de usuario.
+    Si 'archivo' termina en .db, el inventario se guarda en SQLite; si termina en .jsonl,
+    en JSON por líneas con carga perezosa; si no, en JSON con diario.
     """
-    inventario = Inventario()
+    if archivo.endswith(".db"):
+        inventario = Inventario(almacenamiento=AlmacenamientoSQLite(archivo))
+    elif archivo.endswith(".jsonl"):
+        inventario = Inventario(almacenamiento=AlmacenamientoJSONL(archivo))
+    else:
+        inventario = Inventario(archivo, diario=True)
     
     while True:
+        # Otro proceso puede haber modificado el inventario mientras se esperaba al usuario.
+        inventario.sincronizar()
         limpiar_consola()
         print("========================================")
         print("  Sistema Avanzado de Gestión de Inventario")
         print("========================================")
         print("1. Añadir nuevo producto")
         print("2. Eliminar producto")
-        print("3. Actualizar cantidad/precio de producto")
+        print("3. Actualizar cantidad/precio/nombre de producto")
         print("4. Buscar producto por nombre")
         print("5. Mostrar todo el inventario")
-        print("6. Salir")
+        print("6. Ver reportes del inventario")
+        print("7. Salir")
         print("========================================")
         
         opcion = input("Seleccione una opción: ")
@@ -215,7 +1475,7 @@ def main():
             limpiar_consola()
             print("--- Actualizar Producto ---")
             prod_id = input("Ingrese el ID del producto a actualizar: ")
-            opcion_actualizar = input("¿Qué desea actualizar? (C)antidad, (P)recio o (A)mbos: ").upper()
+            opcion_actualizar = input("¿Qué desea actualizar? (C)antidad, (P)recio, (A)mbos o (N)ombre: ").upper()
             try:
                 if opcion_actualizar == 'C':
                     cantidad = int(input("Ingrese la nueva cantidad: "))
@@ -227,6 +1487,9 @@ def main():
                     cantidad = int(input("Ingrese la nueva cantidad: "))
                     precio = float(input("Ingrese el nuevo precio: "))
                     inventario.actualizar_producto(prod_id, cantidad=cantidad, precio=precio)
+                elif opcion_actualizar == 'N':
+                    nombre = input("Ingrese el nuevo nombre: ")
+                    inventario.actualizar_producto(prod_id, nombre=nombre)
                 else:
                     print("Opción no válida.")
             except ValueError:
@@ -237,7 +1500,12 @@ def main():
             limpiar_consola()
             print("--- Buscar Producto ---")
             nombre = input("Ingrese el nombre del producto a buscar: ")
-            inventario.buscar_producto(nombre)
+            resultados = inventario.buscar_producto(nombre)
+            if resultados:
+                for prod in resultados:
+                    print(prod)
+            else:
+                print("No se encontraron productos con ese nombre.")
             input("\nPresione Enter para continuar...")
             
         elif opcion == '5':
@@ -246,6 +1514,27 @@ def main():
             input("\nPresione Enter para continuar...")
             
         elif opcion == '6':
+            limpiar_consola()
+            print("--- Reportes del Inventario ---")
+            analitica = AnaliticaInventario(inventario)
+            resumen = analitica.resumen()
+            print(f"Productos: {resumen['productos']} | Unidades: {resumen['unidades']} | "
+                  f"Valor total: ${resumen['valor_total']:.2f}")
+            try:
+                umbral = int(input("Mostrar productos con cantidad menor que: "))
+                bajo_stock = analitica.productos_bajo_stock(umbral)
+                if bajo_stock:
+                    for prod in bajo_stock:
+                        print(prod)
+                else:
+                    print("No hay productos por debajo de esa cantidad.")
+            except ValueError:
+                print("Entrada inválida. Ingrese un número entero.")
+            input("\nPresione Enter para continuar...")
+
+        elif opcion == '7':
+            # La compactación la decide el almacenamiento al pasar su umbral.
+            inventario.almacenamiento.cerrar()
             print("Saliendo del programa...")
             break
             
@@ -254,4 +1543,5 @@ def main():
             input("\nPresione Enter para continuar...")
 
 if __name__ == "__main__":
-    main()
+    # Uso: python "Producto e inventario.py" [inventario.json | inventario.jsonl | inventario.db]
+    main(sys.argv[1] if len(sys.argv) > 1 else "inventario.json")
@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+#
+# Pruebas de rendimiento del proyecto.
+#
+# Con un solo comando mide, para cada tamaño de datos:
+# 1. Inventario JSON ('Producto e inventario.py'): carga, guardado completo,
+#    coste por cambio de anadir_producto/actualizar_producto y latencia de
+#    buscar_producto (la primera búsqueda construye el índice).
+# 2. El mismo inventario sobre AlmacenamientoSQLite y AlmacenamientoJSONL
+#    (mmap e índice de posiciones): apertura, primer acceso, lecturas por ID,
+#    cambios, búsquedas por nombre y por cantidad y valor total.
+# 3. Inventario CSV ('Sistema de Gestión de Inventarios con Archivos y
+#    Excepciones.py'), sobre el archivo CSV y sobre AlmacenamientoSQLite:
+#    carga, guardado, coste por cambio de agregar_producto/actualizar_producto,
+#    productos_por_cantidad y recorrido en streaming con iter_productos.
+# 4. Biblioteca ('Sistema de Gestión de Biblioteca Digital.py'): búsquedas
+#    con buscar_libro (la primera construye los índices) y buscar_por_relevancia
+#    (sin caché y desde la caché), préstamos/devoluciones por segundo, consultas
+#    de vencimientos e importación en bloque de un volcado CSV con importar_libros.
+# 5. Representación en memoria de los productos: diccionario de objetos
+#    Producto frente a columnas paralelas (ColumnasProductos), y los reportes
+#    de AnaliticaInventario sobre Inventario e InventarioColumnar.
+# 6. Memoria por libro: el Libro compacto (__slots__ y cadenas internadas)
+#    frente al modelo anterior, con un diccionario por instancia.
+#
+# Los datos se generan con una semilla fija, de modo que dos ejecuciones
+# miden exactamente lo mismo. Los resultados se escriben en JSON para poder
+# compararlos entre versiones.
+#
+# Uso:
+#     python "Pruebas de Rendimiento.py" [--tamanos 1000 100000 1000000]
+#                                        [--salida resultados.json]
+
+import argparse
+import contextlib
+import csv
+import importlib.util
+import json
+import operator
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+SEMILLA = 2024
+TAMANOS = (1_000, 100_000, 1_000_000)
+
+
+def cargar_modulo(nombre, archivo):
+    """Carga uno de los programas del proyecto como módulo (sus nombres tienen espacios)."""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    # Registrado en sys.modules para que sus funciones se puedan enviar a otros procesos.
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# --- Generadores de datos sintéticos ---
+
+PALABRAS = ("tornillo", "tuerca", "arandela", "bisagra", "cable", "enchufe", "lámpara", "cinta",
+            "martillo", "llave", "pincel", "brocha", "clavo", "taladro", "sierra", "cúter")
+NOMBRES = ("Ana", "Juan", "María", "Luis", "Carmen", "José", "Lucía", "Pedro", "Sofía", "Diego")
+APELLIDOS = ("Pérez", "Gómez", "García", "Márquez", "López", "Díaz", "Ruiz", "Torres", "Vega")
+CATEGORIAS = ("Novela", "Fantasía", "Ciencia Ficción", "Historia", "Poesía", "Ensayo",
+              "Biografía", "Misterio", "Infantil", "Ciencia")
+
+
+def generar_productos(n):
+    """Genera n tuplas (id, nombre, cantidad, precio) sintéticas y reproducibles."""
+    return [(f"SKU{i:07d}", f"Producto {i % 5000} modelo {i}", i % 1000, (i % 997) * 0.25)
+            for i in range(n)]
+
+
+def generar_productos_variados(n, semilla=SEMILLA):
+    """Como generar_productos, pero con nombres de varias palabras para probar la búsqueda."""
+    azar = random.Random(semilla)
+    return [(f"SKU{i:07d}",
+             f"{azar.choice(PALABRAS)} {azar.choice(PALABRAS)} {i % 5000}",
+             azar.randrange(1000), round(azar.uniform(0.5, 500), 2))
+            for i in range(n)]
+
+
+def isbn13(i):
+    """Devuelve el i-ésimo ISBN-13 sintético, con su dígito de control correcto."""
+    digitos = f"978{i:09d}"
+    suma = sum(int(d) * (3 if k % 2 else 1) for k, d in enumerate(digitos))
+    return f"{digitos}{(10 - suma % 10) % 10}"
+
+
+def generar_libros(n, semilla=SEMILLA):
+    """Genera n tuplas (titulo, autor, categoria, isbn) reproducibles."""
+    azar = random.Random(semilla)
+    return [(f"{azar.choice(PALABRAS).capitalize()} de {azar.choice(PALABRAS)} {i}",
+             f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {i % 500}",
+             azar.choice(CATEGORIAS), isbn13(i))
+            for i in range(n)]
+
+
+def generar_usuarios(n):
+    """Genera n tuplas (nombre, user_id) reproducibles."""
+    return [(f"{NOMBRES[i % len(NOMBRES)]} {APELLIDOS[i % len(APELLIDOS)]}", f"usuario_{i}")
+            for i in range(n)]
+
+
+# --- Utilidades de medida ---
+
+@contextlib.contextmanager
+def silencio():
+    """Descarta los mensajes que imprimen los programas durante la medida."""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+
+def cronometrar(funcion):
+    """Ejecuta 'funcion' y devuelve los segundos que tardó."""
+    t0 = time.perf_counter()
+    funcion()
+    return time.perf_counter() - t0
+
+
+def por_operacion(segundos, operaciones):
+    """Resume una medida de 'operaciones' repeticiones en operaciones/s y microsegundos por operación."""
+    return {
+        "operaciones": operaciones,
+        "operaciones_por_segundo": operaciones / segundos if segundos else None,
+        "microsegundos_por_operacion": segundos * 1e6 / operaciones,
+    }
+
+
+def operaciones_para(n, maximo=1000, presupuesto=10_000_000):
+    """
+    Cuántas operaciones medir con n elementos. Las que reescriben el archivo
+    entero cuestan O(n), así que se hacen menos cuanto mayor es el inventario.
+    """
+    return max(5, min(maximo, presupuesto // n))
+
+
+def medir_memoria(contenedor, Producto, datos):
+    """
+    Llena el contenedor con los datos y devuelve los bytes usados por producto.
+    La cantidad y el precio se convierten desde texto, como al leerlos de un archivo,
+    para que cada producto tenga sus propios objetos numéricos.
+    """
+    datos_texto = [(producto_id, nombre, str(cantidad), repr(precio))
+                   for producto_id, nombre, cantidad, precio in datos]
+    tracemalloc.start()
+    inicio = tracemalloc.take_snapshot()
+    for producto_id, nombre, cantidad, precio in datos_texto:
+        contenedor[producto_id] = Producto(producto_id, nombre, int(cantidad), float(precio))
+    fin = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Los nombres e IDs ya existían en 'datos', así que solo se cuenta la estructura.
+    return sum(stat.size_diff for stat in fin.compare_to(inicio, 'filename')) / len(datos)
+
+
+def medir_memoria_libros(Libro, lineas):
+    """
+    Crea un Libro por cada línea CSV y devuelve los bytes usados por libro, incluidas
+    las cadenas que conserva. Cada línea se separa por su cuenta, como al leer un
+    archivo, así que los autores y categorías repetidos llegan como cadenas distintas.
+    """
+    tracemalloc.start()
+    inicio = tracemalloc.take_snapshot()
+    libros = [Libro(*linea.split(",")) for linea in lineas]
+    fin = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del libros
+    return sum(stat.size_diff for stat in fin.compare_to(inicio, 'filename')) / len(lineas)
+
+
+def medir_recorrido(recorrer, n):
+    """Devuelve cuántos productos por segundo procesa la función 'recorrer'."""
+    t0 = time.perf_counter()
+    recorrer()
+    return n / (time.perf_counter() - t0)
+
+
+# --- Pruebas ---
+
+class LibroConDiccionario:
+    """El modelo de Libro anterior a __slots__, como referencia para comparar la memoria."""
+    def __init__(self, titulo, autor, categoria, isbn):
+        self.titulo_autor = (titulo, autor)
+        self.categoria = categoria
+        self.isbn = isbn
+
+
+def comparar_modelos_libro(n):
+    """Compara la memoria por libro del modelo con diccionario y del Libro compacto con n libros."""
+    biblioteca = cargar_modulo("biblioteca", "Sistema de Gestión de Biblioteca Digital.py")
+    lineas = [",".join(libro) for libro in generar_libros(n)]
+    return {
+        "con_diccionario_bytes_por_libro": medir_memoria_libros(LibroConDiccionario, lineas),
+        "compacto_bytes_por_libro": medir_memoria_libros(biblioteca.Libro, lineas),
+    }
+
+
+def comparar_representaciones(n):
+    """Compara la representación por diccionario y por columnas con n productos."""
+    inventario = cargar_modulo("producto_e_inventario", "Producto e inventario.py")
+    datos = generar_productos(n)
+
+    diccionario = {}
+    columnas = inventario.ColumnasProductos()
+    return {
+        "diccionario": {
+            "bytes_por_producto": medir_memoria(diccionario, inventario.Producto, datos),
+            "recorrido_productos_por_segundo": medir_recorrido(
+                lambda: sum(p.cantidad * p.precio for p in diccionario.values()), n),
+        },
+        "columnas": {
+            "bytes_por_producto": medir_memoria(columnas, inventario.Producto, datos),
+            "recorrido_productos_por_segundo": medir_recorrido(
+                lambda: sum(map(operator.mul, columnas.cantidades, columnas.precios)), n),
+        },
+    }
+
+
+def medir_inventario_json(n, directorio):
+    """Mide el inventario JSON con diario de 'Producto e inventario.py' con n productos."""
+    modulo = cargar_modulo("producto_e_inventario", "Producto e inventario.py")
+    datos = generar_productos_variados(n)
+    archivo = os.path.join(directorio, f"inventario_{n}.json")
+    with open(archivo, 'w') as f:
+        json.dump({pid: {'nombre': nombre, 'cantidad': cantidad, 'precio': precio}
+                   for pid, nombre, cantidad, precio in datos}, f)
+    azar = random.Random(SEMILLA)
+    resultados = {}
+    with silencio():
+        # Umbral alto: el coste por cambio mide el diario, no la compactación.
+        abrir = lambda: modulo.Inventario(archivo, diario=True, umbral_compactacion=10 ** 9)
+        resultados["carga_segundos"] = cronometrar(abrir)
+        inventario = abrir()
+        resultados["guardado_segundos"] = cronometrar(inventario.compactar)
+
+        # Con diario cada cambio es una escritura pequeña: su coste no depende de n.
+        k = 1000
+        nuevos = [(f"NUEVO{i:07d}", f"producto nuevo {i}", i, 1.0) for i in range(k)]
+        resultados["anadir_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.anadir_producto(*p) for p in nuevos]), k)
+        ids = [azar.choice(datos)[0] for _ in range(k)]
+        resultados["actualizar_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.actualizar_producto(pid, cantidad=7) for pid in ids]), k)
+
+        consultas = [azar.choice(PALABRAS) + " " + azar.choice(PALABRAS)[:3] for _ in range(50)]
+        resultados["primera_busqueda_segundos"] = cronometrar(lambda: inventario.buscar_producto(consultas[0]))
+        resultados["buscar_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.buscar_producto(c, limite=20) for c in consultas]), len(consultas))
+        inventario.almacenamiento.cerrar()
+    return resultados
+
+
+def medir_inventario_perezoso(n, directorio, almacenamiento):
+    """
+    Mide el inventario de 'Producto e inventario.py' con n productos sobre un
+    almacenamiento que no carga los productos al abrir: 'sqlite' (AlmacenamientoSQLite)
+    o 'jsonl' (AlmacenamientoJSONL, con mmap e índice de posiciones por ID).
+    """
+    modulo = cargar_modulo("producto_e_inventario", "Producto e inventario.py")
+    datos = generar_productos_variados(n)
+    ruta = os.path.join(directorio, f"inventario_{n}.{'db' if almacenamiento == 'sqlite' else 'jsonl'}")
+    if almacenamiento == 'sqlite':
+        crear = lambda: modulo.AlmacenamientoSQLite(ruta)
+    else:
+        # Umbral alto: el coste por cambio mide la escritura al final, no la compactación.
+        crear = lambda: modulo.AlmacenamientoJSONL(ruta, umbral_compactacion=10 ** 9)
+    azar = random.Random(SEMILLA)
+    resultados = {}
+    with silencio():
+        inventario = modulo.Inventario(almacenamiento=crear())
+        resultados["poblar_segundos"] = cronometrar(lambda: inventario.anadir_productos(datos))
+        inventario.almacenamiento.cerrar()
+
+        abiertos = []
+        resultados["carga_segundos"] = cronometrar(
+            lambda: abiertos.append(modulo.Inventario(almacenamiento=crear())))
+        inventario = abiertos[0]
+        # El primer acceso lee el índice de posiciones (JSONL); los siguientes son directos.
+        ids = [azar.choice(datos)[0] for _ in range(1000)]
+        resultados["primer_acceso_segundos"] = cronometrar(lambda: inventario.productos[ids[0]])
+        resultados["leer_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.productos[pid] for pid in ids]), len(ids))
+
+        k = 1000
+        nuevos = [(f"NUEVO{i:07d}", f"producto nuevo {i}", i, 1.0) for i in range(k)]
+        resultados["anadir_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.anadir_producto(*p) for p in nuevos]), k)
+        resultados["actualizar_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.actualizar_producto(pid, cantidad=7) for pid in ids]), k)
+
+        consultas = [azar.choice(PALABRAS) + " " + azar.choice(PALABRAS)[:3] for _ in range(50)]
+        resultados["primera_busqueda_segundos"] = cronometrar(lambda: inventario.buscar_producto(consultas[0]))
+        resultados["buscar_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.buscar_producto(c, limite=20) for c in consultas]), len(consultas))
+        resultados["productos_por_cantidad"] = por_operacion(
+            cronometrar(lambda: [inventario.productos_por_cantidad(hasta=10) for _ in range(10)]), 10)
+        resultados["valor_total_segundos"] = cronometrar(inventario.valor_total)
+        inventario.almacenamiento.cerrar()
+    return resultados
+
+
+def medir_inventario_csv(n, directorio, almacenamiento='csv'):
+    """
+    Mide el inventario de 'Sistema de Gestión de Inventarios...' con n productos,
+    sobre el archivo CSV ('csv') o sobre AlmacenamientoSQLite ('sqlite').
+    """
+    modulo = cargar_modulo("inventario_csv", "Sistema de Gestión de Inventarios con Archivos y Excepciones.py")
+    datos = generar_productos_variados(n)
+    azar = random.Random(SEMILLA)
+    resultados = {}
+    with silencio():
+        if almacenamiento == 'sqlite':
+            ruta = os.path.join(directorio, f"inventario_csv_{n}.db")
+            abrir = lambda: modulo.Inventario(almacenamiento=modulo.AlmacenamientoSQLite(ruta))
+            inventario = abrir()
+            resultados["poblar_segundos"] = cronometrar(
+                lambda: inventario.agregar_productos(modulo.Producto(*p) for p in datos))
+            inventario.almacenamiento.cerrar()
+        else:
+            archivo = os.path.join(directorio, f"inventario_{n}.txt")
+            with open(archivo, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f, lineterminator="\n").writerows(datos)
+            abrir = lambda: modulo.Inventario(archivo)
+        abiertos = []
+        resultados["carga_segundos"] = cronometrar(lambda: abiertos.append(abrir()))
+        inventario = abiertos[0]
+        resultados["guardado_segundos"] = cronometrar(inventario._guardar_inventario)
+
+        # Con el CSV cada cambio reescribe el archivo completo; con SQLite es una fila.
+        k = 1000 if almacenamiento == 'sqlite' else operaciones_para(n)
+        nuevos = [modulo.Producto(f"NUEVO{i:07d}", f"producto nuevo {i}", i, 1.0) for i in range(k)]
+        resultados["agregar_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.agregar_producto(p) for p in nuevos]), k)
+        ids = [azar.choice(datos)[0] for _ in range(k)]
+        resultados["actualizar_producto"] = por_operacion(
+            cronometrar(lambda: [inventario.actualizar_producto(pid, nueva_cantidad=7) for pid in ids]), k)
+        resultados["productos_por_cantidad"] = por_operacion(
+            cronometrar(lambda: [inventario.productos_por_cantidad(hasta=10) for _ in range(10)]), 10)
+
+        # Recorrido en streaming: un producto cada vez, sin cargar el inventario.
+        total = n + k
+        resultados["iter_productos_por_segundo"] = medir_recorrido(
+            lambda: sum(1 for _ in inventario.iter_productos()), total)
+        inventario.almacenamiento.cerrar()
+    return resultados
+
+
+def medir_analitica(n, directorio):
+    """
+    Mide la carga y los reportes de AnaliticaInventario con n productos sobre
+    Inventario (diccionario de objetos) e InventarioColumnar (columnas).
+    """
+    modulo = cargar_modulo("producto_e_inventario", "Producto e inventario.py")
+    datos = generar_productos_variados(n)
+    archivo = os.path.join(directorio, f"analitica_{n}.json")
+    with open(archivo, 'w') as f:
+        json.dump({pid: {'nombre': nombre, 'cantidad': cantidad, 'precio': precio}
+                   for pid, nombre, cantidad, precio in datos}, f)
+    resultados = {}
+    with silencio():
+        for nombre, clase in (("diccionario", modulo.Inventario), ("columnas", modulo.InventarioColumnar)):
+            abiertos = []
+            medidas = {"carga_segundos": cronometrar(lambda: abiertos.append(clase(archivo)))}
+            analitica = modulo.AnaliticaInventario(abiertos[0])
+            medidas["resumen_segundos"] = cronometrar(analitica.resumen)
+            medidas["productos_bajo_stock_segundos"] = cronometrar(lambda: analitica.productos_bajo_stock(10))
+            medidas["histograma_precios_segundos"] = cronometrar(
+                lambda: analitica.histograma_precios([10, 50, 100, 250]))
+            abiertos[0].almacenamiento.cerrar()
+            resultados[nombre] = medidas
+    return resultados
+
+
+def medir_biblioteca(n, directorio):
+    """
+    Mide búsquedas, préstamos y devoluciones de la Biblioteca con n libros y n/10 usuarios,
+    y la importación en bloque de los mismos n libros desde un archivo CSV.
+    """
+    modulo = cargar_modulo("biblioteca", "Sistema de Gestión de Biblioteca Digital.py")
+    libros = generar_libros(n)
+    usuarios = generar_usuarios(max(1, n // 10))
+    azar = random.Random(SEMILLA)
+    resultados = {}
+    volcado = os.path.join(directorio, f"libros_{n}.csv")
+    with open(volcado, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator="\n").writerows(libros)
+    with silencio():
+        resumen = modulo.Biblioteca().importar_libros(volcado)
+        resultados["importar_libros"] = por_operacion(resumen.segundos, resumen.leidos)
+
+        biblioteca = modulo.Biblioteca()
+
+        def poblar():
+            for titulo, autor, categoria, isbn in libros:
+                biblioteca.anadir_libro(modulo.Libro(titulo, autor, categoria, isbn))
+            for nombre, user_id in usuarios:
+                biblioteca.registrar_usuario(modulo.Usuario(nombre, user_id))
+        resultados["poblar_segundos"] = cronometrar(poblar)
+
+        # La mitad de los préstamos quedan activos durante las búsquedas. Duran de 1 a 28
+        # días, para que las consultas de vencimientos tengan resultados.
+        k = min(n, 10_000)
+        isbns = [libro[3] for libro in azar.sample(libros, k)]
+        prestamos = [(usuarios[i % len(usuarios)][1], isbn) for i, isbn in enumerate(isbns)]
+        resultados["prestar_libro"] = por_operacion(
+            cronometrar(lambda: [biblioteca.prestar_libro(u, isbn, dias=1 + i % 28)
+                                 for i, (u, isbn) in enumerate(prestamos)]), k)
+        resultados["devolver_libro"] = por_operacion(
+            cronometrar(lambda: [biblioteca.devolver_libro(u, isbn) for u, isbn in prestamos[:k // 2]]),
+            k // 2)
+
+        dentro_de_una_semana = time.time() + 7 * 86400
+        resultados["vencen_pronto_24h"] = por_operacion(
+            cronometrar(lambda: [biblioteca.vencen_pronto(24) for _ in range(10)]), 10)
+        resultados["vencidos"] = por_operacion(
+            cronometrar(lambda: [biblioteca.vencidos(dentro_de_una_semana) for _ in range(10)]), 10)
+
+        consultas = ([("titulo", azar.choice(PALABRAS)) for _ in range(10)]
+                     + [("autor", azar.choice(APELLIDOS)) for _ in range(10)]
+                     + [("categoria", azar.choice(CATEGORIAS)) for _ in range(10)])
+        # La primera búsqueda construye los índices; las demás solo los consultan.
+        resultados["primera_busqueda_libro_segundos"] = cronometrar(
+            lambda: list(biblioteca.buscar_libro(*consultas[0])))
+        resultados["buscar_libro"] = por_operacion(
+            cronometrar(lambda: [list(biblioteca.buscar_libro(c, v)) for c, v in consultas]), len(consultas))
+
+        # Consultas de dos palabras, la mitad con una letra de menos (errata).
+        relevancia = [f"{azar.choice(APELLIDOS)} {azar.choice(PALABRAS)}" for _ in range(10)]
+        relevancia = [c[:-1] if i % 2 else c for i, c in enumerate(relevancia)]
+        resultados["indice_relevancia_segundos"] = cronometrar(biblioteca._construir_indice_palabras)
+        resultados["buscar_por_relevancia"] = por_operacion(
+            cronometrar(lambda: [biblioteca.buscar_por_relevancia(c) for c in relevancia]), len(relevancia))
+        resultados["buscar_por_relevancia_cache"] = por_operacion(
+            cronometrar(lambda: [biblioteca.buscar_por_relevancia(c) for c in relevancia]), len(relevancia))
+    return resultados
+
+
+def ejecutar(tamanos):
+    """Ejecuta todas las pruebas y devuelve los resultados como un diccionario."""
+    resultados = {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semilla": SEMILLA,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tamanos": {},
+    }
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in tamanos:
+            print(f"--- Midiendo con {n} elementos ---", file=sys.stderr)
+            resultados["tamanos"][str(n)] = {
+                "inventario_json": medir_inventario_json(n, directorio),
+                "inventario_sqlite": medir_inventario_perezoso(n, directorio, 'sqlite'),
+                "inventario_jsonl": medir_inventario_perezoso(n, directorio, 'jsonl'),
+                "inventario_csv": medir_inventario_csv(n, directorio),
+                "inventario_csv_sqlite": medir_inventario_csv(n, directorio, 'sqlite'),
+                "biblioteca": medir_biblioteca(n, directorio),
+                "representaciones": comparar_representaciones(n),
+                "analitica": medir_analitica(n, directorio),
+                "modelos_libro": comparar_modelos_libro(n),
+            }
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento del proyecto.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS,
+                        help="cantidades de productos/libros a probar")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, la salida estándar)")
+    argumentos = parser.parse_args()
+
+    informe = json.dumps(ejecutar(argumentos.tamanos), indent=2, ensure_ascii=False)
+    if argumentos.salida:
+        with open(argumentos.salida, 'w', encoding='utf-8') as f:
+            f.write(informe + "\n")
+    else:
+        print(informe)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+#
+# Servidor de red para la Biblioteca Digital ('Sistema de Gestión de
+# Biblioteca Digital.py'), hecho solo con la biblioteca estándar (asyncio).
+#
+# Protocolo: cada petición es una línea JSON y cada respuesta también, en el
+# mismo orden. Por ejemplo:
+#     {"op": "prestar", "user_id": "ana", "isbn": "978-0307474476"}
+#     -> {"ok": true}
+#     {"op": "buscar", "titulo": "soledad", "limite": 10}
+#     -> {"ok": true, "libros": [{"isbn": ..., "titulo": ..., "autor": ..., "categoria": ...}]}
+#
+# Operaciones: buscar, buscar_relevantes ({"consulta": ..., "limite": ...},
+# con la puntuación de cada libro), prestar, devolver, reservar, disponibles, quien_tiene,
+# anadir_libro (con 'ejemplares' opcional), registrar_usuario, vencidos y
+# vencen_pronto ({"horas": 24}).
+#
+# Todas las operaciones sobre la Biblioteca se ejecutan, una tras otra, en un
+# único hilo que es su dueño: el ejecutor de un solo hilo hace de cola de
+# tareas. Así dos clientes nunca pueden llevarse el mismo ejemplar, las
+# búsquedas nunca ven un cambio a medias, y el bucle de asyncio sigue
+# atendiendo conexiones mientras se escribe el diario en disco.
+#
+# Un planificador, también en el bucle de asyncio, duerme hasta el próximo
+# vencimiento de un préstamo (o hasta que una petición cambie los préstamos)
+# y entonces avisa de los préstamos vencidos (por defecto, mostrándolos por
+# pantalla con sus días de retraso). La función de aviso también se ejecuta en
+# el hilo de la biblioteca, así que puede usarla (por ejemplo, para renovar).
+#
+# Uso:
+#     python "Servidor de la Biblioteca.py" [--puerto 8765] [--datos biblioteca.db]
+#                                           [--importar libros.csv]
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_modulo(nombre, archivo):
+    """Carga uno de los programas del proyecto como módulo (sus nombres tienen espacios)."""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    # Registrado en sys.modules para que sus funciones se puedan enviar a otros procesos.
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+biblioteca_digital = cargar_modulo("biblioteca", "Sistema de Gestión de Biblioteca Digital.py")
+
+
+def prestamo_a_dict(prestamo):
+    """Convierte un Prestamo en un diccionario serializable a JSON."""
+    return {'isbn': prestamo.isbn, 'user_id': prestamo.user_id,
+            'prestado': prestamo.prestado, 'vence': prestamo.vence}
+
+
+def libro_a_dict(libro):
+    """Convierte un Libro en un diccionario serializable a JSON."""
+    titulo, autor = libro.titulo_autor
+    return {'isbn': libro.isbn, 'titulo': titulo, 'autor': autor, 'categoria': libro.categoria}
+
+
+class ServidorBiblioteca:
+    """
+    Atiende peticiones de muchos clientes a la vez sobre una sola Biblioteca.
+    Las operaciones se encolan en un ejecutor de un hilo, que las realiza en orden de llegada.
+    """
+    LIMITE_BUSQUEDA = 50
+    # Operaciones tras las que el planificador vuelve a mirar el próximo vencimiento.
+    CAMBIAN_PRESTAMOS = {'prestar', 'devolver'}
+    # Segundos hasta volver a mirar los vencimientos si la revisión falla.
+    REINTENTO_VENCIMIENTOS = 60
+
+    def __init__(self, biblioteca, al_vencer=None):
+        self.biblioteca = biblioteca
+        # El resultado de cada operación va en la respuesta, no por pantalla.
+        self.biblioteca.silenciosa = True
+        self.al_vencer = al_vencer or self.avisar_vencimiento
+        self._prestamos_cambiados = None
+        self._hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="biblioteca")
+        self._operaciones = {
+            'buscar': self._buscar,
+            'buscar_relevantes': self._buscar_relevantes,
+            'prestar': self._prestar,
+            'devolver': self._devolver,
+            'reservar': self._reservar,
+            'disponibles': self._disponibles,
+            'quien_tiene': self._quien_tiene,
+            'anadir_libro': self._anadir_libro,
+            'registrar_usuario': self._registrar_usuario,
+            'vencidos': self._vencidos,
+            'vencen_pronto': self._vencen_pronto,
+        }
+
+    # --- Operaciones (se ejecutan en el hilo de la biblioteca) ---
+
+    def _buscar(self, peticion):
+        limite = min(int(peticion.get('limite', 20)), self.LIMITE_BUSQUEDA)
+        libros = self.biblioteca.buscar_libros(peticion.get('titulo'), peticion.get('autor'),
+                                               peticion.get('categoria'))
+        return {'ok': True, 'libros': [libro_a_dict(l) for l in itertools.islice(libros, limite)]}
+
+    def _buscar_relevantes(self, peticion):
+        limite = min(int(peticion.get('limite', 10)), self.LIMITE_BUSQUEDA)
+        resultados = self.biblioteca.buscar_por_relevancia(peticion['consulta'], limite)
+        return {'ok': True, 'libros': [dict(libro_a_dict(libro), puntuacion=puntuacion)
+                                       for libro, puntuacion in resultados]}
+
+    def _prestar(self, peticion):
+        dias = peticion.get('dias')
+        return {'ok': self.biblioteca.prestar_libro(peticion['user_id'], peticion['isbn'],
+                                                    None if dias is None else float(dias))}
+
+    def _devolver(self, peticion):
+        return {'ok': self.biblioteca.devolver_libro(peticion['user_id'], peticion['isbn'])}
+
+    def _reservar(self, peticion):
+        return {'ok': self.biblioteca.reservar_libro(peticion['user_id'], peticion['isbn'])}
+
+    def _disponibles(self, peticion):
+        isbn = peticion['isbn']
+        return {'ok': True, 'disponibles': self.biblioteca.disponibles(isbn),
+                'ejemplares': self.biblioteca.ejemplares(isbn),
+                'lista_espera': len(self.biblioteca.lista_espera(isbn))}
+
+    def _quien_tiene(self, peticion):
+        usuarios = self.biblioteca.quien_tiene(peticion['isbn'])
+        return {'ok': True, 'user_ids': [usuario.user_id for usuario in usuarios]}
+
+    def _anadir_libro(self, peticion):
+        libro = biblioteca_digital.Libro(peticion['titulo'], peticion['autor'],
+                                         peticion['categoria'], peticion['isbn'])
+        return {'ok': self.biblioteca.anadir_libro(libro, int(peticion.get('ejemplares', 1)))}
+
+    def _registrar_usuario(self, peticion):
+        usuario = biblioteca_digital.Usuario(peticion['nombre'], peticion['user_id'])
+        return {'ok': self.biblioteca.registrar_usuario(usuario)}
+
+    def _vencidos(self, peticion):
+        return {'ok': True, 'prestamos': [prestamo_a_dict(p) for p in self.biblioteca.vencidos()]}
+
+    def _vencen_pronto(self, peticion):
+        prestamos = self.biblioteca.vencen_pronto(float(peticion.get('horas', 24)))
+        return {'ok': True, 'prestamos': [prestamo_a_dict(p) for p in prestamos]}
+
+    def _revisar_vencimientos(self):
+        """Devuelve los préstamos vencidos sin avisar y cuándo vence el siguiente."""
+        return self.biblioteca.avisos_pendientes(), self.biblioteca.proximo_vencimiento()
+
+    def _ejecutar(self, peticion):
+        """
+        Realiza una petición. Cualquier error (un campo que falta o de otro tipo)
+        se devuelve como respuesta, sin cortar la conexión.
+        """
+        operacion = self._operaciones.get(peticion.get('op'))
+        if operacion is None:
+            return {'ok': False, 'error': f"operación desconocida: {peticion.get('op')!r}"}
+        try:
+            return operacion(peticion)
+        except Exception as e:
+            return {'ok': False, 'error': f"petición inválida: {type(e).__name__}: {e}"}
+
+    # --- Vencimientos ---
+
+    @staticmethod
+    def avisar_vencimiento(prestamo):
+        print(f"Aviso: {prestamo} ({prestamo.dias_de_retraso()} días de retraso)")
+
+    async def planificar_vencimientos(self):
+        """
+        Avisa de cada préstamo en cuanto vence, sin recorrer los usuarios. Un error
+        al revisar o al avisar se muestra y no detiene el planificador.
+        """
+        bucle = asyncio.get_running_loop()
+        while True:
+            try:
+                avisos, proximo = await bucle.run_in_executor(self._hilo, self._revisar_vencimientos)
+            except Exception as e:
+                print(f"Error al revisar los vencimientos: {type(e).__name__}: {e}")
+                avisos, proximo = [], time.time() + self.REINTENTO_VENCIMIENTOS
+            for prestamo in avisos:
+                # En el hilo de la biblioteca: 'al_vencer' puede consultarla o cambiarla.
+                try:
+                    await bucle.run_in_executor(self._hilo, self.al_vencer, prestamo)
+                except Exception as e:
+                    print(f"Error al avisar del vencimiento de {prestamo}: {type(e).__name__}: {e}")
+            espera = None if proximo is None else max(proximo - time.time(), 0)
+            try:
+                await asyncio.wait_for(self._prestamos_cambiados.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+            self._prestamos_cambiados.clear()
+
+    # --- Red ---
+
+    async def atender(self, lector, escritor):
+        """Atiende a un cliente: lee peticiones línea a línea y responde a cada una."""
+        bucle = asyncio.get_running_loop()
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    peticion = json.loads(linea)
+                    if not isinstance(peticion, dict):
+                        raise ValueError("se esperaba un objeto JSON")
+                except ValueError as e:
+                    respuesta = {'ok': False, 'error': f"JSON inválido: {e}"}
+                else:
+                    respuesta = await bucle.run_in_executor(self._hilo, self._ejecutar, peticion)
+                    if peticion.get('op') in self.CAMBIAN_PRESTAMOS and respuesta['ok']:
+                        self._prestamos_cambiados.set()
+                escritor.write(json.dumps(respuesta, ensure_ascii=False).encode('utf-8') + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host, puerto):
+        servidor = await asyncio.start_server(self.atender, host, puerto, limit=1 << 20)
+        print(f"Biblioteca escuchando en {host}:{puerto}")
+        self._prestamos_cambiados = asyncio.Event()
+        planificador = asyncio.create_task(self.planificar_vencimientos())
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            planificador.cancel()
+
+    def cerrar(self):
+        self._hilo.shutdown()
+        if self.biblioteca.almacenamiento is not None:
+            self.biblioteca.almacenamiento.cerrar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de la Biblioteca Digital.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--datos", help="archivo de la biblioteca (instantánea SQLite y su diario)")
+    parser.add_argument("--importar", help="CSV de libros a importar al iniciar")
+    argumentos = parser.parse_args()
+
+    almacenamiento = None
+    if argumentos.datos:
+        almacenamiento = biblioteca_digital.AlmacenamientoBiblioteca(argumentos.datos)
+    biblioteca = biblioteca_digital.Biblioteca(almacenamiento)
+    if argumentos.importar:
+        biblioteca.importar_libros(argumentos.importar)
+
+    servidor = ServidorBiblioteca(biblioteca)
+    try:
+        asyncio.run(servidor.servir(argumentos.host, argumentos.puerto))
+    except KeyboardInterrupt:
+        print("Servidor detenido.")
+    finally:
+        servidor.cerrar()
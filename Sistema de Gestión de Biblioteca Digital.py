@@ -10,7 +10,111 @@
 #    libros, los usuarios y los préstamos.
 #
 # Se utilizan diccionarios, conjuntos y tuplas para optimizar el
-# almacenamiento y la búsqueda de datos.
+# almacenamiento y la búsqueda de datos. Libro y Usuario usan __slots__, y
+# los autores y categorías, que se repiten en miles de libros, se guardan
+# internados (una sola copia de cada cadena).
+#
+# Opcionalmente, la biblioteca se guarda en disco con AlmacenamientoBiblioteca:
+# una instantánea SQLite más un diario de operaciones.
+#
+# Cada préstamo (Prestamo) guarda cuándo se hizo y cuándo vence; la
+# Biblioteca sabe qué préstamos han vencido o vencen pronto sin recorrer
+# todos los usuarios.
+
+import csv
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+def _trigramas(texto):
+    """Devuelve el conjunto de subcadenas de tres caracteres de 'texto'."""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def _palabras(texto):
+    """Devuelve las palabras de 'texto' en minúsculas y sin tildes ('Márquez' -> 'marquez')."""
+    texto = texto.lower()
+    if not texto.isascii():
+        texto = "".join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return re.findall(r"\w+", texto)
+
+def _tiene_cifras(palabra):
+    """Las palabras con cifras (ISBN, años, números) solo coinciden exactamente."""
+    return any(c.isdigit() for c in palabra)
+
+def _tolerancia(palabra, max_distancia=None):
+    """
+    Distancia de edición máxima admitida para una palabra de la consulta: ninguna
+    para las que llevan cifras, y si no se indica otra, 0 hasta dos letras, 1
+    hasta seis y 2 a partir de siete. Depende solo de la palabra buscada: una
+    errata puede llevar a una palabra del catálogo más corta ('pazz' -> 'paz').
+    """
+    if _tiene_cifras(palabra):
+        return 0
+    if max_distancia is not None:
+        return max_distancia
+    return 0 if len(palabra) <= 2 else 1 if len(palabra) <= 6 else 2
+
+def _distancia_edicion(a, b):
+    """Distancia de Levenshtein entre dos palabras."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        anterior = actual
+    return anterior[-1]
+
+class ArbolBK:
+    """
+    Árbol BK sobre la distancia de edición: encuentra las palabras a distancia
+    'd' o menos de una dada sin compararla con todo el vocabulario, porque de
+    cada nodo solo se visitan los hijos cuya distancia está en [x - d, x + d].
+    Las palabras no se borran; quien lo usa descarta las que ya no le sirven.
+    """
+    def __init__(self):
+        # Cada nodo es [palabra, {distancia: nodo hijo}]
+        self._raiz = None
+
+    def anadir(self, palabra):
+        if self._raiz is None:
+            self._raiz = [palabra, {}]
+            return
+        nodo = self._raiz
+        while True:
+            distancia = _distancia_edicion(palabra, nodo[0])
+            if distancia == 0:
+                return
+            hijo = nodo[1].get(distancia)
+            if hijo is None:
+                nodo[1][distancia] = [palabra, {}]
+                return
+            nodo = hijo
+
+    def buscar(self, palabra, max_distancia):
+        """Devuelve las tuplas (palabra, distancia) del árbol a 'max_distancia' o menos."""
+        encontradas = []
+        pendientes = [self._raiz] if self._raiz is not None else []
+        while pendientes:
+            candidata, hijos = pendientes.pop()
+            distancia = _distancia_edicion(palabra, candidata)
+            if distancia <= max_distancia:
+                encontradas.append((candidata, distancia))
+            pendientes.extend(hijo for d, hijo in hijos.items()
+                              if distancia - max_distancia <= d <= distancia + max_distancia)
+        return encontradas
 
 class Libro:
     """
@@ -20,13 +124,24 @@ class Libro:
         titulo_autor (tupla): Una tupla inmutable que contiene el título y el autor del libro.
         categoria (str): La categoría a la que pertenece el libro (e.g., 'Fantasía', 'Novela').
         isbn (str): El ISBN (Número Estándar Internacional de Libros) del libro, que sirve como identificador único.
+
+    Con __slots__ cada libro guarda solo sus cuatro referencias, sin diccionario
+    propio. El título y el autor se guardan por separado y titulo_autor construye la
+    tupla al consultarla, lo que ahorra una tupla por libro.
     """
+    __slots__ = ('_titulo', '_autor', 'categoria', 'isbn')
+
     def __init__(self, titulo, autor, categoria, isbn):
-        # Utiliza una tupla para titulo y autor, ya que son datos inmutables.
-        self.titulo_autor = (titulo, autor)
-        self.categoria = categoria
+        self._titulo = titulo
+        # Autores y categorías se repiten mucho: se comparte una sola copia de cada uno.
+        self._autor = sys.intern(autor)
+        self.categoria = sys.intern(categoria)
         self.isbn = isbn
 
+    @property
+    def titulo_autor(self):
+        return (self._titulo, self._autor)
+
     def __str__(self):
         """Devuelve una representación en cadena del objeto Libro para su fácil visualización."""
         titulo, autor = self.titulo_autor
@@ -40,140 +155,1150 @@ class Usuario:
         nombre (str): El nombre del usuario.
         user_id (str): Un identificador único para el usuario.
         libros_prestados (list): Una lista de objetos Libro que el usuario ha prestado.
+        isbns_prestados: Conjunto (vista de claves) de los ISBN que el usuario tiene prestados.
+        isbns_reservados (set): ISBN de los libros en cuya lista de espera está el usuario.
     """
+    __slots__ = ('nombre', 'user_id', '_prestados', 'isbns_reservados')
+
     def __init__(self, nombre, user_id):
         self.nombre = nombre
         self.user_id = user_id
-        # La lista almacena los objetos de los libros actualmente prestados por este usuario.
-        self.libros_prestados = []
+        # Libros actualmente prestados por este usuario, por ISBN: altas y bajas en O(1).
+        self._prestados = {}
+        self.isbns_reservados = set()
+
+    @property
+    def libros_prestados(self):
+        return list(self._prestados.values())
+
+    @property
+    def isbns_prestados(self):
+        return self._prestados.keys()
 
     def __str__(self):
         """Devuelve una representación en cadena del objeto Usuario."""
         return f"Usuario: {self.nombre} (ID: {self.user_id})"
 
+class Prestamo:
+    """
+    Un ejemplar prestado a un usuario.
+
+    Atributos:
+        isbn (str): El libro prestado.
+        user_id (str): El usuario que lo tiene.
+        prestado (float): Momento del préstamo (segundos desde la época, como time.time()).
+        vence (float): Momento en que debe devolverse, o None en los préstamos
+                       anteriores a las fechas de vencimiento.
+    """
+    __slots__ = ('isbn', 'user_id', 'prestado', 'vence')
+
+    def __init__(self, isbn, user_id, prestado, vence):
+        self.isbn = isbn
+        self.user_id = user_id
+        self.prestado = prestado
+        self.vence = vence
+
+    def dias_de_retraso(self, ahora=None):
+        """Días completos transcurridos desde el vencimiento (0 si aún no ha vencido)."""
+        if self.vence is None:
+            return 0
+        ahora = time.time() if ahora is None else ahora
+        return max(0, int((ahora - self.vence) // 86400))
+
+    def __str__(self):
+        vence = "sin fecha" if self.vence is None else time.strftime("%Y-%m-%d %H:%M", time.localtime(self.vence))
+        return f"Préstamo: ISBN {self.isbn} a '{self.user_id}', vence {vence}"
+
 class Biblioteca:
     """
     Clase principal que gestiona las colecciones de libros, usuarios y préstamos.
 
     Atributos:
-        libros_disponibles (dict): Diccionario donde la clave es el ISBN y el valor es el objeto Libro.
+        libros_disponibles (dict): Diccionario donde la clave es el ISBN y el valor es el objeto Libro,
+                                   con los títulos que tienen al menos un ejemplar disponible.
                                    Permite una búsqueda de libros O(1) por ISBN.
         usuarios_registrados (set): Conjunto que almacena los IDs de usuario para asegurar su unicidad y
                                     permitir verificaciones rápidas de pertenencia.
         usuarios (dict): Diccionario donde la clave es el ID de usuario y el valor es el objeto Usuario.
+        prestamos (dict): Registro central de préstamos: ISBN -> {ID de usuario: Prestamo} con los
+                          usuarios que tienen un ejemplar. Prestar, devolver y saber quién
+                          tiene un libro son operaciones O(1).
+
+    Cada préstamo vence a los DIAS_PRESTAMO días. Los préstamos que aún no han
+    vencido están en un montículo por fecha de vencimiento, y los vencidos pasan,
+    en orden, a un diccionario aparte. Así vencidos() y vencen_pronto() cuestan
+    O(k log k) para k resultados, y avisos_pendientes() entrega cada préstamo
+    vencido una sola vez (ver el planificador del servidor) sin recorrer los usuarios.
+
+    Cada título puede tener varios ejemplares. Por cada ISBN se guardan dos contadores
+    (ejemplares totales y disponibles), así que disponibles(isbn) es O(1). Cuando no
+    quedan ejemplares, los usuarios pueden reservar el libro: se ponen a la cola en una
+    lista de espera (deque) y cada ejemplar que se devuelve o se añade se presta
+    automáticamente al primero de la cola.
+
+    Para las búsquedas se mantienen índices secundarios sobre todo el catálogo
+    (libros disponibles y prestados):
+        - un índice de trigramas del título y otro del autor (en minúsculas);
+        - un índice exacto de categoría (en minúsculas).
+    Cada entrada de un índice es un diccionario usado como conjunto ordenado
+    {isbn: None}, de modo que los resultados salen en el orden del catálogo.
+    Los índices se construyen en la primera búsqueda y luego se mantienen con cada cambio.
+
+    buscar_por_relevancia() usa además un índice de palabras (sin tildes) de título,
+    autor y categoría, con un árbol BK del vocabulario para tolerar erratas, y
+    ordena los libros por puntuación. Sus resultados se guardan en una caché LRU
+    de TAMANO_CACHE consultas; añadir o quitar un libro invalida solo las
+    consultas cuyo resultado puede cambiar.
+
+    Si se pasa un 'almacenamiento' (AlmacenamientoBiblioteca), la biblioteca se
+    carga de él al crearse y cada operación se guarda en cuanto se realiza.
+
+    Las operaciones informan de su resultado por pantalla; con 'silenciosa' solo
+    lo devuelven (por ejemplo, en el servidor, donde la respuesta va al cliente).
     """
-    def __init__(self):
+    CAMPOS_TEXTO = ('titulo', 'autor')
+    # Peso de cada campo en la puntuación de buscar_por_relevancia()
+    PESOS_RELEVANCIA = {'titulo': 3.0, 'autor': 2.0, 'categoria': 1.0}
+    TAMANO_CACHE = 256
+    DIAS_PRESTAMO = 14
+
+    def __init__(self, almacenamiento=None, silenciosa=False):
+        self.silenciosa = silenciosa
         self.libros_disponibles = {}
         self.usuarios_registrados = set()
         self.usuarios = {}
+        self.prestamos = {}
+        # Catálogo completo (disponibles y prestados): ISBN -> Libro
+        self._catalogo = {}
+        # Ejemplares totales y en la estantería de cada título: ISBN -> número
+        self._ejemplares = {}
+        self._disponibles = {}
+        # Listas de espera: ISBN -> deque de IDs de usuario, en orden de reserva
+        self._reservas = {}
+        # Montículo (vence, secuencia, Prestamo) de los préstamos que aún no han vencido.
+        # Las devoluciones no lo tocan: sus entradas se descartan al salir o al reconstruirlo.
+        self._vencimientos = []
+        self._secuencia = itertools.count()
+        self._vencimientos_obsoletos = 0
+        # Préstamos ya vencidos, en orden de vencimiento, y los que aún no se han avisado: {Prestamo: None}
+        self._vencidos = {}
+        self._sin_avisar = {}
+        self._avanzado_hasta = float('-inf')
+        # Texto en minúsculas de cada campo y trigrama -> {isbn: None} (None hasta la primera búsqueda)
+        self._textos = None
+        self._indice_trigramas = None
+        # Categoría en minúsculas -> {isbn: None}
+        self._indice_categoria = None
+        # Palabra -> {isbn: peso} y árbol BK del vocabulario (None hasta la primera búsqueda por relevancia)
+        self._indice_palabras = None
+        self._arbol_palabras = None
+        # Caché de buscar_por_relevancia(): consulta -> (resultados, palabras del vocabulario usadas),
+        # y palabra -> consultas de la caché que la usan, para invalidarlas.
+        self._cache = OrderedDict()
+        self._cache_por_palabra = {}
+        self.cache_aciertos = 0
+        self.cache_fallos = 0
+        self.almacenamiento = almacenamiento
+        if almacenamiento is not None:
+            almacenamiento.cargar(self)
+
+    def _construir_indices(self):
+        """Construye los índices de búsqueda con todo el catálogo."""
+        self._textos = {campo: {} for campo in self.CAMPOS_TEXTO}
+        self._indice_trigramas = {campo: {} for campo in self.CAMPOS_TEXTO}
+        self._indice_categoria = {}
+        for libro in self._catalogo.values():
+            self._indexar(libro)
+
+    def _construir_indice_palabras(self):
+        """Construye el índice de palabras y el árbol BK con todo el catálogo."""
+        self._indice_palabras = {}
+        self._arbol_palabras = ArbolBK()
+        for libro in self._catalogo.values():
+            self._indexar_palabras(libro)
+
+    def _pesos_palabras(self, libro):
+        """Devuelve {palabra: peso} de un libro, con el peso del campo más importante en que aparece."""
+        titulo, autor = libro.titulo_autor
+        pesos = {}
+        for campo, texto in (('titulo', titulo), ('autor', autor), ('categoria', libro.categoria)):
+            peso = self.PESOS_RELEVANCIA[campo]
+            for palabra in _palabras(texto):
+                if peso > pesos.get(palabra, 0):
+                    pesos[palabra] = peso
+        return pesos
 
-    def anadir_libro(self, libro):
-        """Añade un libro al catálogo de la biblioteca."""
-        if libro.isbn in self.libros_disponibles:
-            print(f"Error: El libro con ISBN {libro.isbn} ya existe.")
+    def _indexar_palabras(self, libro):
+        for palabra, peso in self._pesos_palabras(libro).items():
+            entrada = self._indice_palabras.get(palabra)
+            if entrada is None:
+                entrada = self._indice_palabras[palabra] = {}
+                if not _tiene_cifras(palabra):
+                    self._arbol_palabras.anadir(palabra)
+                if self._cache:
+                    self._invalidar_por_palabra_nueva(palabra)
+            entrada[libro.isbn] = peso
+            # Un libro nuevo puede entrar en cualquier consulta que use esta palabra.
+            for clave in list(self._cache_por_palabra.get(palabra, ())):
+                self._olvidar_consulta(clave)
+
+    def _desindexar_palabras(self, libro):
+        for palabra in self._pesos_palabras(libro):
+            entrada = self._indice_palabras[palabra]
+            del entrada[libro.isbn]
+            if not entrada:
+                del self._indice_palabras[palabra]
+            # Solo cambian las consultas en cuyo resultado estaba el libro.
+            for clave in list(self._cache_por_palabra.get(palabra, ())):
+                if any(isbn == libro.isbn for isbn, _ in self._cache[clave][0]):
+                    self._olvidar_consulta(clave)
+
+    def _invalidar_por_palabra_nueva(self, palabra):
+        """Invalida las consultas de la caché a las que se parece una palabra que acaba de entrar en el vocabulario."""
+        if _tiene_cifras(palabra):
+            return  # Solo coinciden exactamente: ya las cubre _cache_por_palabra.
+        for clave in list(self._cache):
+            consulta, max_distancia, _ = clave
+            for buscada in consulta:
+                limite = _tolerancia(buscada, max_distancia)
+                if abs(len(buscada) - len(palabra)) <= limite and \
+                   _distancia_edicion(buscada, palabra) <= limite:
+                    self._olvidar_consulta(clave)
+                    break
+
+    def _olvidar_consulta(self, clave):
+        """Quita una consulta de la caché."""
+        _, usadas = self._cache.pop(clave)
+        for palabra in usadas:
+            claves = self._cache_por_palabra[palabra]
+            claves.discard(clave)
+            if not claves:
+                del self._cache_por_palabra[palabra]
+
+    def _vaciar_cache(self):
+        self._cache.clear()
+        self._cache_por_palabra.clear()
+
+    def _indexar(self, libro):
+        """Añade el libro a los índices de búsqueda, si ya están construidos."""
+        if self._indice_palabras is not None:
+            self._indexar_palabras(libro)
+        if self._textos is None:
+            return
+        titulo, autor = libro.titulo_autor
+        for campo, texto in zip(self.CAMPOS_TEXTO, (titulo, autor)):
+            texto = texto.lower()
+            self._textos[campo][libro.isbn] = texto
+            indice = self._indice_trigramas[campo]
+            for trigrama in _trigramas(texto):
+                indice.setdefault(trigrama, {})[libro.isbn] = None
+        self._indice_categoria.setdefault(libro.categoria.lower(), {})[libro.isbn] = None
+
+    def _desindexar(self, libro):
+        """Quita el libro de los índices de búsqueda, si ya están construidos."""
+        if self._indice_palabras is not None:
+            self._desindexar_palabras(libro)
+        if self._textos is None:
+            return
+        for campo in self.CAMPOS_TEXTO:
+            texto = self._textos[campo].pop(libro.isbn)
+            indice = self._indice_trigramas[campo]
+            for trigrama in _trigramas(texto):
+                del indice[trigrama][libro.isbn]
+                if not indice[trigrama]:
+                    del indice[trigrama]
+        categoria = libro.categoria.lower()
+        del self._indice_categoria[categoria][libro.isbn]
+        if not self._indice_categoria[categoria]:
+            del self._indice_categoria[categoria]
+
+    # --- Operaciones internas: aplican el cambio sin validar ni mostrar mensajes ---
+
+    def _anadir_libro(self, libro, ejemplares=1):
+        self.libros_disponibles[libro.isbn] = libro
+        self._catalogo[libro.isbn] = libro
+        self._ejemplares[libro.isbn] = ejemplares
+        self._disponibles[libro.isbn] = ejemplares
+        self._indexar(libro)
+
+    def _anadir_ejemplares(self, isbn, cantidad, ahora):
+        """Añade ejemplares de un título y los presta a la lista de espera. Devuelve los asignados."""
+        self._ejemplares[isbn] += cantidad
+        self._disponibles[isbn] += cantidad
+        self.libros_disponibles[isbn] = self._catalogo[isbn]
+        return self._asignar_reservas(isbn, ahora)
+
+    def _quitar_libro(self, isbn):
+        libro = self._catalogo.pop(isbn)
+        self.libros_disponibles.pop(isbn, None)
+        del self._ejemplares[isbn]
+        del self._disponibles[isbn]
+        for user_id in self._reservas.pop(isbn, ()):
+            self.usuarios[user_id].isbns_reservados.discard(isbn)
+        self._desindexar(libro)
+
+    def _registrar_usuario(self, usuario):
+        self.usuarios_registrados.add(usuario.user_id)
+        self.usuarios[usuario.user_id] = usuario
+
+    def _dar_de_baja_usuario(self, user_id):
+        # Los ejemplares que tenía prestados se dan por perdidos; si era el último
+        # ejemplar de un título, el título deja de formar parte del catálogo.
+        self.usuarios_registrados.remove(user_id)
+        usuario = self.usuarios.pop(user_id)
+        for isbn in usuario.isbns_reservados:
+            cola = self._reservas[isbn]
+            cola.remove(user_id)
+            if not cola:
+                del self._reservas[isbn]
+        for isbn in usuario.isbns_prestados:
+            self._terminar_prestamo(isbn, user_id)
+            self._ejemplares[isbn] -= 1
+            if self._ejemplares[isbn] == 0:
+                self._quitar_libro(isbn)
+
+    def _prestar_libro(self, user_id, isbn, prestado, vence):
+        libro = self._catalogo[isbn]
+        self._disponibles[isbn] -= 1
+        if self._disponibles[isbn] == 0:
+            del self.libros_disponibles[isbn]
+        self.usuarios[user_id]._prestados[isbn] = libro
+        prestamo = Prestamo(isbn, user_id, prestado, vence)
+        self.prestamos.setdefault(isbn, {})[user_id] = prestamo
+        if vence is not None:
+            heapq.heappush(self._vencimientos, (vence, next(self._secuencia), prestamo))
+        return libro
+
+    def _terminar_prestamo(self, isbn, user_id):
+        """Quita el préstamo del registro central y de los vencimientos."""
+        titulares = self.prestamos[isbn]
+        prestamo = titulares.pop(user_id)
+        if not titulares:
+            del self.prestamos[isbn]
+        if prestamo in self._vencidos:
+            del self._vencidos[prestamo]
+            self._sin_avisar.pop(prestamo, None)
+        elif prestamo.vence is not None:
+            self._vencimientos_obsoletos += 1
+            if self._vencimientos_obsoletos > len(self._vencimientos) // 2:
+                self._reconstruir_vencimientos()
+
+    def _prestamo_activo(self, prestamo):
+        return self.prestamos.get(prestamo.isbn, {}).get(prestamo.user_id) is prestamo
+
+    def _reconstruir_vencimientos(self):
+        """Rehace el montículo sin las entradas de préstamos ya terminados."""
+        self._vencimientos = [entrada for entrada in self._vencimientos if self._prestamo_activo(entrada[2])]
+        heapq.heapify(self._vencimientos)
+        self._vencimientos_obsoletos = 0
+
+    def _avanzar_vencimientos(self, ahora):
+        """Pasa del montículo a los vencidos los préstamos que vencen hasta 'ahora'."""
+        self._avanzado_hasta = max(self._avanzado_hasta, ahora)
+        while self._vencimientos and self._vencimientos[0][0] <= ahora:
+            _, _, prestamo = heapq.heappop(self._vencimientos)
+            if self._prestamo_activo(prestamo):
+                self._vencidos[prestamo] = None
+                self._sin_avisar[prestamo] = None
+            else:
+                self._vencimientos_obsoletos -= 1
+
+    def _devolver_libro(self, user_id, isbn, ahora):
+        """Devuelve el ejemplar y lo presta al primero de la lista de espera. Devuelve los asignados."""
+        libro = self.usuarios[user_id]._prestados.pop(isbn)
+        self._terminar_prestamo(isbn, user_id)
+        self._disponibles[isbn] += 1
+        self.libros_disponibles[isbn] = libro
+        return self._asignar_reservas(isbn, ahora)
+
+    def _reservar_libro(self, user_id, isbn):
+        self._reservas.setdefault(isbn, deque()).append(user_id)
+        self.usuarios[user_id].isbns_reservados.add(isbn)
+
+    def _vencimiento(self, ahora, dias=None):
+        """Fecha de vencimiento de un préstamo hecho en 'ahora' (None si no se conoce 'ahora')."""
+        if ahora is None:
+            return None
+        return ahora + (self.DIAS_PRESTAMO if dias is None else dias) * 86400
+
+    def _asignar_reservas(self, isbn, ahora):
+        """Presta los ejemplares disponibles a los primeros de la lista de espera."""
+        asignados = []
+        cola = self._reservas.get(isbn)
+        while cola and self._disponibles[isbn] > 0:
+            user_id = cola.popleft()
+            self.usuarios[user_id].isbns_reservados.discard(isbn)
+            self._prestar_libro(user_id, isbn, ahora, self._vencimiento(ahora))
+            asignados.append(user_id)
+        if cola is not None and not cola:
+            del self._reservas[isbn]
+        return asignados
+
+    def _aplicar(self, evento):
+        """Aplica un evento del diario (ver AlmacenamientoBiblioteca)."""
+        op = evento['op']
+        if op == 'anadir_libro':
+            self._anadir_libro(Libro(evento['titulo'], evento['autor'], evento['categoria'], evento['isbn']),
+                               evento.get('ejemplares', 1))
+        elif op == 'anadir_ejemplares':
+            self._anadir_ejemplares(evento['isbn'], evento['cantidad'], evento.get('fecha'))
+        elif op == 'reservar_libro':
+            self._reservar_libro(evento['user_id'], evento['isbn'])
+        elif op == 'quitar_libro':
+            self._quitar_libro(evento['isbn'])
+        elif op == 'registrar_usuario':
+            self._registrar_usuario(Usuario(evento['nombre'], evento['user_id']))
+        elif op == 'dar_de_baja_usuario':
+            self._dar_de_baja_usuario(evento['user_id'])
+        elif op == 'prestar_libro':
+            # Los eventos anteriores a las fechas de vencimiento no traen 'fecha' ni 'vence'.
+            self._prestar_libro(evento['user_id'], evento['isbn'], evento.get('fecha'), evento.get('vence'))
+        elif op == 'devolver_libro':
+            self._devolver_libro(evento['user_id'], evento['isbn'], evento.get('fecha'))
+
+    def _restaurar(self, libros, usuarios, prestamos, reservas):
+        """
+        Rellena una biblioteca vacía desde una instantánea: 'libros' son tuplas
+        (isbn, titulo, autor, categoria, ejemplares) de todo el catálogo, 'usuarios'
+        tuplas (user_id, nombre), 'prestamos' tuplas (isbn, user_id, prestado, vence)
+        y 'reservas' tuplas (isbn, user_id) en el orden de la lista de espera.
+        """
+        for isbn, titulo, autor, categoria, ejemplares in libros:
+            libro = Libro(titulo, autor, categoria, isbn)
+            self.libros_disponibles[isbn] = libro
+            self._catalogo[isbn] = libro
+            self._ejemplares[isbn] = ejemplares
+            self._disponibles[isbn] = ejemplares
+        for user_id, nombre in usuarios:
+            self._registrar_usuario(Usuario(nombre, user_id))
+        for isbn, user_id, prestado, vence in prestamos:
+            self._prestar_libro(user_id, isbn, prestado, vence)
+        for isbn, user_id in reservas:
+            self._reservar_libro(user_id, isbn)
+
+    def _avisar(self, mensaje):
+        """Muestra un mensaje para el usuario, salvo que la biblioteca sea silenciosa."""
+        if not self.silenciosa:
+            print(mensaje)
+
+    def _guardar(self, evento):
+        """Guarda la operación en el almacenamiento, si la biblioteca tiene uno."""
+        if self.almacenamiento is not None:
+            self.almacenamiento.guardar(self, evento)
+
+    def compactar(self):
+        """Escribe una instantánea completa y vacía el diario de operaciones."""
+        if self.almacenamiento is not None:
+            self.almacenamiento.compactar(self)
+
+    # --- Operaciones públicas ---
+
+    def importar_libros(self, archivo, formato='csv', tamano_lote=10000, procesos=None,
+                        verificar_control=True):
+        """
+        Importa libros en bloque desde 'archivo', sin mostrar un mensaje por libro.
+        Formatos (ver _leer_registros):
+            'csv': una línea por libro con titulo,autor,categoria,isbn.
+            'marc': registros separados por una línea en blanco, con las etiquetas
+                    020 (ISBN), 100 (autor), 245 (título) y 650 (categoría).
+
+        El archivo se lee en streaming y se valida por lotes de 'tamano_lote'
+        registros; con 'procesos' > 1 los lotes se validan en paralelo en otros
+        procesos. Los ISBN repetidos (en el archivo o ya en el catálogo) se rechazan
+        y se conserva el primero. Los índices de búsqueda se reconstruyen una sola vez
+        al final y, si hay almacenamiento, se guarda una instantánea en lugar de
+        un evento por libro. Si la importación se corta por un error, la instantánea
+        se guarda igualmente con los libros ya importados, para que lo que hay en
+        memoria no se pierda al reiniciar.
+
+        Devuelve un ResumenImportacion con los importados y los rechazos.
+        """
+        resumen = ResumenImportacion()
+        inicio = time.perf_counter()
+        indices_construidos = self._textos is not None
+        palabras_construidas = self._indice_palabras is not None
+        self._textos = self._indice_trigramas = self._indice_categoria = None
+        self._indice_palabras = self._arbol_palabras = None
+        self._vaciar_cache()
+
+        lotes = _agrupar(_leer_registros(archivo, formato), tamano_lote)
+        if procesos and procesos > 1:
+            ejecutor = ProcessPoolExecutor(procesos)
+            resultados = _en_paralelo(ejecutor, lotes, formato, verificar_control, procesos * 2)
         else:
-            self.libros_disponibles[libro.isbn] = libro
-            print(f"Libro '{libro.titulo_autor[0]}' añadido exitosamente.")
+            ejecutor = None
+            resultados = (_validar_lote(lote, formato, verificar_control) for lote in lotes)
+        try:
+            for validos, rechazos in resultados:
+                resumen.rechazados.extend(RegistroRechazado(*r) for r in rechazos)
+                resumen.leidos += len(validos) + len(rechazos)
+                for numero_linea, titulo, autor, categoria, isbn in validos:
+                    if isbn in self._catalogo:
+                        resumen.rechazados.append(RegistroRechazado(numero_linea, isbn, "ISBN duplicado"))
+                        continue
+                    self._anadir_libro(Libro(titulo, autor, categoria, isbn))
+                    resumen.importados += 1
+        finally:
+            if ejecutor is not None:
+                ejecutor.shutdown(cancel_futures=True)
+            if indices_construidos:
+                self._construir_indices()
+            if palabras_construidas:
+                self._construir_indice_palabras()
+            if resumen.importados:
+                self.compactar()
+        resumen.segundos = time.perf_counter() - inicio
+        self._avisar(resumen)
+        return resumen
+
+    def anadir_libro(self, libro, ejemplares=1):
+        """Añade un libro al catálogo de la biblioteca, con 'ejemplares' copias."""
+        if libro.isbn in self._catalogo:
+            self._avisar(f"Error: El libro con ISBN {libro.isbn} ya existe.")
+            return False
+        elif ejemplares < 1:
+            self._avisar("Error: Un libro debe tener al menos un ejemplar.")
+            return False
+        else:
+            self._anadir_libro(libro, ejemplares)
+            titulo, autor = libro.titulo_autor
+            evento = {'op': 'anadir_libro', 'isbn': libro.isbn, 'titulo': titulo,
+                      'autor': autor, 'categoria': libro.categoria}
+            if ejemplares != 1:
+                evento['ejemplares'] = ejemplares
+            self._guardar(evento)
+            self._avisar(f"Libro '{libro.titulo_autor[0]}' añadido exitosamente.")
+            return True
+
+    def anadir_ejemplares(self, isbn, cantidad=1):
+        """
+        Añade ejemplares de un título que ya está en el catálogo. Si hay lista de
+        espera, los nuevos ejemplares se prestan directamente a los primeros de la cola.
+        """
+        if isbn not in self._catalogo:
+            self._avisar(f"Error: No se encontró el libro con ISBN {isbn}.")
+            return False
+        if cantidad < 1:
+            self._avisar("Error: La cantidad de ejemplares debe ser positiva.")
+            return False
+        ahora = time.time()
+        asignados = self._anadir_ejemplares(isbn, cantidad, ahora)
+        self._guardar({'op': 'anadir_ejemplares', 'isbn': isbn, 'cantidad': cantidad, 'fecha': ahora})
+        self._avisar(f"{cantidad} ejemplares del libro con ISBN {isbn} añadidos exitosamente.")
+        self._avisar_asignados(isbn, asignados)
+        return True
 
     def quitar_libro(self, isbn):
-        """Quita un libro del catálogo de la biblioteca por su ISBN."""
-        if isbn in self.libros_disponibles:
-            del self.libros_disponibles[isbn]
-            print(f"Libro con ISBN {isbn} quitado exitosamente.")
+        """
+        Quita un libro del catálogo de la biblioteca por su ISBN.
+        Solo es posible si ninguno de sus ejemplares está prestado.
+        """
+        if isbn in self._catalogo and self._disponibles[isbn] == self._ejemplares[isbn]:
+            self._quitar_libro(isbn)
+            self._guardar({'op': 'quitar_libro', 'isbn': isbn})
+            self._avisar(f"Libro con ISBN {isbn} quitado exitosamente.")
+            return True
         else:
-            print(f"Error: No se encontró el libro con ISBN {isbn}.")
+            self._avisar(f"Error: No se encontró el libro con ISBN {isbn}.")
+            return False
 
     def registrar_usuario(self, usuario):
         """Registra un nuevo usuario en el sistema."""
         if usuario.user_id in self.usuarios_registrados:
-            print(f"Error: El ID de usuario '{usuario.user_id}' ya está registrado.")
+            self._avisar(f"Error: El ID de usuario '{usuario.user_id}' ya está registrado.")
+            return False
         else:
-            self.usuarios_registrados.add(usuario.user_id)
-            self.usuarios[usuario.user_id] = usuario
-            print(f"Usuario '{usuario.nombre}' registrado exitosamente.")
+            self._registrar_usuario(usuario)
+            self._guardar({'op': 'registrar_usuario', 'user_id': usuario.user_id, 'nombre': usuario.nombre})
+            self._avisar(f"Usuario '{usuario.nombre}' registrado exitosamente.")
+            return True
 
     def dar_de_baja_usuario(self, user_id):
         """Da de baja a un usuario del sistema por su ID."""
         if user_id in self.usuarios:
-            # Eliminar el usuario del conjunto y del diccionario de usuarios
-            self.usuarios_registrados.remove(user_id)
-            del self.usuarios[user_id]
-            print(f"Usuario con ID '{user_id}' dado de baja exitosamente.")
+            self._dar_de_baja_usuario(user_id)
+            self._guardar({'op': 'dar_de_baja_usuario', 'user_id': user_id})
+            self._avisar(f"Usuario con ID '{user_id}' dado de baja exitosamente.")
+            return True
         else:
-            print(f"Error: El usuario con ID '{user_id}' no está registrado.")
+            self._avisar(f"Error: El usuario con ID '{user_id}' no está registrado.")
+            return False
 
-    def prestar_libro(self, user_id, isbn):
+    def prestar_libro(self, user_id, isbn, dias=None):
         """
-        Presta un libro a un usuario.
+        Presta un libro a un usuario durante 'dias' días (por defecto, DIAS_PRESTAMO).
         Mueve el libro del diccionario de libros disponibles a la lista de libros prestados del usuario.
+        Devuelve True si el préstamo se realizó.
         """
         if user_id not in self.usuarios:
-            print("Error: El usuario no está registrado.")
-            return
+            self._avisar("Error: El usuario no está registrado.")
+            return False
 
         if isbn not in self.libros_disponibles:
-            print("Error: El libro no está disponible para préstamo.")
-            return
+            if isbn in self._catalogo:
+                self._avisar("Error: No quedan ejemplares disponibles; puede reservar el libro.")
+            else:
+                self._avisar("Error: El libro no está disponible para préstamo.")
+            return False
+
+        if isbn in self.usuarios[user_id].isbns_prestados:
+            self._avisar("Error: El usuario ya tiene un ejemplar de este libro.")
+            return False
 
-        libro_a_prestar = self.libros_disponibles.pop(isbn)
-        self.usuarios[user_id].libros_prestados.append(libro_a_prestar)
-        print(f"Libro '{libro_a_prestar.titulo_autor[0]}' prestado a '{self.usuarios[user_id].nombre}'.")
+        ahora = time.time()
+        vence = self._vencimiento(ahora, dias)
+        libro_a_prestar = self._prestar_libro(user_id, isbn, ahora, vence)
+        self._guardar({'op': 'prestar_libro', 'user_id': user_id, 'isbn': isbn, 'fecha': ahora, 'vence': vence})
+        self._avisar(f"Libro '{libro_a_prestar.titulo_autor[0]}' prestado a '{self.usuarios[user_id].nombre}'.")
+        return True
 
     def devolver_libro(self, user_id, isbn):
         """
         Permite a un usuario devolver un libro.
         Mueve el libro de la lista de libros prestados del usuario al diccionario de libros disponibles.
+        Devuelve True si la devolución se realizó.
         """
         if user_id not in self.usuarios:
-            print("Error: El usuario no está registrado.")
-            return
+            self._avisar("Error: El usuario no está registrado.")
+            return False
 
         usuario = self.usuarios[user_id]
-        libro_encontrado = None
-        for libro in usuario.libros_prestados:
-            if libro.isbn == isbn:
-                libro_encontrado = libro
-                break
-
-        if libro_encontrado:
-            usuario.libros_prestados.remove(libro_encontrado)
-            self.libros_disponibles[isbn] = libro_encontrado
-            print(f"Libro '{libro_encontrado.titulo_autor[0]}' devuelto exitosamente por '{usuario.nombre}'.")
+        if isbn in usuario.isbns_prestados:
+            libro_encontrado = self._catalogo[isbn]
+            ahora = time.time()
+            asignados = self._devolver_libro(user_id, isbn, ahora)
+            self._guardar({'op': 'devolver_libro', 'user_id': user_id, 'isbn': isbn, 'fecha': ahora})
+            self._avisar(f"Libro '{libro_encontrado.titulo_autor[0]}' devuelto exitosamente por '{usuario.nombre}'.")
+            self._avisar_asignados(isbn, asignados)
+            return True
         else:
-            print(f"Error: El usuario '{usuario.nombre}' no tiene prestado el libro con ISBN '{isbn}'.")
+            self._avisar(f"Error: El usuario '{usuario.nombre}' no tiene prestado el libro con ISBN '{isbn}'.")
+            return False
+
+    def reservar_libro(self, user_id, isbn):
+        """
+        Pone al usuario en la lista de espera de un libro sin ejemplares disponibles.
+        Cuando se devuelva (o se añada) un ejemplar, se le prestará automáticamente
+        si es el primero de la cola. Devuelve True si la reserva se realizó.
+        """
+        if user_id not in self.usuarios:
+            self._avisar("Error: El usuario no está registrado.")
+            return False
+        if isbn not in self._catalogo:
+            self._avisar(f"Error: No se encontró el libro con ISBN {isbn}.")
+            return False
+        usuario = self.usuarios[user_id]
+        if isbn in self.libros_disponibles:
+            self._avisar("Error: Hay ejemplares disponibles; no hace falta reservar.")
+            return False
+        if isbn in usuario.isbns_prestados or isbn in usuario.isbns_reservados:
+            self._avisar("Error: El usuario ya tiene o ya reservó un ejemplar de este libro.")
+            return False
+        self._reservar_libro(user_id, isbn)
+        self._guardar({'op': 'reservar_libro', 'user_id': user_id, 'isbn': isbn})
+        self._avisar(f"Reserva registrada: '{usuario.nombre}' es el número {len(self._reservas[isbn])} "
+                     f"en la lista de espera.")
+        return True
+
+    def _avisar_asignados(self, isbn, asignados):
+        """Muestra a quién se prestaron ejemplares desde la lista de espera."""
+        titulo = self._catalogo[isbn].titulo_autor[0]
+        for user_id in asignados:
+            self._avisar(f"Libro '{titulo}' prestado a '{self.usuarios[user_id].nombre}' desde la lista de espera.")
+
+    def disponibles(self, isbn):
+        """Devuelve cuántos ejemplares del libro hay disponibles para préstamo (0 si no existe)."""
+        return self._disponibles.get(isbn, 0)
+
+    def ejemplares(self, isbn):
+        """Devuelve cuántos ejemplares del libro tiene la biblioteca (0 si no existe)."""
+        return self._ejemplares.get(isbn, 0)
+
+    def lista_espera(self, isbn):
+        """Devuelve los IDs de usuario que esperan el libro, en orden de reserva."""
+        return list(self._reservas.get(isbn, ()))
 
     def buscar_libro(self, criterio, valor):
         """
         Busca libros en el catálogo de la biblioteca por título, autor o categoría.
         La búsqueda no distingue entre mayúsculas y minúsculas.
+        Devuelve una lista (vacía si el criterio no es válido); ver buscar_libros().
         """
-        resultados = []
         criterio = criterio.lower()
-        valor = valor.lower()
-
-        # Combina los libros disponibles y los prestados para una búsqueda exhaustiva.
-        catalogo_completo = list(self.libros_disponibles.values())
-        for usuario in self.usuarios.values():
-            catalogo_completo.extend(usuario.libros_prestados)
-
-        for libro in catalogo_completo:
-            if criterio == 'titulo' and valor in libro.titulo_autor[0].lower():
-                resultados.append(libro)
-            elif criterio == 'autor' and valor in libro.titulo_autor[1].lower():
-                resultados.append(libro)
-            elif criterio == 'categoria' and valor in libro.categoria.lower():
-                resultados.append(libro)
-        
-        return resultados
+        if criterio not in self.CAMPOS_TEXTO + ('categoria',):
+            return []
+        return list(self.buscar_libros(**{criterio: valor}))
+
+    def buscar_libros(self, titulo=None, autor=None, categoria=None):
+        """
+        Genera los libros del catálogo (disponibles y prestados) que cumplen todos
+        los criterios dados, sin distinguir mayúsculas y minúsculas:
+        'titulo' y 'autor' se buscan como subcadena y 'categoria' debe coincidir entera.
+
+        Se recorre la entrada de índice más pequeña de entre las de los criterios
+        y se comprueban las demás por pertenencia, de modo que los resultados se
+        producen a medida que se piden, sin construir listas intermedias.
+        """
+        if self._textos is None:
+            self._construir_indices()
+        textos = {campo: valor.lower() for campo, valor in zip(self.CAMPOS_TEXTO, (titulo, autor))
+                  if valor is not None}
+        conjuntos = []
+        if categoria is not None:
+            conjuntos.append(self._indice_categoria.get(categoria.lower(), {}))
+        for campo, valor in textos.items():
+            # Las consultas de menos de tres caracteres no tienen trigramas: se comprueban en el recorrido.
+            indice = self._indice_trigramas[campo]
+            conjuntos.extend(indice.get(trigrama, {}) for trigrama in _trigramas(valor))
+
+        if conjuntos:
+            conjuntos.sort(key=len)
+            recorrido, restantes = conjuntos[0], conjuntos[1:]
+        else:
+            recorrido, restantes = self._catalogo, []
+        for isbn in recorrido:
+            if all(isbn in conjunto for conjunto in restantes) and \
+               all(valor in self._textos[campo][isbn] for campo, valor in textos.items()):
+                yield self._catalogo[isbn]
+
+    def buscar_por_relevancia(self, consulta, limite=10, max_distancia=None):
+        """
+        Busca libros cuyo título, autor o categoría contengan las palabras de la
+        consulta, admitiendo erratas, y devuelve hasta 'limite' tuplas
+        (libro, puntuación) de mayor a menor puntuación.
+
+        No distingue mayúsculas, minúsculas ni tildes. Cada palabra de la consulta
+        coincide con las palabras del catálogo a distancia de edición 'max_distancia'
+        o menos (por defecto, según su longitud; ver _tolerancia). Por cada palabra,
+        el libro suma el peso del campo en que aparece (PESOS_RELEVANCIA) dividido
+        entre 1 + la distancia, así que las coincidencias exactas en el título
+        puntúan más.
+
+        Los resultados de las consultas repetidas salen de la caché.
+        """
+        palabras = tuple(dict.fromkeys(_palabras(consulta)))
+        if not palabras or limite < 1:
+            return []
+        if self._indice_palabras is None:
+            self._construir_indice_palabras()
+        clave = (palabras, max_distancia, limite)
+        if clave in self._cache:
+            self._cache.move_to_end(clave)
+            self.cache_aciertos += 1
+            return [(self._catalogo[isbn], puntuacion) for isbn, puntuacion in self._cache[clave][0]]
+
+        self.cache_fallos += 1
+        puntuaciones = {}
+        usadas = set(palabras)
+        for palabra in palabras:
+            distancia_maxima = _tolerancia(palabra, max_distancia)
+            if distancia_maxima:
+                variantes = [(variante, distancia) for variante, distancia
+                             in self._arbol_palabras.buscar(palabra, distancia_maxima)
+                             if variante in self._indice_palabras]
+            else:
+                variantes = [(palabra, 0)] if palabra in self._indice_palabras else []
+            # Cada palabra de la consulta cuenta una vez por libro, con su mejor variante.
+            mejores = {}
+            for variante, distancia in variantes:
+                usadas.add(variante)
+                for isbn, peso in self._indice_palabras[variante].items():
+                    puntuacion = peso / (1 + distancia)
+                    if puntuacion > mejores.get(isbn, 0):
+                        mejores[isbn] = puntuacion
+            for isbn, puntuacion in mejores.items():
+                puntuaciones[isbn] = puntuaciones.get(isbn, 0) + puntuacion
+        resultados = heapq.nlargest(limite, puntuaciones.items(), key=itemgetter(1))
+
+        self._cache[clave] = (resultados, usadas)
+        for palabra in usadas:
+            self._cache_por_palabra.setdefault(palabra, set()).add(clave)
+        if len(self._cache) > self.TAMANO_CACHE:
+            self._olvidar_consulta(next(iter(self._cache)))
+        return [(self._catalogo[isbn], puntuacion) for isbn, puntuacion in resultados]
+
+    def vencidos(self, ahora=None):
+        """Devuelve los préstamos vencidos en 'ahora' (por defecto, ya), del más antiguo al más reciente."""
+        ahora = time.time() if ahora is None else ahora
+        self._avanzar_vencimientos(ahora)
+        return sorted((p for p in self._vencidos if p.vence <= ahora), key=lambda p: p.vence)
+
+    def vencen_pronto(self, horas=24, ahora=None):
+        """
+        Devuelve los préstamos que vencen en las próximas 'horas' horas, por fecha de vencimiento.
+        Solo se visita la parte del montículo con vencimientos dentro del plazo.
+        """
+        ahora = time.time() if ahora is None else ahora
+        self._avanzar_vencimientos(ahora)
+        hasta = ahora + horas * 3600
+        encontrados = []
+        pendientes = [0] if self._vencimientos else []
+        while pendientes:
+            i = pendientes.pop()
+            vence, _, prestamo = self._vencimientos[i]
+            if vence > hasta:
+                continue  # Sus descendientes vencen aún más tarde.
+            if self._prestamo_activo(prestamo):
+                encontrados.append(prestamo)
+            pendientes.extend(j for j in (2 * i + 1, 2 * i + 2) if j < len(self._vencimientos))
+        if ahora < self._avanzado_hasta:
+            # Una consulta anterior con un 'ahora' posterior ya sacó del montículo parte del plazo.
+            encontrados.extend(p for p in self._vencidos if ahora < p.vence <= hasta)
+        return sorted(encontrados, key=lambda p: p.vence)
+
+    def avisos_pendientes(self, ahora=None):
+        """
+        Devuelve, una sola vez cada uno, los préstamos que han vencido hasta 'ahora' y aún
+        no se habían avisado, para enviar recordatorios o aplicar multas.
+        Los avisos no se guardan: tras reiniciar, los vencidos se avisan de nuevo.
+        """
+        ahora = time.time() if ahora is None else ahora
+        self._avanzar_vencimientos(ahora)
+        avisos = [p for p in self._sin_avisar if p.vence <= ahora]
+        for prestamo in avisos:
+            del self._sin_avisar[prestamo]
+        return sorted(avisos, key=lambda p: p.vence)
+
+    def proximo_vencimiento(self):
+        """Devuelve cuándo vence el próximo préstamo aún no vencido, o None si no hay ninguno."""
+        while self._vencimientos and not self._prestamo_activo(self._vencimientos[0][2]):
+            heapq.heappop(self._vencimientos)
+            self._vencimientos_obsoletos -= 1
+        return self._vencimientos[0][0] if self._vencimientos else None
+
+    def quien_tiene(self, isbn):
+        """Devuelve la lista de usuarios que tienen prestado un ejemplar del libro con ese ISBN."""
+        return [self.usuarios[user_id] for user_id in self.prestamos.get(isbn, ())]
 
     def listar_libros_prestados(self, user_id):
         """Muestra una lista de los libros que un usuario tiene prestados."""
         if user_id not in self.usuarios:
-            print("Error: El usuario no está registrado.")
+            self._avisar("Error: El usuario no está registrado.")
             return []
         
         return self.usuarios[user_id].libros_prestados
 
+class RegistroRechazado:
+    """Describe un registro del archivo de importación que no se añadió al catálogo."""
+    def __init__(self, numero_linea, contenido, motivo):
+        self.numero_linea = numero_linea
+        self.contenido = contenido
+        self.motivo = motivo
+
+    def __str__(self):
+        return f"Línea {self.numero_linea}: {self.contenido!r} ({self.motivo})"
+
+class ResumenImportacion:
+    """
+    Resultado de Biblioteca.importar_libros().
+
+    Atributos:
+        leidos (int): Registros leídos del archivo.
+        importados (int): Libros añadidos al catálogo.
+        rechazados (list): Un RegistroRechazado por cada registro descartado.
+        segundos (float): Duración de la importación.
+    """
+    def __init__(self):
+        self.leidos = 0
+        self.importados = 0
+        self.rechazados = []
+        self.segundos = 0.0
+
+    def rechazos_por_motivo(self):
+        """Devuelve un diccionario motivo -> número de registros rechazados."""
+        return dict(Counter(r.motivo for r in self.rechazados))
+
+    def __str__(self):
+        texto = (f"Importación terminada en {self.segundos:.2f} s: {self.importados} de "
+                 f"{self.leidos} libros importados.")
+        for motivo, cantidad in self.rechazos_por_motivo().items():
+            texto += f"\n  - {cantidad} rechazados: {motivo}"
+        return texto
+
+def _isbn_valido(isbn):
+    """
+    Comprueba el formato y el dígito de control de un ISBN-10 o ISBN-13
+    (se ignoran guiones y espacios). Devuelve None si es válido o el motivo si no.
+    """
+    digitos = isbn.replace("-", "").replace(" ", "").upper()
+    if len(digitos) == 13 and digitos.isascii() and digitos.isdigit():
+        # Suma de los códigos ASCII menos el de '0' en cada una de las 7 + 3 * 6 posiciones ponderadas
+        codigos = digitos.encode('ascii')
+        suma = sum(codigos[0::2]) + 3 * sum(codigos[1::2]) - 48 * 25
+        return None if suma % 10 == 0 else "dígito de control del ISBN incorrecto"
+    if len(digitos) == 10 and digitos[:9].isdigit() and (digitos[9].isdigit() or digitos[9] == "X"):
+        suma = sum((10 - i) * (10 if d == "X" else int(d)) for i, d in enumerate(digitos))
+        return None if suma % 11 == 0 else "dígito de control del ISBN incorrecto"
+    return "ISBN con formato inválido"
+
+# Etiquetas del formato 'marc' y campo al que corresponde cada una
+ETIQUETAS_MARC = {'020': 'isbn', '100': 'autor', '245': 'titulo', '650': 'categoria'}
+
+def _leer_registros(archivo, formato):
+    """
+    Genera (numero_linea, texto) por cada registro del archivo sin cargarlo entero.
+    En 'csv' cada línea no vacía es un registro; en 'marc' lo es cada bloque de
+    líneas separado por una línea en blanco.
+    """
+    if formato not in ('csv', 'marc'):
+        raise ValueError(f"Formato de importación desconocido: {formato!r}")
+    with open(archivo, 'r', encoding='utf-8', newline='', buffering=1 << 20) as f:
+        if formato == 'csv':
+            for numero_linea, linea in enumerate(f, 1):
+                if linea.strip():
+                    yield numero_linea, linea
+            return
+        bloque, inicio = [], 0
+        for numero_linea, linea in enumerate(f, 1):
+            if linea.strip():
+                if not bloque:
+                    inicio = numero_linea
+                bloque.append(linea)
+            elif bloque:
+                yield inicio, "".join(bloque)
+                bloque = []
+        if bloque:
+            yield inicio, "".join(bloque)
+
+def _agrupar(registros, tamano_lote):
+    """Agrupa un iterable de registros en listas de 'tamano_lote' elementos."""
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) == tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _validar_lote(lote, formato, verificar_control):
+    """
+    Interpreta y valida un lote de registros. Devuelve dos listas de tuplas:
+    válidos (numero_linea, titulo, autor, categoria, isbn) y rechazos
+    (numero_linea, contenido, motivo). Es una función de módulo para poder
+    ejecutarse en otro proceso.
+    """
+    validos, rechazos = [], []
+    vistos = set()
+    for numero_linea, texto in lote:
+        if formato == 'csv':
+            texto = texto.rstrip("\r\n")
+            if '"' in texto:
+                try:
+                    campos = next(csv.reader([texto]))
+                except csv.Error as e:
+                    rechazos.append((numero_linea, texto, str(e)))
+                    continue
+            else:
+                # Sin comillas, una línea CSV se separa igual con split (y mucho más rápido).
+                campos = texto.split(",")
+            if len(campos) != 4:
+                rechazos.append((numero_linea, texto, f"se esperaban 4 campos y hay {len(campos)}"))
+                continue
+            titulo, autor, categoria, isbn = campos
+            titulo, autor, categoria, isbn = titulo.strip(), autor.strip(), categoria.strip(), isbn.strip()
+        else:
+            campos = {}
+            for linea in texto.splitlines():
+                etiqueta, _, valor = linea.partition(" ")
+                if etiqueta in ETIQUETAS_MARC:
+                    campos[ETIQUETAS_MARC[etiqueta]] = valor.strip()
+            titulo, autor, categoria, isbn = (campos.get(c, "") for c in ('titulo', 'autor', 'categoria', 'isbn'))
+        if not (titulo and autor and categoria and isbn):
+            rechazos.append((numero_linea, texto.rstrip("\r\n"), "faltan campos"))
+            continue
+        motivo = _isbn_valido(isbn) if verificar_control else None
+        if motivo is None and isbn in vistos:
+            motivo = "ISBN duplicado"
+        if motivo is not None:
+            rechazos.append((numero_linea, isbn, motivo))
+            continue
+        vistos.add(isbn)
+        validos.append((numero_linea, titulo, autor, categoria, isbn))
+    return validos, rechazos
+
+def _en_paralelo(ejecutor, lotes, formato, verificar_control, en_vuelo):
+    """
+    Valida los lotes en 'ejecutor' y genera sus resultados en el orden del archivo,
+    con como mucho 'en_vuelo' lotes pendientes para no leer el archivo entero por adelantado.
+    """
+    pendientes = deque()
+    for lote in lotes:
+        pendientes.append(ejecutor.submit(_validar_lote, lote, formato, verificar_control))
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+class AlmacenamientoBiblioteca:
+    """
+    Guarda la biblioteca en disco en dos partes:
+    - una instantánea SQLite ('ruta') con el catálogo, los usuarios y los préstamos;
+    - un diario (ruta + ".diario") al que cada operación añade un evento JSON por
+      línea, de modo que guardar un cambio cuesta O(cambio) y no O(catálogo).
+
+    Al cargar se lee la instantánea y se reproducen los eventos del diario. Cuando el
+    diario llega a 'umbral_compactacion' eventos se escribe una instantánea nueva
+    (en un archivo temporal que luego reemplaza al anterior) y se vacía el diario.
+
+    Cada compactación abre una generación nueva: la instantánea guarda su número
+    (tabla 'meta') y el diario lo lleva en su primera línea. Si el programa se corta
+    entre reemplazar la instantánea y vaciar el diario, al cargar el diario es de una
+    generación anterior, ya incluida en la instantánea, y no se vuelve a aplicar.
+    """
+    def __init__(self, ruta="biblioteca.db", umbral_compactacion=10000):
+        self.ruta = ruta
+        self.archivo_diario = ruta + ".diario"
+        self.umbral_compactacion = umbral_compactacion
+        self._eventos_diario = 0
+        self._diario = None
+        self._generacion = 0
+
+    def cargar(self, biblioteca):
+        """Carga la instantánea, si existe, y reproduce el diario sobre 'biblioteca'."""
+        if os.path.exists(self.ruta):
+            conexion = sqlite3.connect(self.ruta)
+            try:
+                # Las instantáneas anteriores a los ejemplares múltiples no tienen
+                # columna 'ejemplares' (uno por libro) ni tabla de reservas.
+                columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(libros)")}
+                ejemplares = "ejemplares" if "ejemplares" in columnas else "1"
+                # Ni columnas con las fechas del préstamo.
+                columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(prestamos)")}
+                fechas = "prestado, vence" if "vence" in columnas else "NULL, NULL"
+                tablas = {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master")}
+                if "meta" in tablas:
+                    fila = conexion.execute("SELECT valor FROM meta WHERE clave = 'generacion'").fetchone()
+                    self._generacion = 0 if fila is None else int(fila[0])
+                biblioteca._restaurar(
+                    conexion.execute(f"SELECT isbn, titulo, autor, categoria, {ejemplares} "
+                                     "FROM libros ORDER BY rowid"),
+                    conexion.execute("SELECT user_id, nombre FROM usuarios ORDER BY rowid"),
+                    conexion.execute(f"SELECT isbn, user_id, {fechas} FROM prestamos ORDER BY rowid"),
+                    conexion.execute("SELECT isbn, user_id FROM reservas ORDER BY rowid")
+                    if "reservas" in tablas else ())
+            finally:
+                conexion.close()
+        generacion, eventos = self._leer_diario()
+        if generacion < self._generacion:
+            # Corte tras la última compactación: sus eventos ya están en la instantánea.
+            self._vaciar_diario()
+            eventos = []
+        for evento in eventos:
+            biblioteca._aplicar(evento)
+        self._eventos_diario = len(eventos)
+
+    def _leer_diario(self):
+        """
+        Devuelve la generación del diario y sus eventos. Si el último quedó a medio
+        escribir (por ejemplo, tras un corte), se descarta y se recorta el diario.
+        Los diarios sin cabecera (anteriores a las generaciones) son de la generación 0.
+        """
+        generacion, eventos = 0, []
+        try:
+            f = open(self.archivo_diario, 'rb+')
+        except FileNotFoundError:
+            return generacion, eventos
+        with f:
+            posicion_valida = 0
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                try:
+                    evento = json.loads(linea)
+                except ValueError:
+                    break
+                if posicion_valida == 0 and 'op' not in evento:
+                    generacion = evento['generacion']
+                else:
+                    eventos.append(evento)
+                posicion_valida += len(linea)
+            f.truncate(posicion_valida)
+        return generacion, eventos
+
+    def _vaciar_diario(self):
+        """Deja el diario vacío, con solo la cabecera de la generación actual."""
+        if self._diario is not None:
+            self._diario.close()
+            self._diario = None
+        with open(self.archivo_diario, 'wb') as f:
+            f.write(json.dumps({'generacion': self._generacion}).encode('utf-8') + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def guardar(self, biblioteca, evento):
+        """Añade el evento al final del diario y compacta al llegar al umbral."""
+        try:
+            if self._diario is None:
+                self._diario = open(self.archivo_diario, 'ab')
+                if self._diario.tell() == 0:
+                    self._diario.write(json.dumps({'generacion': self._generacion}).encode('utf-8') + b"\n")
+            self._diario.write(json.dumps(evento, separators=(',', ':')).encode('utf-8') + b"\n")
+            self._diario.flush()
+            os.fsync(self._diario.fileno())
+        except OSError as e:
+            print(f"Error al escribir en el diario de la biblioteca: {e}")
+            return
+        self._eventos_diario += 1
+        if self._eventos_diario >= self.umbral_compactacion:
+            self.compactar(biblioteca)
+
+    def compactar(self, biblioteca):
+        """Escribe una instantánea con el estado completo de la biblioteca y vacía el diario."""
+        temporal = self.ruta + ".tmp"
+        try:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            conexion = sqlite3.connect(temporal)
+            try:
+                # El archivo temporal no necesita diario propio: si algo falla, se descarta entero.
+                conexion.execute("PRAGMA journal_mode=OFF")
+                conexion.execute("PRAGMA synchronous=OFF")
+                conexion.executescript("""
+                    CREATE TABLE libros (isbn TEXT PRIMARY KEY, titulo TEXT NOT NULL,
+                                         autor TEXT NOT NULL, categoria TEXT NOT NULL,
+                                         ejemplares INTEGER NOT NULL);
+                    CREATE TABLE usuarios (user_id TEXT PRIMARY KEY, nombre TEXT NOT NULL);
+                    CREATE TABLE prestamos (isbn TEXT NOT NULL, user_id TEXT NOT NULL,
+                                            prestado REAL, vence REAL,
+                                            PRIMARY KEY (isbn, user_id));
+                    CREATE TABLE reservas (isbn TEXT NOT NULL, user_id TEXT NOT NULL);
+                    CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+                """)
+                conexion.execute("INSERT INTO meta VALUES ('generacion', ?)", (str(self._generacion + 1),))
+                conexion.executemany(
+                    "INSERT INTO libros VALUES (?, ?, ?, ?, ?)",
+                    ((l.isbn, l.titulo_autor[0], l.titulo_autor[1], l.categoria, biblioteca._ejemplares[l.isbn])
+                     for l in biblioteca._catalogo.values()))
+                conexion.executemany(
+                    "INSERT INTO usuarios VALUES (?, ?)",
+                    ((u.user_id, u.nombre) for u in biblioteca.usuarios.values()))
+                conexion.executemany(
+                    "INSERT INTO prestamos VALUES (?, ?, ?, ?)",
+                    ((p.isbn, p.user_id, p.prestado, p.vence)
+                     for p in (biblioteca.prestamos[isbn][u.user_id]
+                               for u in biblioteca.usuarios.values() for isbn in u.isbns_prestados)))
+                conexion.executemany(
+                    "INSERT INTO reservas VALUES (?, ?)",
+                    ((isbn, user_id) for isbn, cola in biblioteca._reservas.items() for user_id in cola))
+                conexion.commit()
+            finally:
+                conexion.close()
+            with open(temporal, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
+            # La instantánea ya contiene todos los eventos: el diario puede vaciarse.
+            self._generacion += 1
+            self._vaciar_diario()
+            self._eventos_diario = 0
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error al guardar la biblioteca: {e}")
+
+    def cerrar(self):
+        if self._diario is not None:
+            self._diario.close()
+            self._diario = None
+
 # --- PRUEBA DEL SISTEMA ---
 if __name__ == "__main__":
     print("--- Inicializando la Biblioteca Digital ---")
@@ -217,6 +1342,19 @@ if __name__ == "__main__":
     for libro in libros_de_ana:
         print(libro)
     print(f"Libros disponibles: {len(biblioteca.libros_disponibles)}")
+    print(f"¿Quién tiene 'El señor de los anillos'? {biblioteca.quien_tiene('978-0618640157')[0]}")
+    print(f"Préstamos que vencen en los próximos {Biblioteca.DIAS_PRESTAMO} días:")
+    for prestamo in biblioteca.vencen_pronto(horas=24 * Biblioteca.DIAS_PRESTAMO):
+        print(prestamo)
+
+    # Varios ejemplares y lista de espera
+    print("\n--- Ejemplares y lista de espera ---")
+    biblioteca.prestar_libro("ana_perez_1", "978-0618640157")  # No quedan ejemplares
+    biblioteca.reservar_libro("ana_perez_1", "978-0618640157")
+    biblioteca.devolver_libro("juan_gomez_2", "978-0618640157")  # Pasa directamente a Ana
+    biblioteca.anadir_ejemplares("978-0618640157", 2)
+    print(f"Ejemplares de 'El señor de los anillos': {biblioteca.ejemplares('978-0618640157')}, "
+          f"disponibles: {biblioteca.disponibles('978-0618640157')}")
 
     # Devolver un libro
     print("\n--- Devolviendo un libro ---")
@@ -243,6 +1381,14 @@ if __name__ == "__main__":
     for libro in resultados_categoria:
         print(libro)
 
+    print("\nBuscando por autor 'márquez' y título 'amor' a la vez:")
+    for libro in biblioteca.buscar_libros(autor="márquez", titulo="amor"):
+        print(libro)
+
+    print("\nBuscando por relevancia 'garcia marques amor' (sin tildes y con una errata):")
+    for libro, puntuacion in biblioteca.buscar_por_relevancia("garcia marques amor"):
+        print(f"{puntuacion:.2f} {libro}")
+
     # 5. Eliminar un libro
     print("\n--- Eliminando un libro ---")
     biblioteca.quitar_libro("978-0451524935")
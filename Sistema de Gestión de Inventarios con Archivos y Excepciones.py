@@ -1,7 +1,20 @@
+import csv
+import io
 import os
+import sqlite3
+import sys
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
 
 class Producto:
     """Representa un producto individual con sus atributos."""
+    __slots__ = ('id_producto', 'nombre', 'cantidad', 'precio')
+
     def __init__(self, id_producto, nombre, cantidad, precio):
         self.id_producto = id_producto
         self.nombre = nombre
@@ -12,104 +25,569 @@ class Producto:
         """Devuelve una representación en cadena del objeto Producto."""
         return f"ID: {self.id_producto}, Nombre: {self.nombre}, Cantidad: {self.cantidad}, Precio: ${self.precio:.2f}"
 
+    def to_fila(self):
+        """Devuelve los datos del producto como una fila (lista de campos) para el módulo csv."""
+        return [self.id_producto, self.nombre, self.cantidad, self.precio]
+
     def to_csv(self):
         """Convierte los datos del producto a una cadena CSV para guardar en archivo."""
-        return f"{self.id_producto},{self.nombre},{self.cantidad},{self.precio}\n"
+        salida = io.StringIO()
+        csv.writer(salida, lineterminator="\n").writerow(self.to_fila())
+        return salida.getvalue()
+
+    @staticmethod
+    def from_fila(fila):
+        """
+        Crea un objeto Producto a partir de una fila ya separada en campos.
+        Lanza ValueError si la fila no tiene el formato esperado.
+        """
+        if len(fila) != 4:
+            raise ValueError(f"se esperaban 4 campos y hay {len(fila)}")
+        return Producto(fila[0], fila[1], int(fila[2]), float(fila[3]))
 
     @staticmethod
     def from_csv(linea):
-        """Crea un objeto Producto a partir de una línea de texto CSV."""
+        """Crea un objeto Producto a partir de una línea de texto CSV. Devuelve None si es inválida."""
         try:
-            partes = linea.strip().split(',')
-            if len(partes) == 4:
-                return Producto(partes[0], partes[1], int(partes[2]), float(partes[3]))
-        except (ValueError, IndexError) as e:
-            # Manejo de líneas corruptas en el archivo
-            print(f"❌ Error al procesar la línea del archivo: '{linea.strip()}'. Error: {e}")
+            return Producto.from_fila(next(csv.reader([linea])))
+        except (ValueError, StopIteration, csv.Error):
             return None
+
+class ErrorLinea:
+    """Describe una línea del archivo de inventario que no se pudo interpretar."""
+    def __init__(self, numero_linea, contenido, motivo):
+        self.numero_linea = numero_linea
+        self.contenido = contenido
+        self.motivo = motivo
+
+    def __str__(self):
+        return f"Línea {self.numero_linea}: {self.contenido!r} ({self.motivo})"
+
+class BloqueoArchivo:
+    """
+    Bloqueo exclusivo entre procesos sobre un archivo auxiliar (fcntl.flock).
+    Es reentrante dentro del mismo proceso: solo el primer 'with' lo adquiere.
+    En sistemas sin fcntl no bloquea.
+    """
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+        self._nivel = 0
+
+    def __enter__(self):
+        if self._nivel == 0 and fcntl is not None:
+            self._archivo = open(self.ruta, 'a')
+            fcntl.flock(self._archivo, fcntl.LOCK_EX)
+        self._nivel += 1
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._nivel -= 1
+        if self._nivel == 0 and self._archivo is not None:
+            fcntl.flock(self._archivo, fcntl.LOCK_UN)
+            self._archivo.close()
+            self._archivo = None
+
+class BloqueoSQLite:
+    """
+    Bloqueo de escritura sobre una base SQLite (BEGIN IMMEDIATE). Al salir confirma
+    lo que quede pendiente, o lo deshace si hubo una excepción. Es reentrante.
+    """
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self._nivel = 0
+
+    def __enter__(self):
+        if self._nivel == 0 and not self.conexion.in_transaction:
+            self.conexion.execute("BEGIN IMMEDIATE")
+        self._nivel += 1
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._nivel -= 1
+        if self._nivel == 0 and self.conexion.in_transaction:
+            if tipo is None:
+                self.conexion.commit()
+            else:
+                self.conexion.rollback()
+
+def _firma_archivo(ruta):
+    """Identifica la versión de un archivo por (inodo, tamaño, fecha de modificación)."""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
         return None
+    return (estado.st_ino, estado.st_size, estado.st_mtime_ns)
 
-class Inventario:
+class AlmacenamientoInventario:
     """
-    Gestiona la colección de productos, el almacenamiento en archivo
-    y el manejo de excepciones.
+    Interfaz de los almacenamientos que puede usar Inventario.
+
+    - cargar(errores): devuelve el diccionario (o mapeo) de productos y añade
+      a la lista 'errores' las líneas o filas que no se pudieron leer.
+    - guardar(productos): persiste el estado actual de 'productos'.
+    - descartar(): deshace lo que aún no se haya guardado (tras una transacción fallida).
+    - iter_productos(errores): recorre los productos guardados sin cargarlos todos.
+    - bloquear(): contexto que impide a otros procesos escribir mientras está activo.
+    - hay_cambios_externos(): indica si otro proceso modificó los datos desde la última
+      carga o escritura de este.
+    - cerrar(): libera los recursos.
+
+    Si 'resuelve_consultas' es True, el almacenamiento responde por sí mismo
+    productos_por_cantidad() y el Inventario no recorre los productos en memoria.
+    """
+    resuelve_consultas = False
+
+    def cargar(self, errores):
+        raise NotImplementedError
+
+    def guardar(self, productos):
+        raise NotImplementedError
+
+    def descartar(self):
+        pass
+
+    def iter_productos(self, errores=None):
+        raise NotImplementedError
+
+    def bloquear(self):
+        return nullcontext()
+
+    def hay_cambios_externos(self):
+        return False
+
+    def cerrar(self):
+        pass
+
+class AlmacenamientoCSV(AlmacenamientoInventario):
+    """
+    Guarda el inventario en un archivo de texto CSV que se reescribe completo.
+    Varios procesos pueden compartirlo: las escrituras se hacen con un bloqueo
+    (nombre_archivo + ".lock") y los cambios ajenos se detectan por la firma del archivo.
     """
     def __init__(self, nombre_archivo='inventario.txt'):
         self.nombre_archivo = nombre_archivo
-        self.productos = {}
-        # Cargar el inventario automáticamente al iniciar
-        self.cargar_inventario()
+        self._bloqueo = BloqueoArchivo(nombre_archivo + ".lock")
+        self._firma = None
 
-    def _guardar_inventario(self):
+    def bloquear(self):
+        return self._bloqueo
+
+    def hay_cambios_externos(self):
+        return _firma_archivo(self.nombre_archivo) != self._firma
+
+    def guardar(self, productos):
         """
-        Método privado para guardar el inventario en el archivo.
+        Guarda el inventario en el archivo.
+        Escribe todas las filas con un único escritor CSV sobre un búfer grande,
+        primero en un archivo temporal que luego reemplaza al original.
         Implementa manejo de excepciones para escritura.
         """
+        temporal = self.nombre_archivo + ".tmp"
         try:
-            with open(self.nombre_archivo, 'w') as f:
-                for producto in self.productos.values():
-                    f.write(producto.to_csv())
+            with self._bloqueo:
+                with open(temporal, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+                    csv.writer(f, lineterminator="\n").writerows(
+                        producto.to_fila() for producto in productos.values())
+                os.replace(temporal, self.nombre_archivo)
+                self._firma = _firma_archivo(self.nombre_archivo)
             print(f"✔️ Inventario guardado exitosamente en '{self.nombre_archivo}'.")
         except PermissionError:
             print(f"❌ Error: Permiso denegado para escribir en el archivo '{self.nombre_archivo}'.")
         except Exception as e:
             print(f"❌ Ocurrió un error inesperado al guardar el inventario: {e}")
 
-    def cargar_inventario(self):
+    def iter_productos(self, errores=None):
+        """
+        Recorre el archivo de inventario producto a producto sin cargarlo entero en memoria.
+        Las líneas inválidas se omiten; si se pasa una lista en 'errores', se añade
+        a ella un ErrorLinea por cada una.
+        """
+        with open(self.nombre_archivo, 'r', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            lector = csv.reader(f)
+            while True:
+                try:
+                    fila = next(lector)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    if errores is not None:
+                        errores.append(ErrorLinea(lector.line_num, "", str(e)))
+                    continue
+                if not fila:
+                    continue
+                try:
+                    yield Producto.from_fila(fila)
+                except ValueError as e:
+                    if errores is not None:
+                        errores.append(ErrorLinea(lector.line_num, ",".join(fila), str(e)))
+
+    def cargar(self, errores):
         """
         Carga el inventario desde el archivo. Si el archivo no existe, lo crea.
+        Las líneas corruptas se registran en 'errores' en lugar de detener la carga.
         Implementa manejo de excepciones para lectura.
         """
-        if not os.path.exists(self.nombre_archivo):
+        productos = {}
+        self._firma = _firma_archivo(self.nombre_archivo)
+        if self._firma is None:
             print(f"⚠️ Archivo '{self.nombre_archivo}' no encontrado. Creando nuevo archivo.")
-            self._guardar_inventario() # Esto crea un archivo vacío y con permisos
-            return
+            self.guardar(productos) # Esto crea un archivo vacío y con permisos
+            return productos
 
         try:
-            with open(self.nombre_archivo, 'r') as f:
-                for linea in f:
-                    producto = Producto.from_csv(linea)
-                    if producto:
-                        self.productos[producto.id_producto] = producto
+            for producto in self.iter_productos(errores):
+                productos[producto.id_producto] = producto
             print(f"✔️ Inventario cargado exitosamente desde '{self.nombre_archivo}'.")
+            if errores:
+                print(f"⚠️ Se omitieron {len(errores)} líneas inválidas del archivo.")
         except PermissionError:
             print(f"❌ Error: Permiso denegado para leer el archivo '{self.nombre_archivo}'.")
         except Exception as e:
             print(f"❌ Ocurrió un error inesperado al leer el inventario: {e}")
+        return productos
+
+class ProductosSQLite(MutableMapping):
+    """
+    Mapeo {id_producto: Producto} respaldado por una tabla SQLite. Solo se leen
+    las filas que se piden; cada acceso devuelve una copia del producto y los
+    cambios se escriben asignándolo de nuevo.
+    """
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def __len__(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+
+    def __iter__(self):
+        for (id_producto,) in self.conexion.execute("SELECT id FROM productos ORDER BY rowid"):
+            yield id_producto
+
+    def __contains__(self, id_producto):
+        fila = self.conexion.execute("SELECT 1 FROM productos WHERE id = ?", (id_producto,)).fetchone()
+        return fila is not None
+
+    def __getitem__(self, id_producto):
+        fila = self.conexion.execute(
+            "SELECT id, nombre, cantidad, precio FROM productos WHERE id = ?", (id_producto,)).fetchone()
+        if fila is None:
+            raise KeyError(id_producto)
+        return Producto(*fila)
+
+    def __setitem__(self, id_producto, producto):
+        self.conexion.execute(
+            "INSERT INTO productos (id, nombre, cantidad, precio) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+            "cantidad = excluded.cantidad, precio = excluded.precio",
+            (id_producto, producto.nombre, producto.cantidad, producto.precio))
+
+    def __delitem__(self, id_producto):
+        cursor = self.conexion.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
+        if cursor.rowcount == 0:
+            raise KeyError(id_producto)
+
+    def values(self):
+        """Recorre todos los productos con una sola consulta."""
+        for fila in self.conexion.execute("SELECT id, nombre, cantidad, precio FROM productos ORDER BY rowid"):
+            yield Producto(*fila)
+
+class AlmacenamientoSQLite(AlmacenamientoInventario):
+    """
+    Guarda el inventario en una base de datos SQLite (modo WAL), con índices
+    sobre el nombre y la cantidad. Al iniciar no se lee ninguna fila: los
+    productos se consultan a medida que se necesitan.
+    """
+    resuelve_consultas = True
+
+    def __init__(self, ruta='inventario.db'):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS productos (
+                id TEXT PRIMARY KEY,
+                nombre TEXT NOT NULL,
+                cantidad INTEGER NOT NULL,
+                precio REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre);
+            CREATE INDEX IF NOT EXISTS idx_productos_cantidad ON productos (cantidad);
+        """)
+        self._bloqueo = BloqueoSQLite(self.conexion)
+
+    def _version(self):
+        """Número que SQLite cambia cada vez que otra conexión confirma cambios en la base."""
+        return self.conexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def cargar(self, errores):
+        self._version_datos = self._version()
+        print(f"✔️ Inventario abierto desde la base de datos '{self.ruta}'.")
+        return ProductosSQLite(self.conexion)
+
+    def bloquear(self):
+        return self._bloqueo
+
+    def hay_cambios_externos(self):
+        return self._version() != self._version_datos
+
+    def guardar(self, productos):
+        """Los cambios ya se escribieron en la base al aplicarlos; aquí se confirman."""
+        try:
+            self.conexion.commit()
+            print(f"✔️ Inventario guardado exitosamente en '{self.ruta}'.")
+        except sqlite3.Error as e:
+            print(f"❌ Ocurrió un error inesperado al guardar el inventario: {e}")
+
+    def descartar(self):
+        self.conexion.rollback()
+
+    def iter_productos(self, errores=None):
+        return ProductosSQLite(self.conexion).values()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def productos_por_cantidad(self, desde=None, hasta=None):
+        """Devuelve los productos con desde <= cantidad < hasta, usando el índice de cantidad."""
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("cantidad >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("cantidad < ?")
+            parametros.append(hasta)
+        where = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+        filas = self.conexion.execute(
+            f"SELECT id, nombre, cantidad, precio FROM productos{where} ORDER BY cantidad, id", parametros)
+        return [Producto(*fila) for fila in filas]
+
+class Inventario:
+    """
+    Gestiona la colección de productos, el almacenamiento en archivo
+    y el manejo de excepciones.
+    """
+    def __init__(self, nombre_archivo='inventario.txt', almacenamiento=None):
+        """
+        Por defecto el inventario se guarda en el archivo CSV 'nombre_archivo'.
+        Se puede pasar otro almacenamiento, por ejemplo AlmacenamientoSQLite('inventario.db').
+        """
+        if almacenamiento is None:
+            almacenamiento = AlmacenamientoCSV(nombre_archivo)
+        self.almacenamiento = almacenamiento
+        self.productos = {}
+        # Líneas inválidas encontradas en la última carga (lista de ErrorLinea)
+        self.errores_carga = []
+        # Estado previo de los productos tocados por la transacción en curso (None si no hay ninguna)
+        self._deshacer = None
+        self._cambios_pendientes = False
+        # Cargar el inventario automáticamente al iniciar
+        with self.almacenamiento.bloquear():
+            self.cargar_inventario()
+
+    def _guardar_inventario(self):
+        """Método privado para guardar el inventario en su almacenamiento."""
+        self.almacenamiento.guardar(self.productos)
+
+    def iter_productos(self, errores=None):
+        """
+        Recorre los productos guardados uno a uno sin cargarlos todos en memoria.
+        Si se pasa una lista en 'errores', se añade a ella un ErrorLinea por cada línea inválida.
+        """
+        return self.almacenamiento.iter_productos(errores)
+
+    def cargar_inventario(self):
+        """
+        Carga el inventario desde su almacenamiento.
+        Las líneas corruptas se registran en 'errores_carga' en lugar de detener la carga.
+        """
+        self.errores_carga = []
+        self.productos = self.almacenamiento.cargar(self.errores_carga)
+
+    def sincronizar(self):
+        """
+        Recarga el inventario si otro proceso lo modificó desde la última carga o escritura.
+        La comprobación solo consulta la firma del archivo, así que puede llamarse a menudo.
+        """
+        if self._deshacer is not None or not self.almacenamiento.hay_cambios_externos():
+            return
+        with self.almacenamiento.bloquear():
+            print("🔄 El inventario fue modificado por otro proceso. Recargando...")
+            self.cargar_inventario()
+
+    @contextmanager
+    def _operacion(self):
+        """
+        Bloquea el almacenamiento mientras se valida y aplica un cambio, después de
+        recargar los cambios de otros procesos, para no sobrescribirlos.
+        Dentro de una transacción el bloqueo ya está tomado.
+        """
+        if self._deshacer is not None:
+            yield
+            return
+        with self.almacenamiento.bloquear():
+            self.sincronizar()
+            yield
+
+    def productos_por_cantidad(self, desde=None, hasta=None):
+        """
+        Devuelve los productos con desde <= cantidad < hasta (cualquiera de los
+        dos límites puede omitirse), ordenados por cantidad.
+        """
+        if self.almacenamiento.resuelve_consultas:
+            return self.almacenamiento.productos_por_cantidad(desde, hasta)
+        resultados = [p for p in self.productos.values()
+                      if (desde is None or p.cantidad >= desde) and (hasta is None or p.cantidad < hasta)]
+        resultados.sort(key=lambda p: (p.cantidad, p.id_producto))
+        return resultados
+
+    def _persistir(self):
+        """Guarda el inventario, o lo deja pendiente si hay una transacción en curso."""
+        if self._deshacer is not None:
+            self._cambios_pendientes = True
+            return
+        self._guardar_inventario()
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varios cambios y los guarda en el archivo una sola vez al terminar el bloque.
+        Si ocurre una excepción, se deshacen los cambios en memoria y no se guarda nada.
+        """
+        if self._deshacer is not None:
+            # Una transacción anidada forma parte de la exterior.
+            yield self
+            return
+        # El bloqueo se mantiene hasta guardar: otro proceso no puede escribir en medio.
+        with self.almacenamiento.bloquear():
+            self.sincronizar()
+            self._deshacer = {}
+            self._cambios_pendientes = False
+            try:
+                yield self
+            except BaseException:
+                self._revertir()
+                self.almacenamiento.descartar()
+                self._deshacer = None
+                raise
+            self._deshacer = None
+            if self._cambios_pendientes:
+                self._guardar_inventario()
+
+    def _recordar_estado(self, id_producto):
+        """Guarda el estado previo de un producto la primera vez que la transacción lo modifica."""
+        if self._deshacer is None or id_producto in self._deshacer:
+            return
+        producto = self.productos.get(id_producto)
+        if producto is None:
+            self._deshacer[id_producto] = None
+        else:
+            self._deshacer[id_producto] = (producto, producto.cantidad, producto.precio)
+
+    def _revertir(self):
+        """Restaura en memoria los productos modificados durante la transacción."""
+        for id_producto, estado in self._deshacer.items():
+            if estado is None:
+                self.productos.pop(id_producto, None)
+            else:
+                producto, cantidad, precio = estado
+                producto.cantidad = cantidad
+                producto.precio = precio
+                self.productos[id_producto] = producto
 
     def agregar_producto(self, producto):
         """Agrega un producto al inventario y guarda los cambios."""
-        if producto.id_producto in self.productos:
-            print(f"❌ Error: El producto con ID '{producto.id_producto}' ya existe.")
-            return False
-        self.productos[producto.id_producto] = producto
-        self._guardar_inventario()
+        with self._operacion():
+            if producto.id_producto in self.productos:
+                print(f"❌ Error: El producto con ID '{producto.id_producto}' ya existe.")
+                return False
+            self._recordar_estado(producto.id_producto)
+            self.productos[producto.id_producto] = producto
+            self._persistir()
         return True
 
     def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
         """Actualiza la cantidad y/o el precio de un producto existente."""
-        if id_producto not in self.productos:
-            print(f"❌ Error: No se encontró un producto con ID '{id_producto}'.")
-            return False
+        with self._operacion():
+            if id_producto not in self.productos:
+                print(f"❌ Error: No se encontró un producto con ID '{id_producto}'.")
+                return False
+            self._actualizar(id_producto, nueva_cantidad, nuevo_precio)
+            self._persistir()
+        print(f"✔️ Producto '{id_producto}' actualizado exitosamente.")
+        return True
+
+    def _actualizar(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
+        """Modifica un producto en memoria sin guardar ni mostrar mensajes."""
+        self._recordar_estado(id_producto)
         producto = self.productos[id_producto]
         if nueva_cantidad is not None:
             producto.cantidad = nueva_cantidad
         if nuevo_precio is not None:
             producto.precio = nuevo_precio
-        self._guardar_inventario()
-        print(f"✔️ Producto '{id_producto}' actualizado exitosamente.")
-        return True
+        # Con un diccionario no cambia nada; con SQLite escribe la fila.
+        self.productos[id_producto] = producto
 
     def eliminar_producto(self, id_producto):
         """Elimina un producto del inventario y guarda los cambios."""
-        if id_producto in self.productos:
+        with self._operacion():
+            if id_producto not in self.productos:
+                print(f"❌ Error: No se encontró un producto con ID '{id_producto}'.")
+                return False
+            self._recordar_estado(id_producto)
             del self.productos[id_producto]
-            self._guardar_inventario()
-            print(f"✔️ Producto con ID '{id_producto}' eliminado exitosamente.")
-            return True
-        else:
-            print(f"❌ Error: No se encontró un producto con ID '{id_producto}'.")
-            return False
+            self._persistir()
+        print(f"✔️ Producto con ID '{id_producto}' eliminado exitosamente.")
+        return True
+
+    def agregar_productos(self, productos):
+        """
+        Agrega varios productos de una vez (por ejemplo, una entrega de un proveedor).
+        Valida todos antes de aplicar ninguno y guarda el archivo una sola vez.
+        """
+        lote = list(productos)
+        with self.transaccion():
+            vistos = set()
+            for producto in lote:
+                if producto.id_producto in self.productos or producto.id_producto in vistos:
+                    print(f"❌ Error: El ID '{producto.id_producto}' está repetido. No se agregó ningún producto.")
+                    return False
+                if producto.cantidad < 0 or producto.precio < 0:
+                    print(f"❌ Error: El producto '{producto.id_producto}' tiene cantidad o precio negativo. "
+                          "No se agregó ningún producto.")
+                    return False
+                vistos.add(producto.id_producto)
+
+            for producto in lote:
+                self._recordar_estado(producto.id_producto)
+                self.productos[producto.id_producto] = producto
+                self._persistir()
+        print(f"✔️ {len(lote)} productos agregados exitosamente.")
+        return True
+
+    def actualizar_productos(self, cambios):
+        """
+        Actualiza varios productos de una vez.
+        'cambios' es un diccionario {id_producto: (nueva_cantidad, nuevo_precio)};
+        cualquiera de los dos valores puede ser None para no cambiarlo.
+        """
+        with self.transaccion():
+            for id_producto, (nueva_cantidad, nuevo_precio) in cambios.items():
+                if id_producto not in self.productos:
+                    print(f"❌ Error: No se encontró un producto con ID '{id_producto}'. "
+                          "No se actualizó ningún producto.")
+                    return False
+                if (nueva_cantidad is not None and nueva_cantidad < 0) or \
+                   (nuevo_precio is not None and nuevo_precio < 0):
+                    print(f"❌ Error: El producto '{id_producto}' tiene cantidad o precio negativo. "
+                          "No se actualizó ningún producto.")
+                    return False
+
+            for id_producto, (nueva_cantidad, nuevo_precio) in cambios.items():
+                self._actualizar(id_producto, nueva_cantidad, nuevo_precio)
+                self._persistir()
+        print(f"✔️ {len(cambios)} productos actualizados exitosamente.")
+        return True
 
     def buscar_producto(self, id_producto):
         """Busca y devuelve un producto por su ID."""
@@ -125,11 +603,19 @@ class Inventario:
             print(producto)
         print("------------------------\n")
 
-def menu_principal():
-    """Función para mostrar el menú y manejar la interacción con el usuario."""
-    inventario = Inventario()
+def menu_principal(nombre_archivo='inventario.txt'):
+    """
+    Función para mostrar el menú y manejar la interacción con el usuario.
+    Si 'nombre_archivo' termina en .db, el inventario se guarda en SQLite.
+    """
+    if nombre_archivo.endswith('.db'):
+        inventario = Inventario(almacenamiento=AlmacenamientoSQLite(nombre_archivo))
+    else:
+        inventario = Inventario(nombre_archivo)
     
     while True:
+        # Otro proceso puede haber modificado el inventario mientras se esperaba al usuario.
+        inventario.sincronizar()
         print("\n--- SISTEMA DE GESTIÓN DE INVENTARIOS ---")
         print("1. Añadir nuevo producto")
         print("2. Actualizar producto")
@@ -193,6 +679,7 @@ def menu_principal():
             inventario.mostrar_inventario()
             
         elif opcion == '6':
+            inventario.almacenamiento.cerrar()
             print("Saliendo del sistema...")
             break
             
@@ -200,4 +687,5 @@ def menu_principal():
             print("❌ Opción no válida. Por favor, intente de nuevo.")
 
 if __name__ == "__main__":
-    menu_principal()
+    # Uso: python "Sistema de Gestión de Inventarios con Archivos y Excepciones.py" [inventario.txt | inventario.db]
+    menu_principal(sys.argv[1] if len(sys.argv) > 1 else 'inventario.txt')
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+#
+# Pruebas de la lógica de la agenda ('Creación de una Aplicación de Agenda Personal.py'):
+# el almacén de eventos, las repeticiones y el almacenamiento, sin abrir ventanas.
+#
+# Uso:
+#     python -m unittest test_agenda
+
+import contextlib
+import datetime
+import heapq
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_modulo(nombre, archivo):
+    """Carga uno de los programas del proyecto como módulo (sus nombres tienen espacios)."""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+agenda = cargar_modulo("agenda", "Creación de una Aplicación de Agenda Personal.py")
+AgendaStorage = agenda.AgendaStorage
+EventStore = agenda.EventStore
+MergedRange = agenda.MergedRange
+RecurrenceRule = agenda.RecurrenceRule
+ReminderScheduler = agenda.ReminderScheduler
+
+POR_FECHA = agenda.AgendaApp.SORT_KEYS["Fecha"]
+
+
+class PruebaEventStore(unittest.TestCase):
+    """El índice del almacén mantiene los eventos por fecha y hora; los tramos lo reflejan sin copiarlo."""
+
+    def setUp(self):
+        self.store = EventStore()
+        self.eventos = [self.store.add(fecha, hora, f"{fecha} {hora}")
+                        for fecha, hora in (("2024-05-17", "10:00"), ("2024-05-02", "18:00"),
+                                            ("2024-06-01", "09:00"), ("2024-05-17", "08:30"),
+                                            ("2023-12-31", "23:59"))]
+
+    def fechas(self, eventos):
+        return [(e["date"], e["time"]) for e in eventos]
+
+    def test_orden_y_consultas(self):
+        self.assertEqual(self.fechas(self.store), sorted(self.fechas(self.eventos)))
+        self.assertEqual(self.fechas(self.store.on("2024-05-17")),
+                         [("2024-05-17", "08:30"), ("2024-05-17", "10:00")])
+        self.assertEqual(len(self.store.between("2024-05-02", "2024-05-17")), 3)
+        self.assertEqual(len(self.store.with_prefix("2024-05")), 3)
+        self.assertEqual(len(self.store.with_prefix("2024")), 4)
+        self.assertEqual(len(self.store.with_prefix("")), 5)
+
+    def test_tramo_invertido(self):
+        tramo = self.store.with_prefix("2024", reverse=True)
+        esperado = sorted(self.fechas(self.eventos)[:4], reverse=True)
+        self.assertEqual(self.fechas(tramo), esperado)
+        self.assertEqual(self.fechas(tramo[1:3]), esperado[1:3])
+        self.assertEqual((tramo[0]["date"], tramo[-1]["date"]), ("2024-06-01", "2024-05-02"))
+        for posicion, evento in enumerate(tramo):
+            self.assertEqual(tramo.index(evento), posicion)
+
+    def test_tramo_vivo(self):
+        tramo = self.store.with_prefix("2024-05")
+        nuevo = self.store.add("2024-05-10", "12:00", "nuevo")
+        self.assertEqual(tramo.index(nuevo), 1)
+        self.assertIs(self.store.delete(self.eventos[1]["id"]), self.eventos[1])
+        self.assertEqual(len(tramo), 3)
+        self.assertIsNone(self.store.delete(self.eventos[1]["id"]))
+        with self.assertRaises(ValueError):
+            tramo.index(self.eventos[2])
+
+    def test_carga_sin_repetir_ids(self):
+        store = EventStore(first_id=10)
+        store.load([(3, "2024-01-02", "10:00", "b"), (1, "2024-01-01", "10:00", "a")])
+        store.load([(1, "2024-01-01", "10:00", "a")])
+        self.assertEqual([e["id"] for e in store], [1, 3])
+        self.assertEqual(store.add("2024-01-03", "10:00", "c")["id"], 10)
+
+
+class PruebaRepeticiones(unittest.TestCase):
+    """Las repeticiones se generan solo dentro de la ventana pedida, sin pasar del año 9999."""
+
+    def test_ventana_vacia(self):
+        # Es la ventana que da filter_window para '2024-13' o '2024-02-30'.
+        regla = RecurrenceRule(0, "2024-01-15", "10:00", "Revisión", "monthly", until="2030-01-01")
+        self.assertEqual(list(regla.occurrences(datetime.date.max, datetime.date.min)), [])
+
+    def test_ventana_al_final_del_calendario(self):
+        regla = RecurrenceRule(0, "2024-01-15", "10:00", "Revisión", "monthly", count=10 ** 6)
+        fechas = [e["date"] for e in regla.occurrences(datetime.date(9999, 12, 1))]
+        self.assertEqual(fechas, ["9999-12-15"])
+        self.assertEqual(list(regla.occurrences(datetime.date(9999, 12, 16))), [])
+
+    def test_mes_corto(self):
+        regla = RecurrenceRule(0, "2024-01-31", "09:00", "Cierre", "monthly", count=4)
+        fechas = [e["date"] for e in regla.occurrences(datetime.date(2024, 2, 1), datetime.date(2024, 4, 30))]
+        self.assertEqual(fechas, ["2024-02-29", "2024-03-31", "2024-04-30"])
+
+
+class PruebaMergedRange(unittest.TestCase):
+    """MergedRange se comporta como la mezcla ordenada del tramo y las repeticiones, sin copiarla."""
+
+    def setUp(self):
+        self.store = EventStore()
+        for dia in range(1, 29, 3):
+            for hora in ("09:00", "10:00", "18:30"):
+                self.store.add(f"2024-02-{dia:02d}", hora, f"evento {dia} {hora}")
+        self.store.add("2024-03-01", "10:00", "fuera del filtro")
+        self.store.add_rule("2024-01-31", "10:00", "Diario", "daily", count=40)
+        self.store.add_rule("2024-02-05", "08:00", "Semanal", "weekly", until="2024-12-31")
+        inicio, fin = datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)
+        self.repeticiones = list(self.store.occurrences(inicio, fin))
+
+    def mezcla(self, reverse):
+        esperado = list(heapq.merge(self.store.with_prefix("2024-02"), self.repeticiones, key=POR_FECHA))
+        if reverse:
+            esperado.reverse()
+        vista = MergedRange(self.store.with_prefix("2024-02", reverse=reverse), self.repeticiones)
+        return vista, esperado
+
+    def test_posiciones(self):
+        for reverse in (False, True):
+            with self.subTest(reverse=reverse):
+                vista, esperado = self.mezcla(reverse)
+                self.assertEqual(len(vista), len(esperado))
+                self.assertEqual(list(vista), esperado)
+                for posicion in (0, 1, len(esperado) - 1, -1, -len(esperado)):
+                    self.assertIs(vista[posicion], esperado[posicion])
+                with self.assertRaises(IndexError):
+                    vista[len(esperado)]
+
+    def test_rebanadas(self):
+        for reverse in (False, True):
+            vista, esperado = self.mezcla(reverse)
+            n = len(esperado)
+            for inicio, fin in ((0, 20), (5, 25), (n - 7, n + 5), (-10, -2), (30, 10), (0, n)):
+                with self.subTest(reverse=reverse, inicio=inicio, fin=fin):
+                    self.assertEqual(vista[inicio:fin], esperado[inicio:fin])
+
+    def test_index(self):
+        for reverse in (False, True):
+            vista, esperado = self.mezcla(reverse)
+            for posicion, evento in enumerate(esperado):
+                if "rule" not in evento:
+                    with self.subTest(reverse=reverse, posicion=posicion):
+                        self.assertEqual(vista.index(evento), posicion)
+            with self.assertRaises(ValueError):
+                vista.index(self.store.on("2024-03-01")[0])
+
+    def test_a_igual_hora_primero_el_tramo(self):
+        vista, _ = self.mezcla(False)
+        dia = [e for e in vista if e["date"] == "2024-02-04" and e["time"] == "10:00"]
+        self.assertEqual([("rule" in e) for e in dia], [False, True])
+
+    def test_refleja_eventos_nuevos(self):
+        for reverse in (False, True):
+            vista, _ = self.mezcla(reverse)
+            evento = self.store.add("2024-02-10", "10:00", f"nuevo {reverse}")
+            _, esperado = self.mezcla(reverse)
+            self.assertEqual(vista[:], esperado)
+            self.assertIs(vista[vista.index(evento)], evento)
+
+
+class Reloj:
+    """Sustituye a root.after/after_cancel y a datetime.now(): el tiempo solo avanza al pedirlo."""
+
+    def __init__(self, ahora):
+        self.ahora = ahora
+        self.temporizadores = {}
+        self.numero = 0
+
+    def after(self, ms, funcion):
+        self.numero += 1
+        self.temporizadores[self.numero] = (self.ahora + datetime.timedelta(milliseconds=ms), funcion)
+        return self.numero
+
+    def after_cancel(self, numero):
+        del self.temporizadores[numero]
+
+    def avanzar_hasta(self, momento):
+        """Ejecuta, en orden, los temporizadores que vencen hasta 'momento'."""
+        while self.temporizadores:
+            numero, (cuando, funcion) = min(self.temporizadores.items(), key=lambda t: t[1][0])
+            if cuando > momento:
+                break
+            del self.temporizadores[numero]
+            self.ahora = max(self.ahora, cuando)
+            funcion()
+        self.ahora = momento
+
+
+class PruebaReminderScheduler(unittest.TestCase):
+    """Un solo temporizador armado, para el primer aviso; los quitados no avisan y las reglas encadenan."""
+
+    def setUp(self):
+        self.reloj = Reloj(datetime.datetime(2030, 1, 1, 8, 0))
+        reloj = self.reloj
+
+        class Ahora(datetime.datetime):
+            @classmethod
+            def now(cls):
+                return reloj.ahora
+
+        falso = types.SimpleNamespace(datetime=Ahora, date=datetime.date, timedelta=datetime.timedelta)
+        parche = mock.patch.object(agenda, "datetime", falso)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.avisos = []
+        self.planificador = ReminderScheduler(self.reloj,
+                                              lambda e: self.avisos.append((self.reloj.ahora, e["id"])))
+
+    @staticmethod
+    def evento(event_id, fecha, hora):
+        return {"id": event_id, "date": fecha, "time": hora, "desc": str(event_id)}
+
+    def test_avisa_en_orden(self):
+        self.planificador.load([self.evento(1, "2030-01-01", "12:00"), self.evento(2, "2030-01-01", "09:00"),
+                                self.evento(3, "2029-12-31", "10:00"), self.evento(4, "2030-01-01", "sin hora")])
+        self.planificador.add(self.evento(5, "2030-01-01", "10:30"))
+        self.assertEqual(len(self.reloj.temporizadores), 1)
+        self.planificador.discard(1)
+        self.reloj.avanzar_hasta(datetime.datetime(2030, 1, 2))
+        self.assertEqual([i for _, i in self.avisos], [2, 5])
+        self.assertEqual(self.avisos[0][0], datetime.datetime(2030, 1, 1, 9, 0, 0, 1000))
+        self.assertEqual(self.reloj.temporizadores, {})
+
+    def test_repeticiones_encadenadas(self):
+        regla = RecurrenceRule(7, "2029-12-30", "09:30", "Diario", "daily", count=5)
+        self.planificador.load([], [regla])
+        self.reloj.avanzar_hasta(datetime.datetime(2030, 2, 1))
+        self.assertEqual([i[2] for _, i in self.avisos], ["2030-01-01", "2030-01-02", "2030-01-03"])
+        self.planificador.add_rule(RecurrenceRule(8, "2030-02-01", "10:00", "Semanal", "weekly", count=3))
+        self.planificador.discard(("rule", 8))
+        self.reloj.avanzar_hasta(datetime.datetime(2030, 3, 1))
+        self.assertEqual(len(self.avisos), 3)
+
+    def test_espera_limitada(self):
+        self.planificador.add(self.evento(1, "2031-01-01", "10:00"))
+        (cuando, _), = self.reloj.temporizadores.values()
+        self.assertEqual(cuando - self.reloj.ahora, datetime.timedelta(days=1))
+        self.reloj.avanzar_hasta(datetime.datetime(2031, 1, 2))
+        self.assertEqual([i for _, i in self.avisos], [1])
+
+
+class PruebaAgendaStorage(unittest.TestCase):
+    """El hilo de almacenamiento guarda en orden y, si termina, las llamadas fallan en lugar de esperar."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "agenda.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_guarda_y_recupera(self):
+        storage = AgendaStorage(self.ruta)
+        store = EventStore(first_id=storage.next_id(), first_rule_id=storage.next_rule_id())
+        for fecha in ("2024-05-01", "2024-06-01", "2024-05-20"):
+            storage.add(store.add(fecha, "10:00", fecha))
+        storage.delete([0])
+        storage.add_rule(store.add_rule("2024-05-01", "08:00", "Diario", "daily", count=3))
+        storage.close()
+
+        storage = AgendaStorage(self.ruta)
+        self.assertEqual(sorted(storage.load_prefix("2024-05")), [(2, "2024-05-20", "10:00", "2024-05-20")])
+        self.assertEqual(sorted(fila[0] for fila in storage.load_from("2024-05-15")), [1, 2])
+        self.assertEqual(storage.load_rules(), [(0, "2024-05-01", "08:00", "Diario", "daily", 1, None, 3)])
+        # Los ids borrados no se reutilizan.
+        self.assertEqual((storage.next_id(), storage.next_rule_id()), (3, 1))
+        storage.close()
+
+    def test_error_en_una_operacion(self):
+        storage = AgendaStorage(self.ruta)
+        with self.assertRaises(ZeroDivisionError):
+            storage._submit(lambda conexion: 1 / 0, wait=True)
+        self.assertEqual(storage.load_rules(), [])
+        storage.close()
+
+    def test_tras_cerrar(self):
+        storage = AgendaStorage(self.ruta)
+        storage.close()
+        with self.assertRaises(RuntimeError):
+            storage.load_rules()
+
+    def test_no_se_puede_abrir(self):
+        # La ruta es un directorio: la conexión falla en el hilo y las lecturas no se quedan esperando.
+        storage = AgendaStorage(self.directorio)
+        with self.assertRaises(agenda.sqlite3.Error):
+            storage.load_rules()
+        with contextlib.redirect_stdout(io.StringIO()) as salida:
+            storage.add({"id": 0, "date": "2024-05-01", "time": "10:00", "desc": "x"})
+        self.assertIn("Error al guardar la agenda", salida.getvalue())
+        storage.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+#
+# Pruebas de la Biblioteca Digital ('Sistema de Gestión de Biblioteca Digital.py').
+#
+# Uso:
+#     python -m unittest test_biblioteca
+
+import asyncio
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_modulo(nombre, archivo):
+    """Carga uno de los programas del proyecto como módulo (sus nombres tienen espacios)."""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+biblioteca_digital = cargar_modulo("biblioteca", "Sistema de Gestión de Biblioteca Digital.py")
+Biblioteca = biblioteca_digital.Biblioteca
+Libro = biblioteca_digital.Libro
+Usuario = biblioteca_digital.Usuario
+
+
+class PruebaCorteAlCompactar(unittest.TestCase):
+    """Un corte entre reemplazar la instantánea y vaciar el diario no debe aplicar el diario dos veces."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "biblioteca.db")
+        self.salida = contextlib.redirect_stdout(io.StringIO())
+        self.salida.__enter__()
+
+    def tearDown(self):
+        self.salida.__exit__(None, None, None)
+        shutil.rmtree(self.directorio)
+
+    def abrir(self):
+        return Biblioteca(biblioteca_digital.AlmacenamientoBiblioteca(self.ruta))
+
+    def compactar_con_corte(self, biblioteca):
+        """Compacta y deja el diario como estaba antes, como si el programa se hubiera cortado."""
+        almacenamiento = biblioteca.almacenamiento
+        almacenamiento.cerrar()
+        with open(almacenamiento.archivo_diario, 'rb') as f:
+            diario = f.read()
+        almacenamiento.compactar(biblioteca)
+        almacenamiento.cerrar()
+        with open(almacenamiento.archivo_diario, 'wb') as f:
+            f.write(diario)
+
+    def test_no_duplica_ejemplares(self):
+        biblioteca = self.abrir()
+        biblioteca.anadir_libro(Libro("Rayuela", "Julio Cortázar", "Novela", "1"), 2)
+        biblioteca.compactar()
+        biblioteca.anadir_ejemplares("1", 3)
+        self.assertEqual(biblioteca.ejemplares("1"), 5)
+        self.compactar_con_corte(biblioteca)
+
+        biblioteca = self.abrir()
+        self.assertEqual(biblioteca.ejemplares("1"), 5)
+        self.assertEqual(biblioteca.disponibles("1"), 5)
+        biblioteca.almacenamiento.cerrar()
+
+    def test_no_repite_devoluciones(self):
+        biblioteca = self.abrir()
+        biblioteca.anadir_libro(Libro("Rayuela", "Julio Cortázar", "Novela", "1"))
+        biblioteca.registrar_usuario(Usuario("Ana", "ana"))
+        biblioteca.prestar_libro("ana", "1")
+        biblioteca.compactar()
+        biblioteca.devolver_libro("ana", "1")
+        self.compactar_con_corte(biblioteca)
+
+        biblioteca = self.abrir()
+        self.assertEqual(biblioteca.quien_tiene("1"), [])
+        # Los cambios posteriores al corte se guardan y se recuperan.
+        biblioteca.prestar_libro("ana", "1")
+        biblioteca.almacenamiento.cerrar()
+        biblioteca = self.abrir()
+        self.assertEqual([u.user_id for u in biblioteca.quien_tiene("1")], ["ana"])
+        self.assertEqual(biblioteca.disponibles("1"), 0)
+        biblioteca.almacenamiento.cerrar()
+
+
+class PruebaImportacionInterrumpida(unittest.TestCase):
+    """Si la importación se corta a medias, los libros ya importados también quedan en disco."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "biblioteca.db")
+        self.archivo = os.path.join(self.directorio, "libros.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def abrir(self):
+        return Biblioteca(biblioteca_digital.AlmacenamientoBiblioteca(self.ruta), silenciosa=True)
+
+    def test_error_de_codificacion(self):
+        with open(self.archivo, 'wb') as f:
+            for i in range(3000):
+                f.write(f"Título {i},Autor {i},Novela,{i:013d}\n".encode('utf-8'))
+            f.write(b"T\xedtulo roto,Autor,Novela,9999999999999\n")
+        biblioteca = self.abrir()
+        with self.assertRaises(UnicodeDecodeError):
+            biblioteca.importar_libros(self.archivo, tamano_lote=100, verificar_control=False)
+        en_memoria = set(biblioteca._catalogo)
+        self.assertTrue(en_memoria)
+        biblioteca.almacenamiento.cerrar()
+
+        biblioteca = self.abrir()
+        self.assertEqual(set(biblioteca._catalogo), en_memoria)
+        biblioteca.almacenamiento.cerrar()
+
+
+class PruebaBusquedaPorRelevancia(unittest.TestCase):
+    """Las erratas de la consulta se toleran según la palabra buscada, también hacia palabras cortas."""
+
+    def setUp(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.biblioteca = Biblioteca()
+            self.biblioteca.anadir_libro(Libro("Guerra y paz", "León Tolstói", "Novela", "1"))
+            self.biblioteca.anadir_libro(Libro("El sol de Breda", "Arturo Pérez-Reverte", "Novela", "2"))
+
+    def isbns(self, consulta):
+        return [libro.isbn for libro, _ in self.biblioteca.buscar_por_relevancia(consulta)]
+
+    def test_errata_hacia_palabra_corta(self):
+        self.assertEqual(self.isbns("pazz"), ["1"])
+        self.assertEqual(self.isbns("sil"), ["2"])
+
+    def test_palabra_corta_nueva_invalida_la_cache(self):
+        self.assertEqual(self.isbns("mat"), [])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.biblioteca.anadir_libro(Libro("El mar", "John Banville", "Novela", "3"))
+        self.assertEqual(self.isbns("mat"), ["3"])
+        self.assertEqual(self.isbns("mar"), ["3"])
+
+
+class PruebaPlanificadorVencimientos(unittest.TestCase):
+    """Un error al revisar o al avisar de un vencimiento no detiene el planificador del servidor."""
+
+    def setUp(self):
+        self.servidor_biblioteca = cargar_modulo("servidor_biblioteca", "Servidor de la Biblioteca.py")
+        modulo = self.servidor_biblioteca.biblioteca_digital
+        self.biblioteca = modulo.Biblioteca(silenciosa=True)
+        self.biblioteca.registrar_usuario(modulo.Usuario("Ana", "ana"))
+        for isbn in ("1", "2", "3"):
+            self.biblioteca.anadir_libro(modulo.Libro(f"Libro {isbn}", "Autor", "Novela", isbn))
+        self.avisados = []
+
+    def al_vencer(self, prestamo):
+        if prestamo.isbn == "1":
+            raise RuntimeError("aviso fallido")
+        self.avisados.append(prestamo.isbn)
+
+    async def esperar_avisos(self, cuantos):
+        while len(self.avisados) < cuantos:
+            await asyncio.sleep(0.01)
+
+    async def planificar(self, servidor):
+        servidor._prestamos_cambiados = asyncio.Event()
+        planificador = asyncio.create_task(servidor.planificar_vencimientos())
+        bucle = asyncio.get_running_loop()
+        try:
+            # Préstamos de cero días: vencen en cuanto se hacen.
+            await bucle.run_in_executor(servidor._hilo, self.biblioteca.prestar_libro, "ana", "1", 0)
+            await bucle.run_in_executor(servidor._hilo, self.biblioteca.prestar_libro, "ana", "2", 0)
+            servidor._prestamos_cambiados.set()
+            await asyncio.wait_for(self.esperar_avisos(1), 5)
+            await bucle.run_in_executor(servidor._hilo, self.biblioteca.prestar_libro, "ana", "3", 0)
+            servidor._prestamos_cambiados.set()
+            await asyncio.wait_for(self.esperar_avisos(2), 5)
+            self.assertFalse(planificador.done())
+        finally:
+            planificador.cancel()
+
+    def ejecutar(self, servidor):
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as salida:
+                asyncio.run(self.planificar(servidor))
+        finally:
+            servidor.cerrar()
+        return salida.getvalue()
+
+    def test_aviso_que_falla(self):
+        servidor = self.servidor_biblioteca.ServidorBiblioteca(self.biblioteca, self.al_vencer)
+        salida = self.ejecutar(servidor)
+        self.assertEqual(self.avisados, ["2", "3"])
+        self.assertIn("RuntimeError: aviso fallido", salida)
+
+    def test_revision_que_falla(self):
+        servidor = self.servidor_biblioteca.ServidorBiblioteca(self.biblioteca, self.al_vencer)
+        revisar, fallos = servidor._revisar_vencimientos, []
+
+        def revisar_con_fallo():
+            if not fallos:
+                fallos.append(1)
+                raise OSError("disco no disponible")
+            return revisar()
+
+        servidor._revisar_vencimientos = revisar_con_fallo
+        salida = self.ejecutar(servidor)
+        self.assertEqual(self.avisados, ["2", "3"])
+        self.assertIn("OSError: disco no disponible", salida)
+
+
+
+class PruebaBuscarLibros(unittest.TestCase):
+    """Los índices de búsqueda dan lo mismo que recorrer el catálogo y se mantienen con cada cambio."""
+
+    def setUp(self):
+        self.biblioteca = Biblioteca(silenciosa=True)
+        for libro in (Libro("Cien años de soledad", "Gabriel García Márquez", "Novela", "1"),
+                      Libro("El amor en los tiempos del cólera", "Gabriel García Márquez", "Novela", "2"),
+                      Libro("Rayuela", "Julio Cortázar", "Novela", "3"),
+                      Libro("Ficciones", "Jorge Luis Borges", "Cuentos", "4")):
+            self.biblioteca.anadir_libro(libro)
+
+    def isbns(self, **criterios):
+        return [libro.isbn for libro in self.biblioteca.buscar_libros(**criterios)]
+
+    def test_criterios(self):
+        self.assertEqual(self.isbns(autor="márquez"), ["1", "2"])
+        self.assertEqual(self.isbns(titulo="EL", autor="gabriel"), ["2"])
+        self.assertEqual(self.isbns(titulo="a", categoria="novela"), ["1", "2", "3"])
+        self.assertEqual(self.isbns(categoria="Nove"), [])
+        self.assertEqual([l.isbn for l in self.biblioteca.buscar_libro("Categoria", "cuentos")], ["4"])
+        self.assertEqual(self.biblioteca.buscar_libro("isbn", "1"), [])
+
+    def test_incluye_prestados_y_sigue_los_cambios(self):
+        self.assertEqual(self.isbns(titulo="ray"), ["3"])
+        self.biblioteca.registrar_usuario(Usuario("Ana", "ana"))
+        self.biblioteca.prestar_libro("ana", "3")
+        self.assertEqual(self.isbns(titulo="ray"), ["3"])
+        self.biblioteca.anadir_libro(Libro("Rayos y truenos", "Anónimo", "Poesía", "5"))
+        self.assertEqual(self.isbns(titulo="ray"), ["3", "5"])
+        self.biblioteca.quitar_libro("5")
+        self.assertEqual(self.isbns(titulo="ray"), ["3"])
+        self.assertEqual(self.isbns(categoria="poesía"), [])
+
+
+
+class PruebaPrestamos(unittest.TestCase):
+    """El registro central de préstamos coincide con lo que tiene cada usuario."""
+
+    def setUp(self):
+        self.biblioteca = Biblioteca(silenciosa=True)
+        self.biblioteca.anadir_libro(Libro("Rayuela", "Julio Cortázar", "Novela", "1"))
+        self.biblioteca.anadir_libro(Libro("Ficciones", "Jorge Luis Borges", "Cuentos", "2"))
+        self.biblioteca.registrar_usuario(Usuario("Ana", "ana"))
+
+    def test_prestar_y_devolver(self):
+        self.assertTrue(self.biblioteca.prestar_libro("ana", "1"))
+        self.assertEqual([u.user_id for u in self.biblioteca.quien_tiene("1")], ["ana"])
+        self.assertEqual([l.isbn for l in self.biblioteca.listar_libros_prestados("ana")], ["1"])
+        self.assertNotIn("1", self.biblioteca.libros_disponibles)
+        self.assertFalse(self.biblioteca.prestar_libro("ana", "1"))
+        self.assertFalse(self.biblioteca.quitar_libro("1"))
+
+        self.assertTrue(self.biblioteca.devolver_libro("ana", "1"))
+        self.assertFalse(self.biblioteca.devolver_libro("ana", "1"))
+        self.assertEqual(self.biblioteca.quien_tiene("1"), [])
+        self.assertEqual(self.biblioteca.prestamos, {})
+        self.assertIn("1", self.biblioteca.libros_disponibles)
+
+    def test_baja_con_prestamos(self):
+        self.biblioteca.prestar_libro("ana", "1")
+        self.assertTrue(self.biblioteca.dar_de_baja_usuario("ana"))
+        self.assertEqual(self.biblioteca.prestamos, {})
+        # Era el único ejemplar: el título sale del catálogo.
+        self.assertEqual(self.biblioteca.buscar_libro("titulo", "rayuela"), [])
+        self.assertEqual(self.biblioteca.ejemplares("2"), 1)
+
+
+
+class PruebaEjemplaresYReservas(unittest.TestCase):
+    """Cada ejemplar que vuelve o se añade se presta al primero de la lista de espera."""
+
+    def setUp(self):
+        self.biblioteca = Biblioteca(silenciosa=True)
+        self.biblioteca.anadir_libro(Libro("Rayuela", "Julio Cortázar", "Novela", "1"), ejemplares=2)
+        for user_id in ("ana", "luis", "eva", "juan"):
+            self.biblioteca.registrar_usuario(Usuario(user_id.capitalize(), user_id))
+
+    def test_contadores(self):
+        self.assertFalse(self.biblioteca.anadir_libro(Libro("Otro", "Autor", "Novela", "2"), ejemplares=0))
+        self.biblioteca.prestar_libro("ana", "1")
+        self.assertEqual((self.biblioteca.disponibles("1"), self.biblioteca.ejemplares("1")), (1, 2))
+        self.assertIn("1", self.biblioteca.libros_disponibles)
+        self.assertFalse(self.biblioteca.reservar_libro("luis", "1"))
+        self.biblioteca.prestar_libro("luis", "1")
+        self.assertEqual(self.biblioteca.disponibles("1"), 0)
+        self.assertNotIn("1", self.biblioteca.libros_disponibles)
+        self.assertEqual(self.biblioteca.disponibles("no existe"), 0)
+
+    def test_lista_de_espera(self):
+        self.biblioteca.prestar_libro("ana", "1")
+        self.biblioteca.prestar_libro("luis", "1")
+        self.assertFalse(self.biblioteca.prestar_libro("eva", "1"))
+        self.assertTrue(self.biblioteca.reservar_libro("eva", "1"))
+        self.assertTrue(self.biblioteca.reservar_libro("juan", "1"))
+        self.assertFalse(self.biblioteca.reservar_libro("eva", "1"))
+        self.assertFalse(self.biblioteca.reservar_libro("ana", "1"))
+        self.assertEqual(self.biblioteca.lista_espera("1"), ["eva", "juan"])
+
+        self.biblioteca.devolver_libro("ana", "1")
+        self.assertEqual(sorted(u.user_id for u in self.biblioteca.quien_tiene("1")), ["eva", "luis"])
+        self.assertEqual(self.biblioteca.lista_espera("1"), ["juan"])
+        self.assertEqual(self.biblioteca.disponibles("1"), 0)
+
+        self.biblioteca.anadir_ejemplares("1", 2)
+        self.assertEqual(self.biblioteca.lista_espera("1"), [])
+        self.assertEqual((self.biblioteca.disponibles("1"), self.biblioteca.ejemplares("1")), (1, 4))
+        self.assertIn("juan", [u.user_id for u in self.biblioteca.quien_tiene("1")])
+
+    def test_baja_en_lista_de_espera(self):
+        self.biblioteca.prestar_libro("ana", "1")
+        self.biblioteca.prestar_libro("luis", "1")
+        self.biblioteca.reservar_libro("eva", "1")
+        self.biblioteca.reservar_libro("juan", "1")
+        self.biblioteca.dar_de_baja_usuario("eva")
+        self.assertEqual(self.biblioteca.lista_espera("1"), ["juan"])
+        # El ejemplar de Ana se da por perdido al darla de baja; el de Luis vuelve y es para Juan.
+        self.biblioteca.dar_de_baja_usuario("ana")
+        self.assertEqual(self.biblioteca.ejemplares("1"), 1)
+        self.biblioteca.devolver_libro("luis", "1")
+        self.assertEqual([u.user_id for u in self.biblioteca.quien_tiene("1")], ["juan"])
+
+
+
+class PruebaVencimientos(unittest.TestCase):
+    """Los vencidos salen del montículo en orden y cada uno se avisa una sola vez."""
+
+    def setUp(self):
+        self.biblioteca = Biblioteca(silenciosa=True)
+        self.biblioteca.registrar_usuario(Usuario("Ana", "ana"))
+        for isbn in ("1", "2", "3"):
+            self.biblioteca.anadir_libro(Libro(f"Libro {isbn}", "Autor", "Novela", isbn))
+        # Vencen a los 3, 1 y 2 días.
+        for isbn, dias in (("1", 3), ("2", 1), ("3", 2)):
+            self.biblioteca.prestar_libro("ana", isbn, dias)
+        self.ahora = self.biblioteca.prestamos["1"]["ana"].prestado
+        self.vence = {isbn: self.biblioteca.prestamos[isbn]["ana"].vence for isbn in ("1", "2", "3")}
+
+    def dias(self, dias):
+        return self.ahora + dias * 86400
+
+    def test_vencidos_y_avisos(self):
+        self.assertEqual(self.biblioteca.proximo_vencimiento(), self.vence["2"])
+        self.assertEqual([p.isbn for p in self.biblioteca.vencen_pronto(60, self.ahora)], ["2", "3"])
+        self.assertEqual([p.isbn for p in self.biblioteca.vencidos(self.dias(2.5))], ["2", "3"])
+        self.assertEqual([p.isbn for p in self.biblioteca.avisos_pendientes(self.dias(2.5))], ["2", "3"])
+        self.assertEqual(self.biblioteca.avisos_pendientes(self.dias(2.5)), [])
+        self.assertEqual(self.biblioteca.proximo_vencimiento(), self.vence["1"])
+        # Una consulta con un 'ahora' anterior sigue viendo los que ya salieron del montículo.
+        self.assertEqual([p.isbn for p in self.biblioteca.vencen_pronto(60, self.ahora)], ["2", "3"])
+
+    def test_devoluciones(self):
+        self.biblioteca.devolver_libro("ana", "2")
+        self.assertEqual(self.biblioteca.proximo_vencimiento(), self.vence["3"])
+        self.biblioteca.vencidos(self.dias(2.5))
+        self.biblioteca.devolver_libro("ana", "3")
+        self.assertEqual(self.biblioteca.vencidos(self.dias(2.5)), [])
+        self.assertEqual(self.biblioteca.avisos_pendientes(self.dias(4)), [self.biblioteca.prestamos["1"]["ana"]])
+        self.assertEqual(self.biblioteca.prestamos["1"]["ana"].dias_de_retraso(self.dias(5)), 2)
+
+
+
+class PruebaModeloCompacto(unittest.TestCase):
+    """Libro y Usuario no tienen diccionario propio y comparten autores y categorías."""
+
+    def test_sin_diccionario(self):
+        libro = Libro("Rayuela", "Julio Cortázar", "Novela", "1")
+        usuario = Usuario("Ana", "ana")
+        for objeto in (libro, usuario):
+            self.assertFalse(hasattr(objeto, "__dict__"))
+            with self.assertRaises(AttributeError):
+                objeto.otro_atributo = 1
+        self.assertEqual(libro.titulo_autor, ("Rayuela", "Julio Cortázar"))
+
+    def test_autor_y_categoria_compartidos(self):
+        autor = "".join(["Julio ", "Cortázar"])
+        libros = [Libro("Rayuela", "Julio Cortázar", "Novela", "1"), Libro("Bestiario", autor, "Novela", "2")]
+        self.assertIs(libros[0].titulo_autor[1], libros[1].titulo_autor[1])
+        self.assertIs(libros[0].categoria, libros[1].categoria)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+#
+# Pruebas del inventario ('Producto e inventario.py').
+#
+# Uso:
+#     python -m unittest test_inventario
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_modulo(nombre, archivo):
+    """Carga uno de los programas del proyecto como módulo (sus nombres tienen espacios)."""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+producto_e_inventario = cargar_modulo("producto_e_inventario", "Producto e inventario.py")
+AnaliticaInventario = producto_e_inventario.AnaliticaInventario
+AlmacenamientoJSONL = producto_e_inventario.AlmacenamientoJSONL
+AlmacenamientoSQLite = producto_e_inventario.AlmacenamientoSQLite
+Inventario = producto_e_inventario.Inventario
+InventarioColumnar = producto_e_inventario.InventarioColumnar
+
+
+class PruebaConArchivos(unittest.TestCase):
+    """Base de las pruebas: un directorio temporal y sin los mensajes del inventario por pantalla."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.archivo = os.path.join(self.directorio, "inventario.json")
+        self.salida = contextlib.redirect_stdout(io.StringIO())
+        self.salida.__enter__()
+
+    def tearDown(self):
+        self.salida.__exit__(None, None, None)
+        shutil.rmtree(self.directorio)
+
+    def abrir(self, **opciones):
+        return Inventario(self.archivo, diario=True, **opciones)
+
+    @staticmethod
+    def cantidades(inventario):
+        return {pid: p.cantidad for pid, p in inventario.productos.items()}
+
+
+class PruebaDiario(PruebaConArchivos):
+    """Los cambios van al diario y se recuperan al volver a abrir, aunque el último quedara a medias."""
+
+    def test_recupera_el_diario(self):
+        inventario = self.abrir()
+        inventario.anadir_producto("a", "Arroz", 5, 1.5)
+        inventario.actualizar_producto("a", cantidad=7)
+        inventario.anadir_producto("b", "Pan", 1, 1.0)
+        inventario.eliminar_producto("b")
+        inventario.almacenamiento.cerrar()
+        self.assertFalse(os.path.exists(self.archivo))
+
+        self.assertEqual(self.cantidades(self.abrir()), {"a": 7})
+
+    def test_descarta_el_registro_cortado(self):
+        inventario = self.abrir()
+        inventario.anadir_producto("a", "Arroz", 5, 1.5)
+        inventario.almacenamiento.cerrar()
+        with open(self.archivo + ".diario", 'ab') as f:
+            f.write(b'{"op": "anadir", "id": "b", "nom')
+
+        inventario = self.abrir()
+        self.assertEqual(self.cantidades(inventario), {"a": 5})
+        # El diario se recortó: lo que se escribe después se puede leer.
+        inventario.anadir_producto("c", "Café", 2, 3.0)
+        inventario.almacenamiento.cerrar()
+        self.assertEqual(self.cantidades(self.abrir()), {"a": 5, "c": 2})
+
+    def test_compacta_al_llegar_al_umbral(self):
+        inventario = self.abrir(umbral_compactacion=3)
+        for i in range(3):
+            inventario.anadir_producto(f"p{i}", f"Producto {i}", i, 1.0)
+        inventario.almacenamiento.cerrar()
+        with open(self.archivo) as f:
+            self.assertEqual(sorted(json.load(f)), ["p0", "p1", "p2"])
+        self.assertFalse(os.path.exists(self.archivo + ".diario") and os.path.getsize(self.archivo + ".diario"))
+        self.assertEqual(self.cantidades(self.abrir()), {"p0": 0, "p1": 1, "p2": 2})
+
+
+class PruebaTransacciones(PruebaConArchivos):
+    """Una transacción se guarda entera al terminar o, si falla, no deja rastro ni en memoria ni en disco."""
+
+    def test_excepcion_deshace_todo(self):
+        inventario = self.abrir()
+        inventario.anadir_producto("a", "Arroz", 5, 1.5)
+        self.assertEqual(inventario.valor_total(), 7.5)
+        with self.assertRaises(RuntimeError):
+            with inventario.transaccion():
+                inventario.actualizar_producto("a", cantidad=1, nombre="Avena")
+                inventario.anadir_producto("b", "Pan", 1, 1.0)
+                inventario.eliminar_producto("a")
+                raise RuntimeError("corte")
+        self.assertEqual(self.cantidades(inventario), {"a": 5})
+        self.assertEqual(inventario.productos["a"].nombre, "Arroz")
+        self.assertEqual(inventario.valor_total(), 7.5)
+        inventario.almacenamiento.cerrar()
+        self.assertEqual(self.cantidades(self.abrir()), {"a": 5})
+
+    def test_una_sola_escritura(self):
+        inventario = self.abrir()
+        with inventario.transaccion():
+            inventario.anadir_producto("a", "Arroz", 5, 1.5)
+            inventario.actualizar_producto("a", cantidad=6)
+            self.assertFalse(os.path.exists(self.archivo + ".diario"))
+        inventario.almacenamiento.cerrar()
+        self.assertEqual(self.cantidades(self.abrir()), {"a": 6})
+
+    def test_lote_invalido_no_aplica_nada(self):
+        inventario = self.abrir()
+        inventario.anadir_producto("a", "Arroz", 5, 1.5)
+        self.assertFalse(inventario.anadir_productos([("b", "Pan", 1, 1.0), ("a", "Otro", 1, 1.0)]))
+        self.assertFalse(inventario.actualizar_productos({"a": (1, None), "z": (1, None)}))
+        self.assertEqual(self.cantidades(inventario), {"a": 5})
+
+
+class PruebaBusqueda(PruebaConArchivos):
+    """buscar_producto encuentra subcadenas sin distinguir mayúsculas ni tildes, ordenado y por páginas."""
+
+    NOMBRES = ["Café molido", "Cafetera", "Té verde", "Azúcar", "Descafeinado", "Leche", "Pan de molde"]
+
+    def setUp(self):
+        super().setUp()
+        self.inventario = self.abrir()
+        self.inventario.anadir_productos((f"p{i}", nombre, 1, 1.0) for i, nombre in enumerate(self.NOMBRES))
+
+    def nombres(self, consulta, **paginas):
+        return [p.nombre for p in self.inventario.buscar_producto(consulta, **paginas)]
+
+    def test_subcadenas(self):
+        self.assertEqual(self.nombres("CAFE"), ["Café molido", "Cafetera", "Descafeinado"])
+        self.assertEqual(self.nombres("azucar"), ["Azúcar"])
+        self.assertEqual(self.nombres("te"), ["Cafetera", "Té verde"])
+        self.assertEqual(self.nombres("mol"), ["Café molido", "Pan de molde"])
+        self.assertEqual(self.nombres("xyz"), [])
+
+    def test_paginas(self):
+        self.assertEqual(self.nombres("e", limite=2), ["Café molido", "Cafetera"])
+        self.assertEqual(self.nombres("e", limite=2, desplazamiento=2), ["Descafeinado", "Leche"])
+
+    def test_indice_al_dia(self):
+        self.assertEqual(self.nombres("leche"), ["Leche"])
+        self.inventario.actualizar_producto("p5", nombre="Leche de avena")
+        self.inventario.anadir_producto("p9", "Avena", 1, 1.0)
+        self.inventario.eliminar_producto("p0")
+        self.assertEqual(self.nombres("avena"), ["Avena", "Leche de avena"])
+        self.assertEqual(self.nombres("cafe"), ["Cafetera", "Descafeinado"])
+
+
+class PruebaInventarioColumnar(PruebaConArchivos):
+    """InventarioColumnar guarda columnas en lugar de objetos, pero se comporta igual que Inventario."""
+
+    def aplicar_cambios(self, inventario):
+        inventario.anadir_productos([("a", "Arroz", 5, 1.5), ("b", "Pan", 2, 0.8), ("c", "Café", 9, 4.0)])
+        inventario.actualizar_producto("a", cantidad=3, nombre="Arroz integral")
+        inventario.eliminar_producto("b")
+        inventario.anadir_producto("d", "Pan de molde", 1, 2.25)
+        return inventario
+
+    def estado(self, inventario):
+        return ({pid: (p.nombre, p.cantidad, p.precio) for pid, p in inventario.productos.items()},
+                inventario.unidades_totales(), inventario.valor_total(),
+                [p.id for p in inventario.buscar_producto("pan")])
+
+    def test_igual_que_inventario(self):
+        esperado = self.estado(self.aplicar_cambios(Inventario(os.path.join(self.directorio, "a.json"))))
+        columnar = self.aplicar_cambios(InventarioColumnar(self.archivo, diario=True))
+        self.assertEqual(self.estado(columnar), esperado)
+        columnar.almacenamiento.cerrar()
+        self.assertEqual(self.estado(InventarioColumnar(self.archivo, diario=True)), esperado)
+
+
+class PruebaAnalitica(PruebaConArchivos):
+    """Los reportes dan lo mismo sobre un diccionario de productos y sobre columnas."""
+
+    DATOS = [("a", "Arroz", 5, 1.5), ("b", "Pan", 0, 0.8), ("c", "Café", 12, 4.0),
+             ("d", "Leche", 3, 10.0), ("e", "Aceite", 7, 55.0)]
+
+    def reportes(self, inventario):
+        inventario.anadir_productos(self.DATOS)
+        analitica = AnaliticaInventario(inventario)
+        return (analitica.resumen(),
+                [p.id for p in analitica.productos_bajo_stock(6)],
+                analitica.histograma_precios([1, 10, 50]))
+
+    def test_reportes(self):
+        resumen, bajo_stock, histograma = self.reportes(Inventario(self.archivo))
+        self.assertEqual(resumen, {'productos': 5, 'unidades': 27, 'valor_total': 470.5,
+                                   'precio_medio_por_unidad': 470.5 / 27})
+        self.assertEqual(bajo_stock, ["b", "d", "a"])
+        self.assertEqual([franja['productos'] for franja in histograma], [1, 2, 1, 1])
+        self.assertEqual((histograma[0]['desde'], histograma[-1]['hasta']), (None, None))
+
+    def test_columnar_igual(self):
+        esperado = self.reportes(Inventario(self.archivo))
+        columnar = InventarioColumnar(os.path.join(self.directorio, "columnas.json"))
+        self.assertEqual(self.reportes(columnar), esperado)
+
+
+class PruebaAlmacenamientoSQLite(PruebaConArchivos):
+    """Con SQLite las consultas se resuelven en la base y dan lo mismo que en memoria."""
+
+    NOMBRES = ["Café molido", "Cafetera", "Té verde", "Azúcar", "Descafeinado", "100% algodón",
+               "Cinta_adhesiva", 'Tornillo 3/4"', "Pan de molde"]
+    CONSULTAS = ["cafe", "CAFÉ", "te", "e", "100%", "%", "_", "a_a", '4"', "molde", "xyz"]
+
+    def setUp(self):
+        super().setUp()
+        self.ruta = os.path.join(self.directorio, "inventario.db")
+        self.en_memoria = Inventario(self.archivo)
+        self.sqlite = Inventario(almacenamiento=AlmacenamientoSQLite(self.ruta))
+        for inventario in (self.en_memoria, self.sqlite):
+            inventario.anadir_productos((f"p{i}", nombre, i, 1.5) for i, nombre in enumerate(self.NOMBRES))
+            inventario.actualizar_producto("p1", nombre="Cafetera italiana", cantidad=20)
+            inventario.eliminar_producto("p4")
+
+    def tearDown(self):
+        self.sqlite.almacenamiento.cerrar()
+        super().tearDown()
+
+    def ids(self, inventario, consulta, **paginas):
+        return [p.id for p in inventario.buscar_producto(consulta, **paginas)]
+
+    def test_busquedas_como_en_memoria(self):
+        for consulta in self.CONSULTAS:
+            with self.subTest(consulta=consulta):
+                self.assertEqual(self.ids(self.sqlite, consulta), self.ids(self.en_memoria, consulta))
+                self.assertEqual(self.ids(self.sqlite, consulta, limite=2, desplazamiento=1),
+                                 self.ids(self.en_memoria, consulta, limite=2, desplazamiento=1))
+
+    def test_cantidades_y_totales(self):
+        self.assertEqual([p.id for p in self.sqlite.productos_por_cantidad(2, 7)],
+                         [p.id for p in self.en_memoria.productos_por_cantidad(2, 7)])
+        self.assertEqual(self.sqlite.unidades_totales(), self.en_memoria.unidades_totales())
+        self.assertAlmostEqual(self.sqlite.valor_total(), self.en_memoria.valor_total())
+
+    def test_reabrir(self):
+        self.sqlite.almacenamiento.cerrar()
+        self.sqlite = Inventario(almacenamiento=AlmacenamientoSQLite(self.ruta))
+        self.assertEqual(self.cantidades(self.sqlite), self.cantidades(self.en_memoria))
+        self.assertEqual(self.ids(self.sqlite, "cafe"), ["p0", "p1"])
+
+    def test_base_sin_tabla_de_trigramas(self):
+        self.sqlite.almacenamiento.cerrar()
+        conexion = sqlite3.connect(self.ruta)
+        conexion.executescript("""
+            DROP TRIGGER productos_trigramas_ai;
+            DROP TRIGGER productos_trigramas_ad;
+            DROP TRIGGER productos_trigramas_au;
+            DROP TABLE productos_trigramas;
+        """)
+        conexion.close()
+        self.sqlite = Inventario(almacenamiento=AlmacenamientoSQLite(self.ruta))
+        for consulta in self.CONSULTAS:
+            self.assertEqual(self.ids(self.sqlite, consulta), self.ids(self.en_memoria, consulta))
+
+
+class PruebaAlmacenamientoJSONL(PruebaConArchivos):
+    """El archivo JSON por líneas se lee bajo demanda con su índice y solo crece hasta compactarse."""
+
+    def setUp(self):
+        super().setUp()
+        self.ruta = os.path.join(self.directorio, "inventario.jsonl")
+
+    def abrir_jsonl(self, umbral=1000):
+        return Inventario(almacenamiento=AlmacenamientoJSONL(self.ruta, umbral_compactacion=umbral))
+
+    def lineas(self):
+        with open(self.ruta, 'rb') as f:
+            return f.read().splitlines()
+
+    def test_reabrir_con_indice(self):
+        inventario = self.abrir_jsonl()
+        inventario.anadir_productos([("a", "Arroz", 5, 1.5), ("b", "Pan", 2, 0.8)])
+        inventario.actualizar_producto("a", cantidad=7)
+        inventario.eliminar_producto("b")
+        inventario.almacenamiento.cerrar()
+        self.assertEqual(len(self.lineas()), 4)
+        self.assertTrue(os.path.exists(self.ruta + ".indice"))
+
+        inventario = self.abrir_jsonl()
+        self.assertEqual(self.cantidades(inventario), {"a": 7})
+        inventario.almacenamiento.cerrar()
+
+    def test_lineas_nuevas_sin_indice_al_dia(self):
+        inventario = self.abrir_jsonl()
+        inventario.anadir_producto("a", "Arroz", 5, 1.5)
+        inventario.almacenamiento.cerrar()
+        # Otro programa añadió líneas después de guardar el índice; la última quedó a medias.
+        with open(self.ruta, 'ab') as f:
+            f.write(b'{"id":"c","nombre":"Caf\u00e9","cantidad":2,"precio":3.0}\n{"id":"d","nom')
+
+        inventario = self.abrir_jsonl()
+        self.assertEqual(self.cantidades(inventario), {"a": 5, "c": 2})
+        self.assertEqual(inventario.productos["c"].nombre, "Café")
+        inventario.anadir_producto("e", "Leche", 1, 1.0)
+        inventario.almacenamiento.cerrar()
+        self.assertEqual(self.cantidades(self.abrir_jsonl()), {"a": 5, "c": 2, "e": 1})
+
+    def test_compacta_con_muchas_lineas_obsoletas(self):
+        inventario = self.abrir_jsonl(umbral=5)
+        inventario.anadir_productos([("a", "Arroz", 0, 1.5), ("b", "Pan", 2, 0.8)])
+        for cantidad in range(1, 6):
+            inventario.actualizar_producto("a", cantidad=cantidad)
+        self.assertEqual(len(self.lineas()), 2)
+        self.assertEqual(self.cantidades(inventario), {"a": 5, "b": 2})
+        inventario.almacenamiento.cerrar()
+        self.assertEqual(self.cantidades(self.abrir_jsonl()), {"a": 5, "b": 2})
+
+
+class PruebaSincronizar(PruebaConArchivos):
+    """Dos procesos sobre el mismo inventario: el lector incorpora los cambios del otro."""
+
+    def test_varios_cambios_del_mismo_producto(self):
+        lector = self.abrir()
+        lector.anadir_producto("y", "Pan", 1, 1.0)
+        # Los totales y el índice ya están calculados antes de que cambie el otro proceso.
+        self.assertEqual(lector.valor_total(), 1.0)
+        self.assertEqual(lector.buscar_producto("pan")[0].id, "y")
+
+        escritor = self.abrir()
+        escritor.anadir_producto("x", "Leche", 10, 2.0)
+        lector.sincronizar()
+        self.assertEqual(lector.valor_total(), 21.0)
+
+        escritor.actualizar_producto("x", cantidad=20)
+        escritor.actualizar_producto("x", cantidad=30, nombre="Leche entera")
+
+        lector.sincronizar()
+        self.assertEqual(lector.unidades_totales(), 31)
+        self.assertEqual(lector.valor_total(), 61.0)
+        self.assertEqual([p.id for p in lector.buscar_producto("leche")], ["x"])
+        self.assertEqual(lector.productos["x"].cantidad, 30)
+        escritor.almacenamiento.cerrar()
+        lector.almacenamiento.cerrar()
+
+    def test_producto_eliminado_tras_cambiar(self):
+        lector = self.abrir()
+        escritor = self.abrir()
+        escritor.anadir_producto("x", "Leche", 10, 2.0)
+        lector.sincronizar()
+        self.assertEqual(lector.valor_total(), 20.0)
+
+        escritor.actualizar_producto("x", cantidad=5)
+        escritor.eliminar_producto("x")
+        lector.sincronizar()
+        self.assertEqual(lector.unidades_totales(), 0)
+        self.assertEqual(lector.valor_total(), 0.0)
+        self.assertEqual(lector.buscar_producto("leche"), [])
+        escritor.almacenamiento.cerrar()
+        lector.almacenamiento.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
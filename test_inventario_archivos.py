@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Pruebas del inventario en archivo CSV o SQLite
+# ('Sistema de Gestión de Inventarios con Archivos y Excepciones.py').
+#
+# Uso:
+#     python -m unittest test_inventario_archivos
+
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_modulo(nombre, archivo):
+    """Carga uno de los programas del proyecto como módulo (sus nombres tienen espacios)."""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+inventario_csv = cargar_modulo("inventario_csv", "Sistema de Gestión de Inventarios con Archivos y Excepciones.py")
+AlmacenamientoSQLite = inventario_csv.AlmacenamientoSQLite
+Inventario = inventario_csv.Inventario
+Producto = inventario_csv.Producto
+
+
+class PruebaConArchivos(unittest.TestCase):
+    """Base de las pruebas: un directorio temporal y sin los mensajes del inventario por pantalla."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.archivo = os.path.join(self.directorio, "inventario.txt")
+        self.salida = contextlib.redirect_stdout(io.StringIO())
+        self.salida.__enter__()
+
+    def tearDown(self):
+        self.salida.__exit__(None, None, None)
+        shutil.rmtree(self.directorio)
+
+
+class PruebaArchivoCSV(PruebaConArchivos):
+    """El CSV se lee producto a producto: las líneas inválidas se informan y no detienen la carga."""
+
+    def test_guardar_y_recorrer(self):
+        inventario = Inventario(self.archivo)
+        inventario.agregar_productos([Producto("a", 'Tornillo 3/4", caja', 5, 1.5),
+                                      Producto("b", "Pan\nde molde", 2, 0.8)])
+        errores = []
+        leidos = [(p.id_producto, p.nombre, p.cantidad, p.precio)
+                  for p in Inventario(self.archivo).iter_productos(errores)]
+        self.assertEqual(leidos, [("a", 'Tornillo 3/4", caja', 5, 1.5), ("b", "Pan\nde molde", 2, 0.8)])
+        self.assertEqual(errores, [])
+
+    def test_lineas_invalidas(self):
+        with open(self.archivo, 'w', encoding='utf-8') as f:
+            f.write("a,Arroz,5,1.5\n"
+                    "b,Pan,dos,0.8\n"
+                    "c,Café\n"
+                    "\n"
+                    "d,Leche,3,1.0\n")
+        inventario = Inventario(self.archivo)
+        self.assertEqual(sorted(inventario.productos), ["a", "d"])
+        self.assertEqual([e.numero_linea for e in inventario.errores_carga], [2, 3])
+        self.assertEqual(inventario.errores_carga[1].contenido, "c,Café")
+
+        errores = []
+        self.assertEqual([p.id_producto for p in inventario.iter_productos(errores)], ["a", "d"])
+        self.assertEqual(len(errores), 2)
+
+
+class PruebaProductosPorCantidad(PruebaConArchivos):
+    """Con SQLite la consulta se resuelve en la base; el resultado es el mismo que con el CSV."""
+
+    def test_csv_y_sqlite(self):
+        resultados = []
+        for almacenamiento in (None, AlmacenamientoSQLite(os.path.join(self.directorio, "inventario.db"))):
+            inventario = Inventario(self.archivo, almacenamiento=almacenamiento)
+            inventario.agregar_productos([Producto(f"p{i}", f"Producto {i}", (i * 7) % 10, 1.0)
+                                          for i in range(20)])
+            resultados.append([(p.id_producto, p.cantidad) for p in inventario.productos_por_cantidad(3, 6)])
+            inventario.almacenamiento.cerrar()
+        self.assertEqual(resultados[0], resultados[1])
+        self.assertEqual([c for _, c in resultados[0]], [3, 3, 4, 4, 5, 5])
+
+    def test_capacidad_del_almacenamiento(self):
+        self.assertFalse(inventario_csv.AlmacenamientoInventario.resuelve_consultas)
+        self.assertFalse(inventario_csv.AlmacenamientoCSV.resuelve_consultas)
+        self.assertTrue(AlmacenamientoSQLite.resuelve_consultas)
+
+
+if __name__ == "__main__":
+    unittest.main()